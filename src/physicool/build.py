@@ -0,0 +1,205 @@
+"""A module to compile PhysiCell projects and reuse the executables of previous builds."""
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from tempfile import mkstemp
+from typing import List, Optional, Tuple, Union
+
+from physicool.cache import get_file_digest
+
+BUILD_CACHE_ROOT = Path(".physicool/builds")
+BUILD_LOG = "build.log"
+SOURCE_PATTERNS = ("Makefile", "*.cpp", "*.cc", "*.c", "*.h", "*.hpp")
+EXCLUDED_FOLDERS = ("output", "temp", "config", ".physicool", ".git")
+BUILD_VARIABLES = (
+    "PHYSICELL_CPP",
+    "CXX",
+    "CC",
+    "CXXFLAGS",
+    "CFLAGS",
+    "LDFLAGS",
+    "ARCH",
+)
+
+
+class BuildError(RuntimeError):
+    """Raised when a PhysiCell project cannot be compiled."""
+
+
+def get_executable_name(project_name: str) -> str:
+    """Returns the name of the executable file of a project, based on the current OS."""
+    if platform.system() == "Windows":
+        return f"{project_name}.exe"
+    return project_name
+
+
+def find_source_files(
+    project_folder: Union[str, Path],
+    patterns: Tuple[str, ...] = SOURCE_PATTERNS,
+    excluded_folders: Tuple[str, ...] = EXCLUDED_FOLDERS,
+) -> List[Path]:
+    """Returns the (sorted) source files of a project, relative to the project folder."""
+    project_folder = Path(project_folder)
+    sources = set()
+    for pattern in patterns:
+        for path in project_folder.rglob(pattern):
+            relative_path = path.relative_to(project_folder)
+            if path.is_file() and not (
+                set(relative_path.parts) & set(excluded_folders)
+            ):
+                sources.add(relative_path)
+
+    return sorted(sources)
+
+
+def compute_build_key(
+    project_folder: Union[str, Path],
+    make_args: Tuple[str, ...] = (),
+    patterns: Tuple[str, ...] = SOURCE_PATTERNS,
+    excluded_folders: Tuple[str, ...] = EXCLUDED_FOLDERS,
+) -> str:
+    """
+    Returns a key that identifies a build of a project.
+
+    Parameters
+    ----------
+    project_folder
+        The folder with the Makefile of the project.
+    make_args
+        The arguments passed to make (e.g., compiler flags).
+    patterns
+        The glob patterns of the source files of the project.
+    excluded_folders
+        The folders that do not hold source files (e.g., outputs).
+
+    Returns
+    -------
+    str
+        The SHA-256 digest of the source files, make arguments, build
+        environment variables and machine architecture.
+    """
+    project_folder = Path(project_folder)
+    inputs = {
+        "sources": {
+            path.as_posix(): get_file_digest(project_folder / path)
+            for path in find_source_files(project_folder, patterns, excluded_folders)
+        },
+        "make_args": list(make_args),
+        "environment": {name: os.environ.get(name, "") for name in BUILD_VARIABLES},
+        "machine": [platform.system(), platform.machine()],
+    }
+    encoded = json.dumps(inputs, sort_keys=True).encode()
+
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@dataclass
+class BuildCache:
+    """
+    A local cache of compiled PhysiCell executables.
+
+    Each build is stored in its own folder, named after a hash of the project
+    sources, Makefile, make arguments and build environment, so make is only
+    called when something changed. Cached executables are read-only and can be
+    shared by all the simulations (and sandboxes) of a campaign.
+
+    Parameters
+    ----------
+    folder
+        The folder where the executables are stored.
+    project_folder
+        The folder with the Makefile of the project.
+    project_name
+        The base name of the PhysiCell executable file.
+    make_args
+        The arguments passed to make (e.g., compiler flags as "CXXFLAGS=-O3").
+    """
+
+    folder: Union[str, Path] = BUILD_CACHE_ROOT
+    project_folder: Union[str, Path] = "."
+    project_name: str = "project"
+    make_args: Tuple[str, ...] = field(default_factory=tuple)
+
+    def __post_init__(self) -> None:
+        """Creates the cache folder if it does not exist."""
+        self.folder = Path(self.folder).absolute()
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.project_folder = Path(self.project_folder)
+
+    def get_key(self) -> str:
+        """Returns the key of the current state of the project."""
+        return compute_build_key(self.project_folder, tuple(self.make_args))
+
+    def get_cached_executable(self, key: Optional[str] = None) -> Optional[Path]:
+        """Returns the cached executable for the passed key, or None if it was not built."""
+        executable = (
+            self.folder
+            / (key or self.get_key())
+            / get_executable_name(self.project_name)
+        )
+        if executable.is_file():
+            return executable
+
+        return None
+
+    def get_executable(self) -> Path:
+        """
+        Returns the path to the executable of the current state of the project,
+        compiling it if it is not in the cache.
+
+        Raises
+        ------
+        BuildError
+            When make fails or the executable is not created.
+        """
+        key = self.get_key()
+        executable = self.get_cached_executable(key)
+        if executable is None:
+            executable = self.build(key)
+
+        return executable
+
+    def build(self, key: Optional[str] = None) -> Path:
+        """
+        Compiles the project with make and stores the executable in the cache.
+
+        All the targets are rebuilt (make -B): a new key may only come from new
+        make arguments or build variables (e.g., compiler flags), which make
+        does not track, so it would otherwise keep the outdated executable.
+        """
+        key = key or self.get_key()
+        build_folder = self.folder / key
+        build_folder.mkdir(exist_ok=True)
+        with open(build_folder / BUILD_LOG, "w") as log_file:
+            result = subprocess.run(
+                ["make", "-B", *self.make_args],
+                cwd=self.project_folder,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+            )
+
+        name = get_executable_name(self.project_name)
+        if (result.returncode != 0) or not (self.project_folder / name).is_file():
+            raise BuildError(
+                f"The project could not be compiled (see {build_folder / BUILD_LOG})."
+            )
+
+        # Copy to a temporary file first, so other processes never see a partial file
+        descriptor, tmp_path = mkstemp(dir=build_folder)
+        os.close(descriptor)
+        shutil.copy2(self.project_folder / name, tmp_path)
+        os.chmod(tmp_path, 0o555)
+        os.replace(tmp_path, build_folder / name)
+
+        return build_folder / name
+
+    def clear(self) -> None:
+        """Deletes all the cached executables."""
+        for build_folder in self.folder.iterdir():
+            if build_folder.is_dir():
+                shutil.rmtree(build_folder)
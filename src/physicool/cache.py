@@ -0,0 +1,227 @@
+"""A module to store and reuse the output metrics of previous black box evaluations."""
+import hashlib
+import json
+import os
+import pickle
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from pathlib import Path
+from tempfile import mkstemp
+from types import CodeType
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+CACHE_ROOT = Path(".physicool/cache")
+CACHE_SUFFIX = ".pkl"
+
+
+@lru_cache(maxsize=None)
+def _cached_file_digest(path: str, modified: int, size: int) -> str:
+    """Returns the SHA-256 digest of a file (cached by modification time and size)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def get_file_digest(path: Union[str, Path]) -> str:
+    """Returns the SHA-256 digest of a file, or an empty string if it does not exist."""
+    path = Path(path)
+    if not path.is_file():
+        return ""
+
+    stats = path.stat()
+    return _cached_file_digest(str(path.absolute()), stats.st_mtime_ns, stats.st_size)
+
+
+def _update_code_digest(digest: Any, code: CodeType) -> None:
+    """Adds the bytecode and constants of a code object (and its nested code) to a digest."""
+    digest.update(code.co_code)
+    for constant in code.co_consts:
+        if isinstance(constant, CodeType):
+            _update_code_digest(digest, constant)
+        else:
+            digest.update(repr(constant).encode())
+
+
+def _dump_state(value: Any) -> bytes:
+    """
+    Returns the pickled value, or its repr if it cannot be pickled (reprs that
+    include memory addresses change between runs, so they only cause cache misses).
+    """
+    try:
+        return pickle.dumps(value, protocol=4)
+    except Exception:
+        return repr(value).encode()
+
+
+def get_processor_digest(processor: Callable) -> str:
+    """
+    Returns the SHA-256 digest of an output processor, so processors that share
+    a name do not share cache entries: the function and arguments of a partial,
+    the name, code and bound values (defaults, closure, instance) of a function or
+    method, or the class and state of a callable instance.
+    """
+    digest = hashlib.sha256()
+    if isinstance(processor, partial):
+        digest.update(get_processor_digest(processor.func).encode())
+        digest.update(_dump_state((processor.args, processor.keywords)))
+    elif hasattr(processor, "__code__"):
+        name = f"{processor.__module__}.{processor.__qualname__}"
+        digest.update(name.encode())
+        _update_code_digest(digest, processor.__code__)
+        closure = [cell.cell_contents for cell in processor.__closure__ or ()]
+        digest.update(_dump_state((processor.__defaults__, closure)))
+        if getattr(processor, "__self__", None) is not None:
+            digest.update(_dump_state(processor.__self__))
+    else:
+        name = f"{type(processor).__module__}.{type(processor).__qualname__}"
+        digest.update(name.encode())
+        digest.update(_dump_state(processor))
+
+    return digest.hexdigest()
+
+
+def compute_evaluation_key(
+    config_path: Union[str, Path],
+    params: Optional[Dict[str, float]],
+    replicate: int,
+    executable: Union[str, Path],
+    processor: Optional[Callable] = None,
+    random_seed: Optional[int] = None,
+) -> str:
+    """
+    Returns a key that identifies a single simulation and the metrics computed from it.
+
+    Parameters
+    ----------
+    config_path
+        The path to the rendered config file of the evaluation.
+    params
+        The parameter values of the evaluation.
+    replicate
+        The index of the replicate.
+    executable
+        The path to the PhysiCell executable.
+    processor
+        The function used to compute the output metrics (see get_processor_digest).
+    random_seed
+        The random seed of the simulation (if it is set by the black box).
+
+    Returns
+    -------
+    str
+        The SHA-256 digest of the evaluation inputs.
+    """
+    processor_digest = ""
+    if processor is not None:
+        processor_digest = get_processor_digest(processor)
+
+    inputs = {
+        "config": get_file_digest(config_path),
+        "params": {name: float(value) for name, value in (params or {}).items()},
+        "replicate": replicate,
+        "executable": get_file_digest(executable),
+        "processor": processor_digest,
+    }
+    if random_seed is not None:
+        inputs["random_seed"] = random_seed
+    encoded = json.dumps(inputs, sort_keys=True).encode()
+
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@dataclass
+class EvaluationCache:
+    """
+    An on-disk cache of the output metrics computed by the black box.
+
+    Each entry is stored in its own file, named after the evaluation key. Reading
+    an entry marks it as recently used, and the least recently used entries are
+    deleted when the cache grows larger than max_size.
+
+    Parameters
+    ----------
+    folder
+        The folder where the cache entries are stored.
+    max_size
+        The maximum size of the cache (in bytes). If None, entries are never evicted.
+    """
+
+    folder: Union[str, Path] = CACHE_ROOT
+    max_size: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        """Creates the cache folder if it does not exist."""
+        self.folder = Path(self.folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    def __contains__(self, key: str) -> bool:
+        return self._entry_path(key).is_file()
+
+    def __len__(self) -> int:
+        return len(list(self.folder.glob(f"*{CACHE_SUFFIX}")))
+
+    @property
+    def size(self) -> int:
+        """Returns the total size of the cache entries (in bytes)."""
+        return sum(stats.st_size for _, stats in self._stat_entries())
+
+    def _entry_path(self, key: str) -> Path:
+        return self.folder / f"{key}{CACHE_SUFFIX}"
+
+    def _stat_entries(self) -> List[Tuple[Path, os.stat_result]]:
+        """
+        Returns the cache entries with their stats, skipping the entries deleted
+        in the meantime (e.g., evicted by another replicate or worker).
+        """
+        entries = []
+        for entry in self.folder.glob(f"*{CACHE_SUFFIX}"):
+            try:
+                entries.append((entry, entry.stat()))
+            except FileNotFoundError:
+                continue
+
+        return entries
+
+    def load(self, key: str) -> Optional[Any]:
+        """Returns the stored metrics for the passed key, or None if there is no entry."""
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as file:
+                value = pickle.load(file)
+            os.utime(path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+        return value
+
+    def store(self, key: str, value: Any) -> None:
+        """Stores the metrics for the passed key and evicts old entries if needed."""
+        descriptor, tmp_path = mkstemp(dir=self.folder, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as file:
+            pickle.dump(value, file)
+        os.replace(tmp_path, self._entry_path(key))
+
+        if self.max_size is not None:
+            self.evict(self.max_size)
+
+    def evict(self, max_size: int) -> None:
+        """Deletes the least recently used entries until the cache fits in max_size bytes."""
+        entries = sorted(self._stat_entries(), key=lambda entry: entry[1].st_mtime)
+        total_size = sum(stats.st_size for _, stats in entries)
+        for entry, stats in entries:
+            if total_size <= max_size:
+                break
+            total_size -= stats.st_size
+            entry.unlink(missing_ok=True)
+
+    def invalidate(self, key: str) -> None:
+        """Deletes the entry for the passed key, if it exists."""
+        self._entry_path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Deletes all the entries of the cache."""
+        for entry in self.folder.glob(f"*{CACHE_SUFFIX}"):
+            entry.unlink(missing_ok=True)
@@ -1,7 +1,7 @@
 # This module enables users to programmatically modify their PhysiCell XML config file
 from pathlib import Path
 from xml.etree import ElementTree
-from typing import List, Union
+from typing import List, Optional, Union
 
 import physicool.datatypes as dt
 from physicool import pcxml
@@ -54,6 +54,38 @@ class ConfigFileParser:
         """Returns the <overall> data from the XML file."""
         return dt.Overall(**pcxml.parse_overall(tree=self.tree, path="overall"))
 
+    def read_output_folder(self) -> Path:
+        """Returns the output folder defined in the <save> data from the XML file."""
+        return Path(pcxml.parse_save_folder(tree=self.tree, path="save"))
+
+    def read_omp_num_threads(self) -> int:
+        """Returns the number of OpenMP threads defined in the <parallel> data."""
+        return pcxml.parse_omp_num_threads(tree=self.tree, path="parallel")
+
+    def read_random_seed(self) -> int:
+        """Returns the random seed defined in the <user_parameters> data."""
+        return pcxml.parse_random_seed(tree=self.tree, path="user_parameters")
+
+    def read_initial_cells(self) -> Optional[Path]:
+        """Returns the initial cell positions file, or None if it is not enabled."""
+        cell_positions = pcxml.parse_cell_positions(
+            tree=self.tree, path="initial_conditions/cell_positions"
+        )
+        if not cell_positions["enabled"]:
+            return None
+
+        return Path(cell_positions["folder"]) / cell_positions["filename"]
+
+    def read_me_initial_condition(self) -> Optional[Path]:
+        """Returns the microenvironment initial condition file, or None if it is not enabled."""
+        initial_condition = pcxml.parse_me_initial_condition(
+            tree=self.tree, path="microenvironment_setup/options/initial_condition"
+        )
+        if not initial_condition["enabled"]:
+            return None
+
+        return Path(initial_condition["filename"])
+
     def read_me_params(self) -> List[dt.Substance]:
         """Returns the <microenvironment_setup> data form the XML file."""
         return [
@@ -235,6 +267,114 @@ class ConfigFileParser:
         if update_file:
             self.tree.write(self.config_file)
 
+    def write_output_folder(
+        self, folder: Union[str, Path], update_file: bool = True
+    ) -> None:
+        """
+        Writes the output folder to the <save> data in the XML tree and file.
+
+        Parameters
+        ----------
+        folder
+            The path to the folder where PhysiCell should write the output files.
+        update_file
+            If the values should be written to the file. If False, the values
+            will only be changed in the XML tree.
+        """
+        pcxml.write_save_folder(
+            new_value=Path(folder).as_posix(), tree=self.tree, path="save"
+        )
+        if update_file:
+            self.tree.write(self.config_file)
+
+    def write_omp_num_threads(self, threads: int, update_file: bool = True) -> None:
+        """
+        Writes the number of OpenMP threads to the <parallel> data in the XML tree and file.
+
+        Parameters
+        ----------
+        threads
+            The number of threads to be used by PhysiCell.
+        update_file
+            If the values should be written to the file. If False, the values
+            will only be changed in the XML tree.
+        """
+        pcxml.write_omp_num_threads(new_value=threads, tree=self.tree, path="parallel")
+        if update_file:
+            self.tree.write(self.config_file)
+
+    def write_random_seed(self, seed: int, update_file: bool = True) -> None:
+        """
+        Writes the random seed to the <user_parameters> data in the XML tree and file.
+
+        Parameters
+        ----------
+        seed
+            The seed of the random number generator used by PhysiCell.
+        update_file
+            If the values should be written to the file. If False, the values
+            will only be changed in the XML tree.
+        """
+        pcxml.write_random_seed(new_value=seed, tree=self.tree, path="user_parameters")
+        if update_file:
+            self.tree.write(self.config_file)
+
+    def write_initial_cells(
+        self, path: Union[str, Path], update_file: bool = True
+    ) -> None:
+        """
+        Enables the initial cell positions in the XML tree and file, read from
+        the passed CSV file.
+
+        Parameters
+        ----------
+        path
+            The path to the CSV file with the initial cell positions.
+        update_file
+            If the values should be written to the file. If False, the values
+            will only be changed in the XML tree.
+        """
+        path = Path(path)
+        pcxml.write_cell_positions(
+            new_values={
+                "enabled": True,
+                "type": "csv",
+                "folder": path.parent.as_posix(),
+                "filename": path.name,
+            },
+            tree=self.tree,
+            path="initial_conditions/cell_positions",
+        )
+        if update_file:
+            self.tree.write(self.config_file)
+
+    def write_me_initial_condition(
+        self, path: Union[str, Path], update_file: bool = True
+    ) -> None:
+        """
+        Enables the microenvironment initial condition in the XML tree and file,
+        read from the passed MATLAB file.
+
+        Parameters
+        ----------
+        path
+            The path to the MATLAB file with the initial substance concentrations.
+        update_file
+            If the values should be written to the file. If False, the values
+            will only be changed in the XML tree.
+        """
+        pcxml.write_me_initial_condition(
+            new_values={
+                "enabled": True,
+                "type": "matlab",
+                "filename": Path(path).as_posix(),
+            },
+            tree=self.tree,
+            path="microenvironment_setup/options/initial_condition",
+        )
+        if update_file:
+            self.tree.write(self.config_file)
+
     def write_substance_params(
         self, substance: dt.Substance, update_file: bool = True
     ) -> None:
@@ -0,0 +1,256 @@
+"""A module to distribute black box evaluations to workers on several hosts over TCP."""
+import argparse
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import Executor, Future
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass, field
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from physicool.executors import DONE, FAILED, ExecutorBackend
+
+DEFAULT_PORT = 6010
+AUTHKEY_VARIABLE = "PHYSICOOL_AUTHKEY"
+
+Address = Tuple[str, int]
+
+
+@dataclass
+class _Task:
+    """A call submitted to the coordinator, with the future of its result."""
+
+    function: Callable
+    args: Tuple
+    kwargs: Dict[str, Any]
+    future: Future
+
+
+class CoordinatorExecutor(Executor):
+    """
+    An executor that sends each call to the workers connected to it over TCP.
+
+    The coordinator listens on the passed address, and each worker (see
+    run_worker) pulls a single call at a time, runs it in its own folder and
+    sends back the result and its telemetry (host, process and duration).
+    Calls held by a worker that disconnects are sent to another worker.
+
+    Calls and results are pickled, so only workers with the authentication key
+    can connect. Do not expose the coordinator to untrusted networks.
+
+    Parameters
+    ----------
+    address
+        The (host, port) address where the coordinator listens for workers.
+    authkey
+        The key shared by the coordinator and the workers.
+    telemetry
+        A list where the telemetry of each finished call is appended.
+    """
+
+    def __init__(
+        self,
+        address: Address,
+        authkey: bytes,
+        telemetry: Optional[List[Dict[str, Any]]] = None,
+    ):
+        self._authkey = authkey
+        self._listener = Listener(address, authkey=authkey)
+        self.address = self._listener.address
+        self.telemetry = telemetry if telemetry is not None else []
+        self._tasks: "queue.Queue[_Task]" = queue.Queue()
+        self._futures: List[Future] = []
+        self._shutdown = threading.Event()
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        if self._shutdown.is_set():
+            raise RuntimeError("Cannot submit new calls after shutdown.")
+
+        future = Future()
+        self._futures.append(future)
+        self._tasks.put(_Task(fn, args, kwargs, future))
+        return future
+
+    def _accept(self) -> None:
+        """Accepts new worker connections and serves each one in its own thread."""
+        while not self._shutdown.is_set():
+            try:
+                connection = self._listener.accept()
+            except Exception:
+                # Failed handshakes (e.g., wrong authentication key) are ignored
+                continue
+            threading.Thread(
+                target=self._serve, args=(connection,), daemon=True
+            ).start()
+
+    def _next_task(self) -> Optional[_Task]:
+        """Returns the next call to be run, or None after the executor is shut down."""
+        while True:
+            try:
+                return self._tasks.get(timeout=0.1)
+            except queue.Empty:
+                if self._shutdown.is_set():
+                    return None
+
+    def _serve(self, connection: Connection) -> None:
+        """Sends calls to a single worker until the executor is shut down."""
+        try:
+            _, worker = connection.recv()
+            while True:
+                task = self._next_task()
+                if task is None:
+                    connection.send(("stop",))
+                    return
+                if not (
+                    task.future.running() or task.future.set_running_or_notify_cancel()
+                ):
+                    continue
+
+                try:
+                    connection.send(("call", task.function, task.args, task.kwargs))
+                    status, value, telemetry = connection.recv()
+                except (EOFError, OSError):
+                    # The worker disconnected, so the call is sent to another one
+                    self._tasks.put(task)
+                    return
+
+                self.telemetry.append({"worker": worker, **telemetry})
+                if status == DONE:
+                    task.future.set_result(value)
+                else:
+                    task.future.set_exception(value)
+        except (EOFError, OSError):
+            return
+        finally:
+            connection.close()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if cancel_futures:
+            while True:
+                try:
+                    self._tasks.get_nowait().future.cancel()
+                except queue.Empty:
+                    break
+
+        if wait:
+            wait_futures(self._futures)
+
+        if not self._shutdown.is_set():
+            self._shutdown.set()
+            # Wakes up the accept thread, which is blocked until a client connects
+            try:
+                Client(self.address, authkey=self._authkey).close()
+            except OSError:
+                pass
+            self._accept_thread.join()
+            self._listener.close()
+
+
+def run_worker(
+    address: Address,
+    authkey: bytes,
+    stop: Optional[threading.Event] = None,
+    retry_interval: float = 1.0,
+) -> None:
+    """
+    Connects to a coordinator and runs the calls it sends, until the stop event
+    is set (or forever). The worker connects again when the coordinator closes the
+    connection (e.g., at the end of a batch) or is not running yet.
+
+    Black box evaluations are run in the current folder, so the worker should be
+    started in the PhysiCell project folder of its host.
+
+    Parameters
+    ----------
+    address
+        The (host, port) address of the coordinator.
+    authkey
+        The key shared by the coordinator and the workers.
+    stop
+        An event that stops the worker when it is set (checked between connections).
+    retry_interval
+        The time (in seconds) between connection attempts.
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    while (stop is None) or not stop.is_set():
+        try:
+            connection = Client(address, authkey=authkey)
+        except OSError:
+            time.sleep(retry_interval)
+            continue
+
+        with connection:
+            connection.send(("ready", worker))
+            while True:
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    break
+                if message[0] == "stop":
+                    break
+
+                _, function, args, kwargs = message
+                start = time.perf_counter()
+                try:
+                    outcome = (DONE, function(*args, **kwargs))
+                except Exception as error:
+                    outcome = (FAILED, error)
+                telemetry = {"host": socket.gethostname(), "pid": os.getpid()}
+                telemetry["duration"] = time.perf_counter() - start
+                connection.send((*outcome, telemetry))
+
+        time.sleep(retry_interval)
+
+
+@dataclass
+class DistributedBackend(ExecutorBackend):
+    """
+    Sends the evaluations to workers on several hosts (see CoordinatorExecutor).
+    The number of evaluations running at the same time is set by the number of
+    workers, so max_workers is ignored.
+
+    Parameters
+    ----------
+    authkey
+        The key shared by the coordinator and the workers.
+    address
+        The (host, port) address where the coordinator listens for workers.
+    telemetry
+        The telemetry of the evaluations run by the workers (host, process and
+        duration), in the order they finished.
+    """
+
+    authkey: bytes
+    address: Address = ("0.0.0.0", DEFAULT_PORT)
+    telemetry: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The backend is sent to the workers with the black box: skip the telemetry
+        return {**self.__dict__, "telemetry": []}
+
+    def create_executor(self, max_workers: Optional[int] = None) -> Executor:
+        return CoordinatorExecutor(self.address, self.authkey, self.telemetry)
+
+    def get_concurrent_runs(self, max_workers: Optional[int]) -> Optional[int]:
+        return None
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """Runs a worker from the command line (the key is read from PHYSICOOL_AUTHKEY)."""
+    parser = argparse.ArgumentParser(prog="python -m physicool.distributed")
+    parser.add_argument("address", help="the coordinator address, as host:port")
+    parser.add_argument("--retry-interval", type=float, default=1.0)
+    args = parser.parse_args(arguments)
+
+    host, port = args.address.rsplit(":", 1)
+    authkey = os.environ[AUTHKEY_VARIABLE].encode()
+    run_worker((host, int(port)), authkey, retry_interval=args.retry_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+"""A module with interchangeable backends to run black box evaluations."""
+import argparse
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from tempfile import mkstemp
+from typing import Any, Callable, Dict, Optional, Union
+from uuid import uuid4
+
+QUEUE_ROOT = Path(".physicool/queue")
+JOB_SUFFIX = ".job.pkl"
+SCRIPT_SUFFIX = ".sh"
+STATUS_SUFFIX = ".status"
+RESULT_SUFFIX = ".result.pkl"
+
+HEARTBEAT_TIMEOUT = 120.0
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    """Writes the data to a temporary file and moves it to the passed path."""
+    descriptor, tmp_path = mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(descriptor, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+class JobLostError(RuntimeError):
+    """
+    Raised when a queued job stops without writing its result (e.g., it was
+    killed by the batch scheduler) or is not started in time.
+    """
+
+
+def read_job_status(status_file: Path) -> Optional[str]:
+    """Returns the status written to a job status file (None if it does not exist)."""
+    try:
+        return status_file.read_text().strip()
+    except FileNotFoundError:
+        return None
+
+
+def write_job_status(status_file: Path, status: str) -> None:
+    """Writes the status of a job to its status file."""
+    _write_atomically(status_file, status.encode())
+
+
+def _send_heartbeats(status_file: Path, interval: float, stop: threading.Event) -> None:
+    """Updates the modification time of a status file until the stop event is set."""
+    while not stop.wait(interval):
+        try:
+            os.utime(status_file)
+        except FileNotFoundError:
+            continue
+
+
+def run_job(
+    job_file: Union[str, Path], heartbeat_interval: float = HEARTBEAT_TIMEOUT / 4
+) -> None:
+    """
+    Runs a job written by a FileQueueExecutor (the call that a job script makes).
+
+    The pickled call is loaded from the job file and its return value (or the
+    raised exception) is written to the result file, next to the job file. The
+    status file is updated when the job starts and finishes, and touched every
+    heartbeat_interval seconds while it runs, so the executor can tell running
+    jobs from jobs killed by the scheduler.
+
+    Parameters
+    ----------
+    job_file
+        The path to the pickled call of the job.
+    heartbeat_interval
+        The time (in seconds) between updates of the status file.
+    """
+    job_file = Path(job_file)
+    job_id = job_file.name[: -len(JOB_SUFFIX)]
+    status_file = job_file.parent / f"{job_id}{STATUS_SUFFIX}"
+    write_job_status(status_file, RUNNING)
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_send_heartbeats,
+        args=(status_file, heartbeat_interval, stop),
+        daemon=True,
+    )
+    heartbeat.start()
+    try:
+        with open(job_file, "rb") as file:
+            function, args, kwargs = pickle.load(file)
+        outcome = (DONE, function(*args, **kwargs))
+    except Exception as error:
+        outcome = (FAILED, error)
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    _write_atomically(
+        job_file.parent / f"{job_id}{RESULT_SUFFIX}", pickle.dumps(outcome)
+    )
+    write_job_status(status_file, outcome[0])
+
+
+class SerialExecutor(Executor):
+    """An executor that runs each call in the current process, when it is submitted."""
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as error:
+            future.set_exception(error)
+
+        return future
+
+
+class FileQueueExecutor(Executor):
+    """
+    An executor that writes each call to a queue folder, as a batch scheduler job.
+
+    Each job is made of a pickled call, a job script that runs it and a status
+    file ("queued", "running", "done" or "failed"). The job scripts can be
+    submitted to a batch scheduler (e.g., with sbatch) or run by a
+    QueueDispatcher. A background thread checks the status files every
+    poll_interval seconds and completes the futures when the results are written.
+
+    Running jobs touch their status file regularly (see run_job). If a running
+    job does not update it for heartbeat_timeout seconds (e.g., it was killed by
+    the scheduler for exceeding its walltime or memory, or its node was lost),
+    or a job is still queued after queue_timeout seconds, its future fails with
+    a JobLostError and its files are removed.
+
+    The futures are marked as running when their jobs start, so only queued
+    jobs can be cancelled: their files are removed from the queue folder before
+    they are dispatched.
+
+    Parameters
+    ----------
+    folder
+        The queue folder, shared by the submitting process and the jobs.
+    poll_interval
+        The time (in seconds) between checks of the status files.
+    heartbeat_timeout
+        The time (in seconds) without updates after which a running job is lost.
+    queue_timeout
+        The time (in seconds) after which a job that did not start is lost.
+        If None, jobs can wait in the queue forever.
+    """
+
+    def __init__(
+        self,
+        folder: Union[str, Path] = QUEUE_ROOT,
+        poll_interval: float = 1.0,
+        heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+        queue_timeout: Optional[float] = None,
+    ):
+        self.folder = Path(folder).absolute()
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.queue_timeout = queue_timeout
+        self._futures: Dict[str, Future] = {}
+        self._submitted: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._shutdown = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        if self._shutdown.is_set():
+            raise RuntimeError("Cannot submit new jobs after shutdown.")
+
+        job_id = uuid4().hex
+        job_file = self.folder / f"{job_id}{JOB_SUFFIX}"
+        _write_atomically(job_file, pickle.dumps((fn, args, kwargs)))
+        self._write_job_script(job_id, job_file)
+
+        future = Future()
+        with self._lock:
+            self._futures[job_id] = future
+            self._submitted[job_id] = time.monotonic()
+        write_job_status(self.folder / f"{job_id}{STATUS_SUFFIX}", QUEUED)
+
+        return future
+
+    def _write_job_script(self, job_id: str, job_file: Path) -> None:
+        """Writes the shell script that runs a job with the current Python environment."""
+        python_path = os.pathsep.join(path for path in sys.path if path)
+        script = (
+            "#!/bin/sh\n"
+            f"cd '{os.getcwd()}'\n"
+            f"export PYTHONPATH='{python_path}'\n"
+            f"'{sys.executable}' -m physicool.executors run '{job_file}' "
+            f"--heartbeat-interval {self.heartbeat_timeout / 4}\n"
+        )
+        script_file = self.folder / f"{job_id}{SCRIPT_SUFFIX}"
+        _write_atomically(script_file, script.encode())
+        script_file.chmod(0o755)
+
+    def _watch(self) -> None:
+        """Completes the futures of the jobs that have finished."""
+        while not (self._shutdown.is_set() and not self._futures):
+            with self._lock:
+                job_ids = list(self._futures.items())
+
+            for job_id, future in job_ids:
+                status_file = self.folder / f"{job_id}{STATUS_SUFFIX}"
+                status = read_job_status(status_file)
+                if status in (DONE, FAILED):
+                    self._complete(job_id)
+                elif status == RUNNING:
+                    if not future.running():
+                        future.set_running_or_notify_cancel()
+                    self._check_heartbeat(job_id, status_file)
+                elif status == QUEUED:
+                    if future.cancelled():
+                        self._drop(job_id)
+                    else:
+                        self._check_queue_time(job_id)
+
+            time.sleep(self.poll_interval)
+
+    def _check_heartbeat(self, job_id: str, status_file: Path) -> None:
+        """Fails the future of a running job that stopped updating its status file."""
+        try:
+            silence = time.time() - status_file.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if silence > self.heartbeat_timeout:
+            self._fail(
+                job_id,
+                JobLostError(
+                    f"The job {job_id} did not update its status for {silence:.0f} s "
+                    "(it may have been killed by the scheduler)."
+                ),
+            )
+
+    def _check_queue_time(self, job_id: str) -> None:
+        """Fails the future of a job that is queued for longer than queue_timeout."""
+        submitted = self._submitted.get(job_id)
+        if (self.queue_timeout is None) or (submitted is None):
+            return
+        waiting = time.monotonic() - submitted
+        if waiting > self.queue_timeout:
+            self._fail(
+                job_id,
+                JobLostError(f"The job {job_id} did not start after {waiting:.0f} s."),
+            )
+
+    def _fail(self, job_id: str, error: JobLostError) -> None:
+        """Sets the error of a lost job and removes its files."""
+        future = self._pop(job_id)
+        if (future is not None) and not future.cancelled():
+            future.set_exception(error)
+        self._remove_files(job_id)
+
+    def _drop(self, job_id: str) -> None:
+        """Removes a queued job that was cancelled, so it is not dispatched."""
+        self._pop(job_id)
+        self._remove_files(job_id)
+
+    def _pop(self, job_id: str) -> Optional[Future]:
+        """Stops tracking a job and returns its future (None if it was dropped)."""
+        with self._lock:
+            self._submitted.pop(job_id, None)
+            return self._futures.pop(job_id, None)
+
+    def _remove_files(self, job_id: str) -> None:
+        """
+        Removes the files of a job from the queue folder (the status file first,
+        so a dispatcher does not start the job while they are removed).
+        """
+        for suffix in (STATUS_SUFFIX, JOB_SUFFIX, SCRIPT_SUFFIX, RESULT_SUFFIX):
+            (self.folder / f"{job_id}{suffix}").unlink(missing_ok=True)
+
+    def _complete(self, job_id: str) -> None:
+        """Reads the result of a finished job, sets its future and removes its files."""
+        with open(self.folder / f"{job_id}{RESULT_SUFFIX}", "rb") as file:
+            status, value = pickle.load(file)
+
+        future = self._pop(job_id)
+        if (future is not None) and not future.cancelled():
+            if status == DONE:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+        self._remove_files(job_id)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if cancel_futures:
+            with self._lock:
+                job_ids = list(self._futures.items())
+            for job_id, future in job_ids:
+                status_file = self.folder / f"{job_id}{STATUS_SUFFIX}"
+                if (read_job_status(status_file) == QUEUED) and future.cancel():
+                    self._drop(job_id)
+
+        self._shutdown.set()
+        if wait:
+            self._watcher.join()
+
+
+@dataclass
+class QueueDispatcher:
+    """
+    A local stand-in for a batch scheduler, which runs the queued job scripts.
+
+    Parameters
+    ----------
+    folder
+        The queue folder where the job scripts are written.
+    max_jobs
+        The maximum number of jobs running at the same time.
+    poll_interval
+        The time (in seconds) between checks of the queue folder.
+    """
+
+    folder: Union[str, Path] = QUEUE_ROOT
+    max_jobs: int = 1
+    poll_interval: float = 1.0
+    running: Dict[str, subprocess.Popen] = field(init=False, default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.folder = Path(self.folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    def dispatch(self) -> None:
+        """Removes the finished jobs and starts queued jobs if there are free slots."""
+        for job_id, process in list(self.running.items()):
+            if process.poll() is not None:
+                self.running.pop(job_id)
+
+        for status_file in sorted(
+            self.folder.glob(f"*{STATUS_SUFFIX}"), key=os.path.getmtime
+        ):
+            if len(self.running) >= self.max_jobs:
+                break
+            job_id = status_file.name[: -len(STATUS_SUFFIX)]
+            if (job_id in self.running) or (read_job_status(status_file) != QUEUED):
+                continue
+            script_file = self.folder / f"{job_id}{SCRIPT_SUFFIX}"
+            self.running[job_id] = subprocess.Popen(["sh", str(script_file)])
+
+    def serve(self, stop: Optional[threading.Event] = None) -> None:
+        """Dispatches the queued jobs until the stop event is set (or forever)."""
+        while (stop is None) or not stop.is_set():
+            self.dispatch()
+            time.sleep(self.poll_interval)
+
+        for process in self.running.values():
+            process.wait()
+
+
+class ExecutorBackend(ABC):
+    """A factory of executors, used by the black box to run several evaluations."""
+
+    @abstractmethod
+    def create_executor(self, max_workers: Optional[int] = None) -> Executor:
+        """Returns a new executor that runs up to max_workers calls at the same time."""
+
+    def get_concurrent_runs(self, max_workers: Optional[int]) -> Optional[int]:
+        """
+        Returns the number of evaluations that run at the same time on this
+        machine (used to split its cores), or None if it is not known.
+        """
+        return max_workers
+
+
+@dataclass
+class SerialBackend(ExecutorBackend):
+    """Runs the evaluations one after the other, in the current process."""
+
+    def create_executor(self, max_workers: Optional[int] = None) -> Executor:
+        return SerialExecutor()
+
+    def get_concurrent_runs(self, max_workers: Optional[int]) -> Optional[int]:
+        return 1
+
+
+@dataclass
+class ProcessPoolBackend(ExecutorBackend):
+    """Runs the evaluations in a pool of local processes."""
+
+    def create_executor(self, max_workers: Optional[int] = None) -> Executor:
+        return ProcessPoolExecutor(max_workers=max_workers)
+
+    def get_concurrent_runs(self, max_workers: Optional[int]) -> Optional[int]:
+        return max_workers or os.cpu_count()
+
+
+@dataclass
+class FileQueueBackend(ExecutorBackend):
+    """
+    Writes the evaluations to a queue folder as batch scheduler jobs (see
+    FileQueueExecutor). The number of running jobs is set by the scheduler (or
+    the QueueDispatcher), so max_workers is ignored.
+
+    Parameters
+    ----------
+    folder
+        The queue folder, which must be visible to the machines running the jobs.
+    poll_interval
+        The time (in seconds) between checks of the job status files.
+    heartbeat_timeout
+        The time (in seconds) without updates after which a running job is lost.
+    queue_timeout
+        The time (in seconds) after which a job that did not start is lost.
+    """
+
+    folder: Union[str, Path] = QUEUE_ROOT
+    poll_interval: float = 1.0
+    heartbeat_timeout: float = HEARTBEAT_TIMEOUT
+    queue_timeout: Optional[float] = None
+
+    def create_executor(self, max_workers: Optional[int] = None) -> Executor:
+        return FileQueueExecutor(
+            self.folder, self.poll_interval, self.heartbeat_timeout, self.queue_timeout
+        )
+
+    def get_concurrent_runs(self, max_workers: Optional[int]) -> Optional[int]:
+        return None
+
+
+def main(arguments: Optional[Any] = None) -> None:
+    """Runs a single job, or a dispatcher for a queue folder, from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m physicool.executors")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run a single job")
+    run_parser.add_argument("job_file")
+    run_parser.add_argument(
+        "--heartbeat-interval", type=float, default=HEARTBEAT_TIMEOUT / 4
+    )
+    dispatch_parser = commands.add_parser("dispatch", help="run the queued jobs")
+    dispatch_parser.add_argument("folder", nargs="?", default=str(QUEUE_ROOT))
+    dispatch_parser.add_argument("--max-jobs", type=int, default=1)
+    dispatch_parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args(arguments)
+
+    if args.command == "run":
+        run_job(args.job_file, args.heartbeat_interval)
+    else:
+        QueueDispatcher(args.folder, args.max_jobs, args.poll_interval).serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""A module to record black box evaluations in an append-only journal, to resume long runs."""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+JOURNAL_PATH = Path(".physicool/journal.jsonl")
+
+_JOURNAL_LOCK = threading.Lock()
+
+
+def _encode_metrics(metrics: Any) -> Any:
+    """Converts output metrics to JSON types (numpy arrays are stored as lists)."""
+    if metrics is None:
+        return None
+
+    return np.asarray(metrics).tolist()
+
+
+def _decode_metrics(metrics: Any) -> Any:
+    """Converts the stored output metrics back to the format returned by the black box."""
+    if isinstance(metrics, list):
+        return np.asarray(metrics)
+
+    return metrics
+
+
+def get_entry_key(params: Optional[Dict[str, float]], labels: Dict[str, Any]) -> str:
+    """Returns the key that identifies an evaluation in the journal."""
+    params = {name: float(value) for name, value in (params or {}).items()}
+    return json.dumps({"params": params, **labels}, sort_keys=True)
+
+
+@dataclass
+class EvaluationJournal:
+    """
+    An append-only journal of black box evaluations, stored as JSON lines.
+
+    Each entry holds the evaluated parameters, the output metrics, the duration
+    of the evaluation and a set of labels that identify it (e.g., the number of
+    replicates or the sweep level). Entries are written (and flushed to disk) as
+    soon as each evaluation finishes, so a journal always holds every completed
+    evaluation, even if the Python process is killed. Evaluations found in the
+    journal are not run again when resuming.
+
+    Parameters
+    ----------
+    path
+        The path to the journal file. It is created if it does not exist.
+    """
+
+    path: Union[str, Path] = JOURNAL_PATH
+    entries: Dict[str, Dict[str, Any]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Loads the entries that were already written to the journal file."""
+        self.path = Path(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.entries = {}
+        if self.path.is_file():
+            with open(self.path) as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # The last line may be incomplete if the process was killed
+                        continue
+                    key = get_entry_key(entry["params"], entry["labels"])
+                    self.entries[key] = entry
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(
+        self, params: Optional[Dict[str, float]], **labels: Any
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Returns the journal entry for the passed parameters and labels (with the
+        output metrics decoded), or None if the evaluation is not in the journal.
+        """
+        entry = self.entries.get(get_entry_key(params, labels))
+        if entry is None:
+            return None
+
+        return {**entry, "metrics": _decode_metrics(entry["metrics"])}
+
+    def record(
+        self,
+        params: Optional[Dict[str, float]],
+        metrics: Any,
+        duration: Optional[float] = None,
+        log_tail: Optional[str] = None,
+        telemetry: Optional[Dict[str, Any]] = None,
+        **labels: Any,
+    ) -> None:
+        """
+        Appends a new evaluation to the journal.
+
+        Parameters
+        ----------
+        params
+            The parameter values of the evaluation.
+        metrics
+            The output metrics of the evaluation.
+        duration
+            The wall-clock duration of the evaluation (in seconds).
+        log_tail
+            The last lines of the simulation output (e.g., for failed runs).
+        telemetry
+            The time and resources used by the evaluation.
+        labels
+            The values that identify the evaluation, together with the parameters.
+        """
+        entry = {
+            "params": {name: float(value) for name, value in (params or {}).items()},
+            "labels": labels,
+            "metrics": _encode_metrics(metrics),
+            "duration": duration,
+            "timestamp": time.time(),
+        }
+        if log_tail is not None:
+            entry["log_tail"] = log_tail
+        if telemetry is not None:
+            entry["telemetry"] = telemetry
+        line = json.dumps(entry) + "\n"
+        with _JOURNAL_LOCK:
+            with open(self.path, "a") as file:
+                file.write(line)
+                file.flush()
+                os.fsync(file.fileno())
+            self.entries[get_entry_key(params, labels)] = entry
+
+    def get_entries(self, **labels: Any) -> List[Dict[str, Any]]:
+        """Returns the entries of the journal with the passed labels."""
+        return [
+            {**entry, "metrics": _decode_metrics(entry["metrics"])}
+            for entry in self.entries.values()
+            if all(entry["labels"].get(name) == value for name, value in labels.items())
+        ]
@@ -0,0 +1,92 @@
+"""A module to capture the console output of PhysiCell simulations without blocking them."""
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, BinaryIO, Deque, Optional, Union
+
+LOG_TAIL_LINES = 50
+MAX_LINE_LENGTH = 1000
+CHUNK_SIZE = 4096
+
+
+@dataclass
+class RunLog:
+    """
+    The console output (stdout and stderr) of a single simulation.
+
+    Only the last max_lines lines are kept in memory (each one truncated to
+    max_line_length characters), so chatty simulations never use more than a
+    few kilobytes. If a path is passed, the full output is also written to
+    that file.
+
+    Parameters
+    ----------
+    max_lines
+        The number of lines kept in memory (the tail of the output).
+    path
+        The path to a file where the full output is written.
+    max_line_length
+        The maximum length of the lines kept in memory.
+    """
+
+    max_lines: int = LOG_TAIL_LINES
+    path: Optional[Union[str, Path]] = None
+    max_line_length: int = MAX_LINE_LENGTH
+    lines: Deque[str] = field(init=False, repr=False)
+    _partial_line: bytes = field(init=False, repr=False, default=b"")
+    _file: Optional[IO[bytes]] = field(init=False, repr=False, default=None)
+
+    def __post_init__(self) -> None:
+        """Creates the ring buffer and opens the log file."""
+        self.lines = deque(maxlen=self.max_lines)
+        if self.path is not None:
+            self.path = Path(self.path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "ab")
+
+    def _decode(self, line: bytes) -> str:
+        """Returns a (truncated) line of output as text."""
+        return line[: self.max_line_length].decode(errors="replace").rstrip("\r")
+
+    def write(self, data: bytes) -> None:
+        """Adds a chunk of output to the tail and the log file."""
+        if self._file is not None:
+            self._file.write(data)
+
+        *lines, partial_line = (self._partial_line + data).split(b"\n")
+        self.lines.extend(self._decode(line) for line in lines[-self.max_lines :])
+        # Output without line breaks (e.g., progress bars) must not grow forever
+        self._partial_line = partial_line[-self.max_line_length :]
+
+    def tail(self) -> str:
+        """Returns the last lines of output."""
+        lines = list(self.lines)
+        if self._partial_line:
+            lines.append(self._decode(self._partial_line))
+
+        return "\n".join(lines[-self.max_lines :])
+
+    def close(self) -> None:
+        """Closes the log file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def drain_pipe(pipe: BinaryIO, run_log: RunLog) -> None:
+    """Reads the output of a process until it closes its pipe."""
+    with pipe:
+        while True:
+            data = pipe.read1(CHUNK_SIZE)
+            if not data:
+                break
+            run_log.write(data)
+
+
+def start_draining(pipe: BinaryIO, run_log: RunLog) -> threading.Thread:
+    """Reads the output of a process in a background thread, so it never blocks."""
+    thread = threading.Thread(target=drain_pipe, args=(pipe, run_log), daemon=True)
+    thread.start()
+    return thread
+
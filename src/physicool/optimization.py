@@ -1,25 +1,65 @@
 """A module for model calibration and optimization routines."""
+import asyncio
+import os
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from copy import deepcopy
 from dataclasses import dataclass, field
+from functools import partial
+from itertools import repeat
 from pathlib import Path
+from tempfile import TemporaryDirectory
 import platform
 import subprocess
 import logging
-from typing import List, Dict, Optional, Tuple, Union
-from distutils.dir_util import copy_tree, remove_tree
-import os
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Dict, Optional, Tuple, Union
+from shutil import copyfile
 import numpy as np
+import pandas as pd
 
+
+from physicool.build import BuildCache
+from physicool.cache import EvaluationCache, compute_evaluation_key
+from physicool.config import ConfigFileParser
+from physicool.executors import ExecutorBackend, ProcessPoolBackend, SerialBackend
+from physicool.journal import EvaluationJournal, get_entry_key
+from physicool.logs import LOG_TAIL_LINES, RunLog, start_draining
 from physicool.updaters import ParamsUpdater
+from physicool.warmstart import WarmStart
 from physicool.processing import (
     OutputProcessor,
+    OutputStream,
+    StreamingProcessor,
     ErrorQuantification,
     compute_mean_squared_error,
     NEW_OUTPUTS_VERSION,
 )
 from physicool.plotting import SweeperPlot
+from physicool.scheduling import CostModel, MemoryBudget, get_config_features
+from physicool.telemetry import (
+    EvaluationTelemetry,
+    create_telemetry_table,
+    ProcessWaiter,
+    get_folder_size,
+)
+from physicool.sandbox import (
+    SANDBOX_ROOT,
+    RunSandbox,
+    link_folder_contents,
+    remove_folder,
+    retain_outputs,
+)
 
 
 LOG_FILE = "debug.log"
+MEMORY_LIMIT_SCRIPT = 'ulimit -v "$1" && shift && exec "$@"'
 logging.basicConfig(
     level=logging.WARNING,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -48,32 +88,359 @@ def _create_project_command(project_name: str) -> str:
     return f"./{project_name}"
 
 
+class SimulationError(RuntimeError):
+    """
+    Raised when a PhysiCell simulation fails or runs for longer than its timeout.
+    The last lines of the simulation output are kept in log_tail, and the index
+    of the replicate in replicate (once all its attempts failed).
+    """
+
+    log_tail: str = ""
+    replicate: Optional[int] = None
+
+
+def _get_deadline(timeout: Optional[float]) -> Optional[float]:
+    """Returns the monotonic time at which a run times out (None if there is no timeout)."""
+    if timeout is None:
+        return None
+
+    return time.monotonic() + timeout
+
+
+def _has_expired(deadline: Optional[float]) -> bool:
+    """Returns True if the passed deadline has been reached."""
+    return (deadline is not None) and (time.monotonic() >= deadline)
+
+
+def _check_return_code(return_code: int) -> None:
+    """Raises a SimulationError if the PhysiCell executable did not exit successfully."""
+    if return_code != 0:
+        raise SimulationError(f"The simulation exited with code {return_code}.")
+
+
+def _limit_memory(command: List[str], memory_limit: int) -> List[str]:
+    """
+    Wraps a command in a shell that limits its address space before replacing
+    itself with the command (ulimit takes the limit in KiB). The limit is not set
+    with preexec_fn, which is not safe when the processes are started from threads.
+    """
+    return ["sh", "-c", MEMORY_LIMIT_SCRIPT, "sh", str(memory_limit // 1024), *command]
+
+
+def _label_failures(
+    labels: Dict[str, Any], telemetry: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Adds the failed label to the journal labels of an evaluation with failed
+    replicates, so its failure values are never returned by journal lookups
+    and the evaluation is run again when a campaign is resumed.
+    """
+    if telemetry and telemetry.get("failures"):
+        return {**labels, "failed": True}
+    return labels
+
+
+def _time_call(function: Callable, *args) -> Tuple[object, float]:
+    """Calls the passed function and returns its result and duration (in seconds)."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _get_environment(omp_num_threads: Optional[int]) -> Optional[Dict[str, str]]:
+    """Returns the environment of a simulation, with its number of OpenMP threads."""
+    if omp_num_threads is None:
+        return None
+
+    return {**os.environ, "OMP_NUM_THREADS": str(omp_num_threads)}
+
+
+def get_available_cores() -> int:
+    """Returns the number of CPU cores available to the current process."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def plan_threads(concurrent_runs: int, total_cores: Optional[int] = None) -> int:
+    """
+    Splits the available cores between simulations that run at the same time.
+
+    Parameters
+    ----------
+    concurrent_runs
+        The number of simulations that run at the same time.
+    total_cores
+        The number of cores to be shared. Defaults to the available cores.
+
+    Returns
+    -------
+    int
+        The number of OpenMP threads per simulation (at least one).
+    """
+    total_cores = total_cores or get_available_cores()
+    return max(1, total_cores // max(1, concurrent_runs))
+
+
+def _stack_metrics(output_metrics: List[Union[float, np.ndarray]]) -> np.ndarray:
+    """
+    Stacks the output metrics of several runs into an array. Scalar metrics (e.g.,
+    the failure value of failed runs) are broadcast to the shape of the others.
+    """
+    shapes = [np.shape(metrics) for metrics in output_metrics]
+    if len(set(shapes)) > 1:
+        shape = max(shapes, key=len)
+        output_metrics = [np.broadcast_to(metrics, shape) for metrics in output_metrics]
+
+    return np.asarray(output_metrics)
+
+
+def _gather_metrics(
+    output_metrics: List[Union[float, np.ndarray]], number_of_replicates: int
+) -> Union[float, np.ndarray]:
+    """Returns the processor outputs in the format returned by the black box."""
+    if number_of_replicates == 1:
+        return output_metrics[0]
+
+    return _stack_metrics(output_metrics)
+
+
+def get_replicate_seed(random_seed: Optional[int], replicate: int) -> Optional[int]:
+    """
+    Returns the random seed of a replicate, which does not depend on the parameter
+    values (common random numbers), or None if the seed is not set.
+    """
+    if random_seed is None:
+        return None
+
+    return random_seed + replicate
+
+
+def get_storage_folder(replicate: int, number_of_replicates: int) -> Path:
+    """Returns the folder where the output files of a replicate are kept."""
+    if number_of_replicates > 1:
+        return Path(f"temp/replicate{replicate}")
+    return Path("temp")
+
+
 def clean_outputs() -> None:
-    """Removes the files from the output folder and creates it again (make data-cleanup)."""
-    if Path("output").is_dir():
-        with open(LOG_FILE, "a") as log_file:
-            subprocess.run(
-                "make data-cleanup",
-                shell=True,
-                stdout=log_file,
-                stderr=log_file,
-                text=True,
-            )
+    """Removes the files from the output folder and creates it again (as make data-cleanup)."""
+    output_folder = Path("output")
+    if output_folder.is_dir():
+        remove_folder(output_folder)
+        output_folder.mkdir()
+        (output_folder / "empty.txt").touch()
 
 
 def clean_tmp_files() -> None:
     """Removes the temp folder if it exists."""
-    if Path("temp").is_dir():
-        remove_tree("temp")
+    remove_folder("temp")
+
 
+def compile_project(build_cache: Optional[BuildCache] = None) -> Optional[Path]:
+    """
+    Compiles the current project by calling make.
+
+    If a BuildCache is passed, make is only called if the project sources (or
+    build settings) changed since the last build, and the path to the cached
+    executable is returned. It can be passed to the black box as executable.
+    """
+    if build_cache is not None:
+        logging.info("getting project executable from the build cache...")
+        return build_cache.get_executable()
 
-def compile_project() -> None:
-    """Compiles the current project by calling make."""
     logging.info("compiling project...")
     with open(LOG_FILE, "a") as log_file:
         subprocess.run("make", shell=True, stdout=log_file, stderr=log_file, text=True)
 
 
+@dataclass
+class PartialError:
+    """
+    Computes the error between partial results (the time points simulated so far)
+    and the matching time points of the target data. For cumulative error
+    estimators, such as compute_mean_squared_error, the partial error is a lower
+    bound of the final error.
+
+    Parameters
+    ----------
+    target_data
+        The data to be compared to the model outputs.
+    error_estimator
+        The function that computes the error between the model and the target data.
+    """
+
+    target_data: np.ndarray
+    error_estimator: ErrorQuantification = compute_mean_squared_error
+
+    def __call__(self, partial_metrics: Union[float, np.ndarray]) -> float:
+        partial_metrics = np.asarray(partial_metrics)
+        target_data = np.asarray(self.target_data)
+        if partial_metrics.ndim > 0:
+            target_data = target_data[..., : partial_metrics.shape[-1]]
+
+        return self.error_estimator(partial_metrics, target_data)
+
+
+@dataclass
+class EarlyStopping:
+    """
+    Stops simulations that cannot improve on the best objective found so far.
+
+    The partial objective is computed from the partial metrics of a streaming
+    processor every time new time points are processed. The simulation is killed
+    when it exceeds the best objective (plus a relative margin). Partial objectives
+    that are lower bounds of the final objective (e.g., PartialError with a
+    cumulative error) only stop simulations that provably cannot be the best,
+    while estimates of the final objective stop them statistically.
+
+    Parameters
+    ----------
+    partial_objective
+        A function that computes the objective from the partial metrics.
+    best_objective
+        The best (lowest) objective found so far.
+    margin
+        The relative margin above the best objective before a run is stopped.
+    """
+
+    partial_objective: Callable[[Union[float, np.ndarray]], float]
+    best_objective: float = np.inf
+    margin: float = 0.0
+
+    def __call__(self, partial_metrics: Union[float, np.ndarray]) -> bool:
+        """Returns True if the simulation should be stopped."""
+        threshold = self.best_objective * (1 + self.margin)
+        return self.partial_objective(partial_metrics) > threshold
+
+
+@dataclass
+class RunSettings:
+    """
+    The settings shared by all the simulations of a black box evaluation.
+
+    Parameters
+    ----------
+    early_stopping
+        A rule to stop the simulations early (streaming processors only).
+    omp_num_threads
+        The number of OpenMP threads of each simulation. If None, the number of
+        threads in the config file is used.
+    """
+
+    early_stopping: Optional[EarlyStopping] = None
+    omp_num_threads: Optional[int] = None
+
+
+@dataclass
+class ReplicateStatistics:
+    """
+    The statistics of the output metrics of several replicates of an evaluation.
+
+    Parameters
+    ----------
+    mean
+        The mean of the output metrics.
+    variance
+        The (unbiased) variance of the output metrics.
+    number_of_replicates
+        The number of replicates that were run.
+    """
+
+    mean: Union[float, np.ndarray]
+    variance: Union[float, np.ndarray]
+    number_of_replicates: int
+
+    @property
+    def standard_error(self) -> Union[float, np.ndarray]:
+        """Returns the standard error of the mean of the output metrics."""
+        return np.sqrt(self.variance / self.number_of_replicates)
+
+
+def compute_replicate_statistics(
+    output_metrics: List[Union[float, np.ndarray]]
+) -> ReplicateStatistics:
+    """Returns the mean and variance of the output metrics of several replicates."""
+    output_metrics = _stack_metrics(output_metrics)
+    return ReplicateStatistics(
+        mean=np.mean(output_metrics, axis=0),
+        variance=np.var(output_metrics, axis=0, ddof=1),
+        number_of_replicates=len(output_metrics),
+    )
+
+
+EvaluationCallback = Callable[
+    [Dict[str, float], Optional[np.ndarray], Dict[str, Any]], None
+]
+
+
+@dataclass
+class BatchStream:
+    """
+    The results of a batch of black box evaluations, in the order they complete
+    (see PhysiCellBlackBox.stream_batch).
+
+    Iterating yields a (params, metrics, telemetry) tuple for each evaluation,
+    where telemetry also holds the duration of the evaluation.
+    After cancel is called, no new evaluations are started and the ones that are
+    waiting for a worker are dropped; the results of the evaluations that were
+    already running are still yielded. The stream can only be iterated once.
+
+    Parameters
+    ----------
+    params_list
+        The parameter values of the evaluations.
+    evaluations
+        The index, output metrics and telemetry of each completed evaluation.
+    cancelled
+        The event that stops new evaluations from starting.
+    """
+
+    params_list: List[Dict[str, float]]
+    evaluations: Iterator[Tuple[int, Optional[np.ndarray], Dict[str, Any]]]
+    cancelled: threading.Event = field(default_factory=threading.Event)
+
+    def __iter__(
+        self,
+    ) -> Iterator[Tuple[Dict[str, float], Optional[np.ndarray], Dict[str, Any]]]:
+        for _, params, metrics, telemetry in self.iter_indexed():
+            yield params, metrics, telemetry
+
+    def iter_indexed(
+        self,
+    ) -> Iterator[Tuple[int, Dict[str, float], Optional[np.ndarray], Dict[str, Any]]]:
+        """
+        Yields an (index, params, metrics, telemetry) tuple for each evaluation,
+        where index is the position of the parameters in params_list.
+        """
+        for k, metrics, telemetry in self.evaluations:
+            yield k, self.params_list[k], metrics, telemetry
+
+    def cancel(self) -> None:
+        """Stops the evaluations that did not start yet (thread-safe)."""
+        self.cancelled.set()
+
+
+@dataclass
+class ThreadPlan:
+    """
+    A split of the available cores between concurrent simulations.
+
+    Parameters
+    ----------
+    threads_per_run
+        The number of OpenMP threads of each simulation.
+    concurrent_runs
+        The number of simulations that run at the same time.
+    simulations_per_hour
+        The throughput measured for this plan (if it was benchmarked).
+    """
+
+    threads_per_run: int
+    concurrent_runs: int
+    simulations_per_hour: Optional[float] = None
+
+
 @dataclass
 class PhysiCellBlackBox:
     """
@@ -85,8 +452,83 @@ class PhysiCellBlackBox:
     OutputProcessor to extract data from the output files and return a given
     user-defined metric.
 
-    Output files can be kept or discarded. If kept, they will be stored
-    inside a new "temp" folder.
+    Each simulation is run inside its own sandbox folder (created in
+    sandbox_root), with a private copy of the config file, so black boxes
+    never share the project "output" folder. Output files can be kept or
+    discarded. If kept, they will be moved inside a new "temp" folder
+    (renamed or hard linked, so no data is copied), or packed into a
+    compressed archive if archive_format is set (e.g., "gztar" or "zip").
+
+    If an EvaluationCache is passed, the output metrics of each replicate are
+    stored in the cache and simulations that were already run (same config
+    file, parameters, replicate, executable and processor) are skipped.
+    Output files are not kept for cached replicates.
+
+    If the processor is a StreamingProcessor, the output folder is checked
+    every poll_interval seconds while PhysiCell is running, and each new
+    time point is processed as soon as it has been written. An EarlyStopping
+    rule can then be passed to kill runs whose partial objective is already
+    worse than the best objective (their partial metrics are returned).
+
+    Simulations that exit with an error, or run for longer than timeout seconds,
+    are retried up to max_retries times with an exponential backoff (starting at
+    retry_delay seconds). The address space of each simulation can be limited to
+    memory_limit bytes (Unix only). If all the attempts of a replicate fail, its
+    output metrics are replaced by failure_value (e.g., np.nan or a large
+    penalty), or a SimulationError is raised if failure_value is None.
+
+    The console output of each simulation is read in the background, so it
+    never blocks, and only its last log_lines lines are kept in memory. If
+    log_folder is set, the full output of each simulation is also written to
+    its own file in that folder.
+
+    If an EvaluationJournal is passed, every evaluation (parameters, number of
+    replicates, output metrics and duration) is appended to the journal as soon
+    as it finishes, and evaluations already in the journal are not run again.
+    Evaluations with early stopping are not journaled. Replicates whose attempts
+    all fail are journaled with the last lines of their output.
+
+    The number of OpenMP threads is written to the private config file of each
+    simulation (and to OMP_NUM_THREADS). If omp_num_threads is None, the value
+    in the config file is kept for single simulations, while concurrent
+    simulations split the total_cores (by default, the available cores) between
+    them, so the machine is not oversubscribed. See tune_threads to benchmark
+    the best split.
+
+    Batches of evaluations (run_batch and run_sweep) are run by an executor
+    backend: SerialBackend (in the current process), ProcessPoolBackend (local
+    processes) or FileQueueBackend (batch scheduler jobs). If backend is None,
+    batches run serially when max_workers is 1 and in a process pool otherwise.
+
+    By default, the project executable (project_name) is called from the
+    current folder. Another executable can be passed instead, such as the
+    read-only executable shared by all the runs returned by compile_project
+    with a BuildCache.
+
+    The time spent in each phase of every evaluation (writing the config files,
+    simulating, processing the outputs, keeping and deleting the files), the
+    CPU time and peak RSS of its simulations and the size of its outputs are
+    appended to telemetry (see get_telemetry) and to the journal entries.
+
+    If a CostModel is passed, it is fitted to the telemetry before each batch
+    and the evaluations of the batch are started from the longest to the
+    shortest predicted duration, so the slowest runs do not start last and
+    leave the workers idle at the end of the batch.
+
+    If a MemoryBudget is passed, new simulations (replicates of run and
+    run_adaptive, evaluations of run_batch with local backends) are only
+    started while the projected memory of the running ones stays within the
+    budget. The memory of a simulation is learned from the peak RSS in the
+    telemetry, or estimated from the mesh of the project config file.
+
+    If a WarmStart is passed, every simulation starts from its snapshot of a
+    reference run (e.g., after an equilibration phase shared by all the
+    parameter sets) and only simulates the rest of max_time.
+
+    If random_seed is set, replicate i of every evaluation is run with the seed
+    random_seed + i (written to the random_seed user parameter), so all the
+    parameter sets are compared with the same random numbers and differences
+    between them are not hidden by the noise of the simulations.
     """
 
     updater: Optional[ParamsUpdater] = None
@@ -95,16 +537,48 @@ class PhysiCellBlackBox:
     project_command: str = field(init=False)
     project_config: str = "./config/PhysiCell_settings.xml"
     version: str = NEW_OUTPUTS_VERSION
+    sandbox_root: Union[str, Path] = SANDBOX_ROOT
+    cache: Optional[EvaluationCache] = None
+    archive_format: Optional[str] = None
+    poll_interval: float = 1.0
+    timeout: Optional[float] = None
+    memory_limit: Optional[int] = None
+    max_retries: int = 0
+    retry_delay: float = 1.0
+    failure_value: Optional[float] = None
+    log_lines: int = LOG_TAIL_LINES
+    log_folder: Optional[Union[str, Path]] = None
+    journal: Optional[EvaluationJournal] = None
+    omp_num_threads: Optional[int] = None
+    total_cores: Optional[int] = None
+    backend: Optional[ExecutorBackend] = None
+    executable: Optional[Union[str, Path]] = None
+    warm_start: Optional[WarmStart] = None
+    random_seed: Optional[int] = None
+    telemetry: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    cost_model: Optional[CostModel] = None
+    memory_budget: Optional[MemoryBudget] = None
 
     def __post_init__(self):
         """Create the right command to call the PhysiCell project based on the OS."""
         self.project_command = _create_project_command(self.project_name)
+        if self.executable is not None:
+            self.project_command = str(Path(self.executable).absolute())
+        if (self.memory_limit is not None) and (os.name != "posix"):
+            raise ValueError("Memory limits are not supported on this OS.")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The black box is sent to the workers of a batch: skip the telemetry
+        # and the journal (failed replicates are recorded by the main process)
+        return {**self.__dict__, "telemetry": [], "journal": None}
 
     def run(
         self,
         params: Optional[Dict[str, float]] = None,
         number_of_replicates: int = 1,
         keep_files: bool = True,
+        max_workers: int = 1,
+        early_stopping: Optional[EarlyStopping] = None,
     ) -> Optional[np.ndarray]:
         """
         Runs the black box pipeline.
@@ -112,77 +586,1158 @@ class PhysiCellBlackBox:
         Parameters
         ----------
         params
-            The new parameter values, to be updated in the XML file
-            by the ParamsUpdater class.
+            The new parameter values, written by the ParamsUpdater class to a
+            config file rendered for this run (the project config file is
+            not changed).
         number_of_replicates
             The number of simulation replicates to be run.
         keep_files
             If the output files should be stored in a tmp folder.
+        max_workers
+            The maximum number of replicates to be run at the same time.
+        early_stopping
+            A rule to stop the simulations early (streaming processors only).
 
         Returns
         -------
         Optional[np.ndarray]
             The output metrics computed by the OutputProcessor class
+            (called with the path to the run output folder as output_path).
         """
+        entry = self._lookup_journal(params, number_of_replicates, early_stopping)
+        if entry is not None:
+            logging.info(f"using journal results for parameters {params}")
+            return entry["metrics"]
+
+        max_workers = self._limit_concurrent_runs(max_workers, params)
+        concurrent_runs = min(max_workers, number_of_replicates)
+        settings = RunSettings(early_stopping, self._get_threads(concurrent_runs))
+
         # Create a new directory to store the output files
+        start = time.perf_counter()
+        telemetry = EvaluationTelemetry()
         if keep_files:
-            storage_folder = "temp"
-            Path(storage_folder).mkdir(exist_ok=True)
+            Path("temp").mkdir(exist_ok=True)
 
-        # Update the XML configuration file with the passed values
-        if (self.updater is not None) and (params is not None):
-            self.updater.update(new_values=params)
+        # Run the PhysiCell model for each replicate in its own sandbox, with a
+        # config file rendered for the passed values (the project config file
+        # is not changed), compute the model output metrics and move the files
+        # to "temp"
+        storage_folders = [
+            get_storage_folder(i, number_of_replicates) if keep_files else None
+            for i in range(number_of_replicates)
+        ]
+        print("Starting the replicates")
+        Path(self.sandbox_root).mkdir(parents=True, exist_ok=True)
+        with TemporaryDirectory(
+            prefix="evaluation_", dir=self.sandbox_root
+        ) as evaluation_folder, ThreadPoolExecutor(max_workers=max_workers) as executor:
+            with telemetry.phase("update"):
+                config_path = self._render_config(params, Path(evaluation_folder))
+                telemetry.features = get_config_features(config_path)
+            try:
+                output_metrics = list(
+                    executor.map(
+                        self._run_isolated_replicate,
+                        repeat(config_path),
+                        storage_folders,
+                        range(number_of_replicates),
+                        repeat(params),
+                        repeat(settings),
+                        repeat(telemetry),
+                    )
+                )
+            finally:
+                self._record_failures(params, telemetry.errors)
 
-        # Create an array to store the metrics computed by the processor
+        duration = time.perf_counter() - start
+        self._record_telemetry(
+            params, number_of_replicates, telemetry.to_dict(), duration
+        )
         if self.processor:
-            output_metrics = []
+            output_metrics = _gather_metrics(output_metrics, number_of_replicates)
+            self._record_journal(
+                params,
+                number_of_replicates,
+                early_stopping,
+                output_metrics,
+                duration,
+                telemetry.to_dict(),
+            )
+            return output_metrics
 
-        # Run the PhysiCell model for each replicate
-        # Create a new directory, run the model and save the files to this
-        # location and compute and store the model output metrics
-        print("Starting the replicates")
-        for i in range(number_of_replicates):
-            if (number_of_replicates > 1) & keep_files:
-                storage_folder = f"temp/replicate{i}"
-                Path(storage_folder).mkdir()
-
-            log_status = f"running project with command {self.project_command}..."
-            logging.info(log_status)
-            command = self.project_command + " " + self.project_config
-            with open(LOG_FILE, "a") as log_file:
-                subprocess.run(
-                    command,
-                    shell=True,
-                    stdout=log_file,
-                    stderr=subprocess.PIPE,
+    def run_adaptive(
+        self,
+        params: Optional[Dict[str, float]] = None,
+        tolerance: float = 0.0,
+        min_replicates: int = 2,
+        max_replicates: int = 10,
+        wave_size: Optional[int] = None,
+        keep_files: bool = False,
+        max_workers: int = 1,
+    ) -> ReplicateStatistics:
+        """
+        Runs replicates of the black box pipeline until the output metrics are
+        precise enough, so noisy parameter sets get more replicates than stable ones.
+
+        Replicates are run in waves of wave_size simulations (at most max_workers
+        at the same time), until the standard error of the mean of every output
+        metric is below the tolerance or max_replicates have been run.
+
+        Parameters
+        ----------
+        params
+            The new parameter values, written by the ParamsUpdater class to a
+            config file rendered for this evaluation.
+        tolerance
+            The largest accepted standard error of the output metrics.
+        min_replicates
+            The number of replicates of the first wave (at least 2).
+        max_replicates
+            The largest number of replicates to be run.
+        wave_size
+            The number of replicates added after each wave. Defaults to max_workers.
+        keep_files
+            If the output files should be stored in the tmp folder
+            (as "temp/replicate{i}").
+        max_workers
+            The maximum number of replicates to be run at the same time.
+
+        Returns
+        -------
+        ReplicateStatistics
+            The mean and variance of the output metrics and the number of replicates.
+        """
+        if self.processor is None:
+            raise ValueError("Adaptive runs need an output processor.")
+        if not 2 <= min_replicates <= max_replicates:
+            raise ValueError("The number of replicates must be between 2 and max.")
+
+        wave_size = wave_size or max_workers
+        labels = {
+            "tolerance": tolerance,
+            "min_replicates": min_replicates,
+            "max_replicates": max_replicates,
+            "wave_size": wave_size,
+        }
+        if self.random_seed is not None:
+            labels["random_seed"] = self.random_seed
+        if self.journal is not None:
+            entry = self.journal.lookup(params, **labels)
+            if entry is not None:
+                logging.info(f"using journal results for parameters {params}")
+                return compute_replicate_statistics(list(entry["metrics"]))
+
+        max_workers = self._limit_concurrent_runs(max_workers, params)
+        settings = RunSettings(None, self._get_threads(min(max_workers, wave_size)))
+        start = time.perf_counter()
+        telemetry = EvaluationTelemetry()
+        if keep_files:
+            Path("temp").mkdir(exist_ok=True)
+
+        output_metrics = []
+        Path(self.sandbox_root).mkdir(parents=True, exist_ok=True)
+        with TemporaryDirectory(
+            prefix="evaluation_", dir=self.sandbox_root
+        ) as evaluation_folder, ThreadPoolExecutor(max_workers=max_workers) as executor:
+            with telemetry.phase("update"):
+                config_path = self._render_config(params, Path(evaluation_folder))
+                telemetry.features = get_config_features(config_path)
+            wave = range(min_replicates)
+            try:
+                while wave:
+                    storage_folders = [
+                        get_storage_folder(i, max_replicates) if keep_files else None
+                        for i in wave
+                    ]
+                    output_metrics.extend(
+                        executor.map(
+                            self._run_isolated_replicate,
+                            repeat(config_path),
+                            storage_folders,
+                            wave,
+                            repeat(params),
+                            repeat(settings),
+                            repeat(telemetry),
+                        )
+                    )
+                    statistics = compute_replicate_statistics(output_metrics)
+                    if np.all(statistics.standard_error <= tolerance):
+                        break
+                    wave = range(
+                        len(output_metrics),
+                        min(len(output_metrics) + wave_size, max_replicates),
+                    )
+            finally:
+                self._record_failures(params, telemetry.errors)
+
+        duration = time.perf_counter() - start
+        self._record_telemetry(
+            params, len(output_metrics), telemetry.to_dict(), duration
+        )
+        if self.journal is not None:
+            self.journal.record(
+                params,
+                _stack_metrics(output_metrics),
+                duration,
+                telemetry=telemetry.to_dict(),
+                **_label_failures(labels, telemetry.to_dict()),
+            )
+
+        return statistics
+
+    def run_batch(
+        self,
+        params_list: List[Dict[str, float]],
+        number_of_replicates: int = 1,
+        keep_files: bool = False,
+        max_workers: Optional[int] = None,
+        early_stopping: Optional[EarlyStopping] = None,
+        callback: Optional[EvaluationCallback] = None,
+    ) -> List[Optional[np.ndarray]]:
+        """
+        Runs the black box pipeline for several parameter sets with the executor
+        backend (a process pool, by default).
+
+        Each evaluation is run in its own temporary folder, with its own config
+        file and output folders, so evaluations do not interfere with each other
+        or with the project config file. With the process pool and file queue
+        backends, the updater and processor must be picklable (e.g., functions
+        defined at the top level of a module). Parameter sets that appear more
+        than once in the batch are only evaluated once (with keep_files, their
+        output files are hard linked into the folder of each duplicate).
+
+        Parameters
+        ----------
+        params_list
+            The parameter values to be tested, one dictionary per evaluation.
+        number_of_replicates
+            The number of simulation replicates to be run for each evaluation.
+        keep_files
+            If the output files should be stored in the tmp folder
+            (as "temp/evaluation{k}" or "temp/evaluation{k}/replicate{i}").
+        max_workers
+            The maximum number of evaluations to be run at the same time.
+            Defaults to the number of processors of the machine (process pool).
+        early_stopping
+            A rule to stop the simulations early (streaming processors only).
+        callback
+            A function called with the parameters, output metrics and telemetry
+            of each evaluation as soon as it completes.
+
+        Returns
+        -------
+        List[Optional[np.ndarray]]
+            The output metrics computed by the OutputProcessor class, in the
+            same order as the passed parameter sets.
+        """
+        results = [None] * len(params_list)
+        for k, metrics, telemetry in self._iter_batch(
+            params_list,
+            number_of_replicates,
+            keep_files,
+            max_workers,
+            early_stopping,
+        ):
+            results[k] = metrics
+            if callback is not None:
+                callback(params_list[k], metrics, telemetry)
+
+        return results
+
+    def stream_batch(
+        self,
+        params_list: List[Dict[str, float]],
+        number_of_replicates: int = 1,
+        keep_files: bool = False,
+        max_workers: Optional[int] = None,
+        early_stopping: Optional[EarlyStopping] = None,
+    ) -> "BatchStream":
+        """
+        Runs the black box pipeline for several parameter sets, as run_batch, and
+        returns the results in the order the evaluations complete.
+
+        The evaluations start when the returned BatchStream is iterated. It yields
+        a (params, metrics, telemetry) tuple for each evaluation, so the results
+        can be used (e.g., to propose new parameter sets) while the other
+        evaluations are running. Its cancel method stops the evaluations that did
+        not start yet.
+
+        With local backends, evaluations are only submitted when a worker is
+        free, so changes to early_stopping made while iterating (e.g., a lower
+        best_objective) apply to the evaluations that did not start yet.
+
+        Parameters
+        ----------
+        params_list
+            The parameter values to be tested, one dictionary per evaluation.
+        number_of_replicates
+            The number of simulation replicates to be run for each evaluation.
+        keep_files
+            If the output files should be stored in the tmp folder
+            (as "temp/evaluation{k}" or "temp/evaluation{k}/replicate{i}").
+        max_workers
+            The maximum number of evaluations to be run at the same time.
+            Defaults to the number of processors of the machine (process pool).
+        early_stopping
+            A rule to stop the simulations early (streaming processors only).
+
+        Returns
+        -------
+        BatchStream
+            The results of the evaluations, in completion order.
+        """
+        cancelled = threading.Event()
+        evaluations = self._iter_batch(
+            params_list,
+            number_of_replicates,
+            keep_files,
+            max_workers,
+            early_stopping,
+            cancelled,
+        )
+        return BatchStream(params_list, evaluations, cancelled)
+
+    def _iter_batch(
+        self,
+        params_list: List[Dict[str, float]],
+        number_of_replicates: int,
+        keep_files: bool,
+        max_workers: Optional[int],
+        early_stopping: Optional[EarlyStopping],
+        cancelled: Optional[threading.Event] = None,
+    ) -> Iterator[Tuple[int, Optional[np.ndarray], Dict[str, Any]]]:
+        """
+        Runs a batch of evaluations and yields the index, output metrics and
+        telemetry (with the duration) of each one as it completes (journal
+        results come first). No new evaluations are started once cancelled is set.
+        """
+        cancelled = cancelled or threading.Event()
+        if keep_files:
+            Path("temp").mkdir(exist_ok=True)
+
+        pending = []
+        for k, params in enumerate(params_list):
+            entry = self._lookup_journal(params, number_of_replicates, early_stopping)
+            if entry is None:
+                pending.append(k)
+            else:
+                telemetry = entry.get("telemetry", {})
+                yield k, entry["metrics"], {**telemetry, "duration": entry["duration"]}
+
+        if not pending:
+            return
+
+        # Identical parameter sets (e.g., grid points clipped to the same bound)
+        # are simulated once and all of them get the results
+        labels = self._get_journal_labels(number_of_replicates)
+        first_evaluations = {}
+        duplicates = {}
+        for k in pending:
+            key = get_entry_key(params_list[k], labels)
+            if key in first_evaluations:
+                duplicates[first_evaluations[key]].append(k)
+            else:
+                first_evaluations[key] = k
+                duplicates[k] = []
+        pending = list(first_evaluations.values())
+
+        features = {}
+        if (self.cost_model is not None) or (self.memory_budget is not None):
+            pending_params = [params_list[k] for k in pending]
+            features = dict(zip(pending, self._get_evaluation_features(pending_params)))
+        if self.cost_model is not None:
+            pending = self._order_by_cost(
+                params_list, pending, number_of_replicates, features
+            )
+
+        backend = self._get_backend(max_workers)
+        # Local evaluations are only submitted when a worker (and enough memory)
+        # is free, so the ones that did not start can still be cancelled
+        max_running = backend.get_concurrent_runs(max_workers)
+        run_memory = {}
+        if (max_running is not None) and (self.memory_budget is not None):
+            self.memory_budget.fit(self.telemetry)
+            run_memory = {
+                k: self.memory_budget.estimate(features=features[k]) for k in pending
+            }
+            smallest = min(run_memory.values())
+            max_running = min(
+                max_running, self.memory_budget.get_concurrent_runs(smallest)
+            )
+        concurrent_runs = min(max_running or 1, len(pending))
+        settings = RunSettings(early_stopping, self._get_threads(concurrent_runs))
+
+        with backend.create_executor(max_workers) as executor:
+            futures = {}
+            try:
+                while pending or futures:
+                    if cancelled.is_set():
+                        pending.clear()
+                        futures = {
+                            future: k
+                            for future, k in futures.items()
+                            if not future.cancel()
+                        }
+                        if not futures:
+                            break
+
+                    while pending and self._admits(
+                        futures, max_running, run_memory, pending[0]
+                    ):
+                        k = pending.pop(0)
+                        future = executor.submit(
+                            _time_call,
+                            self._run_isolated_evaluation,
+                            params_list[k],
+                            number_of_replicates,
+                            Path(f"temp/evaluation{k}") if keep_files else None,
+                            settings,
+                        )
+                        futures[future] = k
+
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        k = futures.pop(future)
+                        try:
+                            result, duration = future.result()
+                        except SimulationError as error:
+                            if error.replicate is not None:
+                                self._record_failures(
+                                    params_list[k],
+                                    {error.replicate: f"{error}\n{error.log_tail}"},
+                                )
+                            raise
+                        metrics, telemetry, errors = result
+                        self._record_failures(params_list[k], errors)
+                        self._record_telemetry(
+                            params_list[k], number_of_replicates, telemetry, duration
+                        )
+                        self._record_journal(
+                            params_list[k],
+                            number_of_replicates,
+                            early_stopping,
+                            metrics,
+                            duration,
+                            telemetry,
+                        )
+                        telemetry = {**telemetry, "duration": duration}
+                        yield k, metrics, telemetry
+                        for j in duplicates[k]:
+                            if keep_files:
+                                link_folder_contents(
+                                    Path(f"temp/evaluation{k}"),
+                                    Path(f"temp/evaluation{j}"),
+                                )
+                            yield j, deepcopy(metrics), telemetry
+            finally:
+                # The evaluations that did not start are dropped when the
+                # iteration stops early (e.g., on errors)
+                for future in futures:
+                    future.cancel()
+
+    def _admits(
+        self,
+        futures: Dict[Future, int],
+        max_running: Optional[int],
+        run_memory: Dict[int, int],
+        k: int,
+    ) -> bool:
+        """
+        Returns True if the evaluation k can start next to the running ones, given
+        the expected memory of each evaluation (empty without a memory budget).
+        """
+        if (max_running is not None) and (len(futures) >= max_running):
+            return False
+        if not run_memory:
+            return True
+
+        running_memory = sum(run_memory[j] for j in futures.values())
+        return self.memory_budget.admits(run_memory[k], running_memory)
+
+    async def arun(
+        self,
+        params: Optional[Dict[str, float]] = None,
+        number_of_replicates: int = 1,
+        keep_files: bool = True,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        early_stopping: Optional[EarlyStopping] = None,
+        concurrent_runs: Optional[int] = None,
+    ) -> Optional[np.ndarray]:
+        """
+        Runs the black box pipeline without blocking the event loop.
+
+        Replicates are run at the same time, each one in its own sandbox, and the
+        config file for the passed parameters is written to a private file, so
+        many evaluations can be awaited together (e.g., with asyncio.gather).
+        If the task is cancelled, the running PhysiCell processes are killed.
+
+        Parameters
+        ----------
+        params
+            The new parameter values, to be updated in the XML file
+            by the ParamsUpdater class.
+        number_of_replicates
+            The number of simulation replicates to be run.
+        keep_files
+            If the output files should be stored in a tmp folder.
+        semaphore
+            A semaphore that limits the number of simulations running at the
+            same time. It can be shared between several calls to arun.
+        early_stopping
+            A rule to stop the simulations early (streaming processors only).
+        concurrent_runs
+            The number of simulations expected to run at the same time, used to
+            split total_cores between them (e.g., the value of a semaphore shared
+            by several calls). Defaults to number_of_replicates.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            The output metrics computed by the OutputProcessor class. Coroutine
+            functions are run in a new event loop in the thread of the replicate.
+        """
+        entry = self._lookup_journal(params, number_of_replicates, early_stopping)
+        if entry is not None:
+            return entry["metrics"]
+
+        if concurrent_runs is None:
+            concurrent_runs = number_of_replicates
+        settings = RunSettings(early_stopping, self._get_threads(concurrent_runs))
+
+        start = time.perf_counter()
+        telemetry = EvaluationTelemetry()
+        if keep_files:
+            Path("temp").mkdir(exist_ok=True)
+
+        storage_folders = [
+            get_storage_folder(i, number_of_replicates) if keep_files else None
+            for i in range(number_of_replicates)
+        ]
+        Path(self.sandbox_root).mkdir(parents=True, exist_ok=True)
+        with TemporaryDirectory(
+            prefix="evaluation_", dir=self.sandbox_root
+        ) as evaluation_folder:
+            with telemetry.phase("update"):
+                config_path = self._render_config(params, Path(evaluation_folder))
+                telemetry.features = get_config_features(config_path)
+            try:
+                output_metrics = await asyncio.gather(
+                    *[
+                        self._arun_isolated_replicate(
+                            semaphore,
+                            config_path,
+                            folder,
+                            i,
+                            params,
+                            settings,
+                            telemetry,
+                        )
+                        for i, folder in enumerate(storage_folders)
+                    ]
                 )
+            finally:
+                self._record_failures(params, telemetry.errors)
 
-            if self.processor:
-                output_metrics.append(self.processor(version=self.version))
+        duration = time.perf_counter() - start
+        self._record_telemetry(
+            params, number_of_replicates, telemetry.to_dict(), duration
+        )
+        if self.processor:
+            output_metrics = _gather_metrics(list(output_metrics), number_of_replicates)
+            self._record_journal(
+                params,
+                number_of_replicates,
+                early_stopping,
+                output_metrics,
+                duration,
+                telemetry.to_dict(),
+            )
+            return output_metrics
 
-            if keep_files:
-                #print(os.getcwd())
-                copy_tree("output", storage_folder)
+    async def _arun_isolated_replicate(
+        self,
+        semaphore: Optional[asyncio.Semaphore],
+        *args: Any,
+    ) -> Optional[Union[float, np.ndarray]]:
+        """
+        Runs a single replicate with _run_isolated_replicate (called with args) in
+        a thread, so the event loop is not blocked. If the task is cancelled, the
+        simulation is killed and its sandbox is removed before the cancellation
+        is raised.
+        """
+        if semaphore is not None:
+            async with semaphore:
+                return await self._arun_isolated_replicate(None, *args)
 
-        # Delete the files from the "output" folder
-        clean_outputs()
+        cancelled = threading.Event()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            None, partial(self._run_isolated_replicate, *args, cancelled=cancelled)
+        )
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancelled.set()
+            await asyncio.wait([future])
+            if not future.cancelled():
+                # Retrieve the error of the stopped run, so it is not logged
+                future.exception()
+            raise
+
+    def _run_project(
+        self,
+        config_path: Union[str, Path],
+        stream: Optional[OutputStream] = None,
+        omp_num_threads: Optional[int] = None,
+        log_path: Optional[Path] = None,
+        telemetry: Optional[EvaluationTelemetry] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> bool:
+        """
+        Calls the PhysiCell executable with the passed config file.
+        If an output stream is passed, new time points are processed while waiting.
+        Returns True if the simulation was stopped early by the stream, and raises
+        a SimulationError if it fails or runs for longer than the timeout. The
+        console output is kept in a RunLog (and written to log_path, if passed).
+        The resource usage of the process is added to telemetry, if passed. If the
+        cancelled event is set, the process is killed and a CancelledError is raised.
+        """
+        log_status = f"running project with command {self.project_command}..."
+        logging.info(log_status)
+        deadline = _get_deadline(self.timeout)
+        run_log = RunLog(self.log_lines, log_path)
+        try:
+            process = subprocess.Popen(
+                self._get_command(config_path),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=_get_environment(omp_num_threads),
+            )
+            reader = start_draining(process.stdout, run_log)
+            waiter = ProcessWaiter(process)
+            try:
+                while True:
+                    try:
+                        waiter.wait(self._get_wait_time(stream, deadline, cancelled))
+                        break
+                    except subprocess.TimeoutExpired:
+                        if (cancelled is not None) and cancelled.is_set():
+                            raise CancelledError("The simulation was cancelled.")
+                        if _has_expired(deadline):
+                            raise SimulationError(
+                                f"The simulation timed out after {self.timeout} s."
+                            )
+                        if (stream is not None) and stream.poll():
+                            logging.info("stopping simulation early...")
+                            return True
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    waiter.wait()
+                reader.join()
+                if telemetry is not None:
+                    telemetry.add_process(waiter)
+
+            _check_return_code(process.returncode)
+        except SimulationError as error:
+            error.log_tail = run_log.tail()
+            raise
+        finally:
+            run_log.close()
+
+        if stream is not None:
+            stream.poll(finished=True)
+        return False
+
+    def _get_wait_time(
+        self,
+        stream: Optional[OutputStream],
+        deadline: Optional[float],
+        cancelled: Optional[threading.Event] = None,
+    ) -> Optional[float]:
+        """Returns how long to wait for the simulation before checking on it again."""
+        wait_time = None
+        if (stream is not None) or (cancelled is not None):
+            wait_time = self.poll_interval
+        if deadline is not None:
+            remaining = max(deadline - time.monotonic(), 0.0)
+            wait_time = remaining if wait_time is None else min(wait_time, remaining)
+
+        return wait_time
+
+    def _get_backend(self, max_workers: Optional[int]) -> ExecutorBackend:
+        """Returns the backend used to run a batch of evaluations."""
+        if self.backend is not None:
+            return self.backend
+        if max_workers == 1:
+            return SerialBackend()
+        return ProcessPoolBackend()
+
+    def _get_threads(self, concurrent_runs: int) -> Optional[int]:
+        """Returns the number of OpenMP threads of each of the concurrent simulations."""
+        if self.omp_num_threads is not None:
+            return self.omp_num_threads
+        if concurrent_runs > 1:
+            return plan_threads(concurrent_runs, self.total_cores)
+        return None
+
+    def _get_command(self, config_path: Union[str, Path]) -> List[str]:
+        """Returns the command that runs the project, with its memory limit (if any)."""
+        command = [self.project_command, str(config_path)]
+        if self.memory_limit is None:
+            return command
+
+        return _limit_memory(command, self.memory_limit)
+
+    def _create_sandbox(
+        self, config_path: Union[str, Path], replicate: int, settings: RunSettings
+    ) -> RunSandbox:
+        """Creates the sandbox of a replicate, with its private config file."""
+        return RunSandbox(
+            config_path,
+            root=self.sandbox_root,
+            prefix=f"replicate{replicate}_",
+            omp_num_threads=settings.omp_num_threads,
+            random_seed=get_replicate_seed(self.random_seed, replicate),
+        )
+
+    def _get_log_path(self, sandbox: RunSandbox) -> Optional[Path]:
+        """Returns the file where the output of a run is written (if log_folder is set)."""
+        if self.log_folder is None:
+            return None
+
+        return Path(self.log_folder).absolute() / f"{sandbox.folder.name}.log"
+
+    def _create_stream(
+        self, output_folder: Path, early_stopping: Optional[EarlyStopping] = None
+    ) -> Optional[OutputStream]:
+        """Returns an output stream for a new run if the processor supports streaming."""
+        if isinstance(self.processor, StreamingProcessor):
+            return OutputStream(
+                processor=deepcopy(self.processor),
+                output_path=output_folder,
+                version=self.version,
+                stop_condition=early_stopping,
+            )
+
+    def _render_config(self, params: Optional[Dict[str, float]], folder: Path) -> Path:
+        """
+        Writes the config file for an evaluation to the passed folder, without
+        changing the project config file.
+        """
+        config_path = folder / "evaluation_settings.xml"
+        if (self.updater is None) or (params is None):
+            copyfile(self.project_config, config_path)
+        else:
+            self.updater.render(new_values=params, output_path=config_path)
+
+        if self.warm_start is not None:
+            self.warm_start.apply(config_path)
+
+        return config_path
+
+    def _run_isolated_evaluation(
+        self,
+        params: Optional[Dict[str, float]],
+        number_of_replicates: int,
+        storage_folder: Optional[Path],
+        settings: RunSettings,
+    ) -> Tuple[Optional[np.ndarray], Dict[str, Union[int, float]], Dict[int, str]]:
+        """
+        Runs all the replicates of a parameter set in its own temporary folder and
+        returns their output metrics, telemetry and the errors of the failed
+        replicates (recorded in the journal by the main process).
+        """
+        telemetry = EvaluationTelemetry()
+        Path(self.sandbox_root).mkdir(parents=True, exist_ok=True)
+        with TemporaryDirectory(
+            prefix="evaluation_", dir=self.sandbox_root
+        ) as evaluation_folder:
+            with telemetry.phase("update"):
+                config_path = self._render_config(params, Path(evaluation_folder))
+                telemetry.features = get_config_features(config_path)
+
+            output_metrics = []
+            for i in range(number_of_replicates):
+                replicate_folder = storage_folder
+                if (number_of_replicates > 1) and (storage_folder is not None):
+                    replicate_folder = storage_folder / f"replicate{i}"
+
+                output_metrics.append(
+                    self._run_isolated_replicate(
+                        config_path, replicate_folder, i, params, settings, telemetry
+                    )
+                )
 
         if self.processor:
-            if number_of_replicates == 1:
-                return output_metrics[0]
+            output_metrics = _gather_metrics(output_metrics, number_of_replicates)
+            return output_metrics, telemetry.to_dict(), telemetry.errors
+        return None, telemetry.to_dict(), telemetry.errors
+
+    def _lookup_journal(
+        self,
+        params: Optional[Dict[str, float]],
+        number_of_replicates: int,
+        early_stopping: Optional[EarlyStopping],
+    ) -> Optional[Dict]:
+        """Returns the journal entry of an evaluation, or None if it must be run."""
+        if (
+            (self.journal is None)
+            or (self.processor is None)
+            or (early_stopping is not None)
+        ):
+            return None
+
+        return self.journal.lookup(
+            params, **self._get_journal_labels(number_of_replicates)
+        )
+
+    def _record_journal(
+        self,
+        params: Optional[Dict[str, float]],
+        number_of_replicates: int,
+        early_stopping: Optional[EarlyStopping],
+        output_metrics: Optional[Union[float, np.ndarray]],
+        duration: float,
+        telemetry: Optional[Dict[str, Union[int, float]]] = None,
+    ) -> None:
+        """
+        Appends a finished evaluation to the journal, if there is one. Evaluations
+        with failed replicates are labelled as failed, so they are run again.
+        """
+        if (self.journal is None) or (early_stopping is not None):
+            return
 
-            return np.asarray(output_metrics)
+        labels = self._get_journal_labels(number_of_replicates)
+        self.journal.record(
+            params,
+            output_metrics,
+            duration,
+            telemetry=telemetry,
+            **_label_failures(labels, telemetry),
+        )
+
+    def _record_telemetry(
+        self,
+        params: Optional[Dict[str, float]],
+        number_of_replicates: int,
+        telemetry: Dict[str, Union[int, float]],
+        duration: float,
+    ) -> None:
+        """Appends the telemetry of a finished evaluation to the black box telemetry."""
+        self.telemetry.append(
+            {
+                "params": dict(params or {}),
+                "replicates": number_of_replicates,
+                "duration": duration,
+                **telemetry,
+            }
+        )
+
+    def _get_evaluation_features(
+        self, params_list: List[Dict[str, float]]
+    ) -> List[Dict[str, float]]:
+        """
+        Returns the features of the config files rendered for the passed
+        parameters (after the updater and warm start), used to predict costs.
+        """
+        if not Path(self.project_config).is_file():
+            return [{} for _ in params_list]
+
+        Path(self.sandbox_root).mkdir(parents=True, exist_ok=True)
+        with TemporaryDirectory(prefix="features_", dir=self.sandbox_root) as folder:
+            return [
+                get_config_features(self._render_config(params, Path(folder)))
+                for params in params_list
+            ]
+
+    def _order_by_cost(
+        self,
+        params_list: List[Dict[str, float]],
+        pending: List[int],
+        number_of_replicates: int,
+        features: Dict[int, Dict[str, float]],
+    ) -> List[int]:
+        """
+        Returns the pending evaluations from the longest to the shortest expected,
+        given the features of their rendered config files.
+        """
+        self.cost_model.fit(self.telemetry)
+        records = [
+            {
+                "params": params_list[k],
+                "replicates": number_of_replicates,
+                "features": features[k],
+            }
+            for k in pending
+        ]
+        return [pending[index] for index in self.cost_model.order(records)]
+
+    def _limit_concurrent_runs(
+        self, max_workers: int, params: Optional[Dict[str, float]] = None
+    ) -> int:
+        """
+        Returns the number of simulations of the passed parameters that can run
+        at the same time in the memory budget.
+        """
+        if self.memory_budget is None:
+            return max_workers
+
+        self.memory_budget.fit(self.telemetry)
+        features = self._get_evaluation_features([params])[0]
+        run_memory = self.memory_budget.estimate(features=features)
+        return min(max_workers, self.memory_budget.get_concurrent_runs(run_memory))
+
+    def get_telemetry(self) -> pd.DataFrame:
+        """
+        Returns the telemetry of the evaluations run by the black box, with one
+        row per evaluation (see EvaluationTelemetry for the measurements).
+        """
+        return create_telemetry_table(self.telemetry)
+
+    def _get_journal_labels(self, number_of_replicates: int) -> Dict[str, int]:
+        """Returns the labels that identify an evaluation of the black box in the journal."""
+        labels = {"replicates": number_of_replicates}
+        if self.random_seed is not None:
+            labels["random_seed"] = self.random_seed
+
+        return labels
+
+    def _record_failures(
+        self, params: Optional[Dict[str, float]], errors: Dict[int, str]
+    ) -> None:
+        """
+        Appends the failed replicates of an evaluation (with their error and last
+        lines of output, see EvaluationTelemetry.errors) to the journal.
+        """
+        if self.journal is None:
+            return
+
+        for replicate, log_tail in errors.items():
+            labels = {"replicate": replicate, "failed": True}
+            if self.random_seed is not None:
+                labels["random_seed"] = get_replicate_seed(self.random_seed, replicate)
+            self.journal.record(params, self.failure_value, log_tail=log_tail, **labels)
+
+    def _get_cache_key(
+        self,
+        config_path: Union[str, Path],
+        params: Optional[Dict[str, float]],
+        replicate: int,
+    ) -> Optional[str]:
+        """Returns the cache key of a replicate, or None if results are not cached."""
+        if (self.cache is None) or (self.processor is None):
+            return None
+
+        return compute_evaluation_key(
+            config_path=config_path,
+            params=params,
+            replicate=replicate,
+            executable=self.project_command,
+            processor=self.processor,
+            random_seed=get_replicate_seed(self.random_seed, replicate),
+        )
+
+    def _run_isolated_replicate(
+        self,
+        config_path: Union[str, Path],
+        storage_folder: Optional[Path],
+        replicate: int,
+        params: Optional[Dict[str, float]],
+        settings: RunSettings,
+        telemetry: EvaluationTelemetry,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Optional[Union[float, np.ndarray]]:
+        """
+        Runs a single replicate in a new sandbox and computes its output metrics.
+        If a storage folder is passed, the output files are moved there before
+        the sandbox is deleted. Cached replicates are not run again, and replicates
+        stopped early are not cached (their metrics are partial).
+
+        Failed simulations are retried up to max_retries times (waiting
+        retry_delay * 2 ** attempt seconds between attempts). If all the attempts
+        fail, the failure value is returned, or the error is raised if it is None.
+        Once the cancelled event is set, a CancelledError is raised instead.
+        """
+        cache_key = self._get_cache_key(config_path, params, replicate)
+        if cache_key is not None:
+            output_metrics = self.cache.load(cache_key)
+            if output_metrics is not None:
+                logging.info(f"using cached results for replicate {replicate}")
+                return output_metrics
+
+        for attempt in range(self.max_retries + 1):
+            if (cancelled is not None) and cancelled.is_set():
+                raise CancelledError(f"Replicate {replicate} was cancelled.")
+            try:
+                output_metrics, stopped = self._run_sandboxed_replicate(
+                    config_path,
+                    storage_folder,
+                    replicate,
+                    settings,
+                    telemetry,
+                    cancelled,
+                )
+                break
+            except SimulationError as error:
+                logging.warning(f"replicate {replicate} failed: {error}")
+                if attempt == self.max_retries:
+                    telemetry.add_failure(replicate, error)
+                    if self.failure_value is None:
+                        error.replicate = replicate
+                        raise
+                    return self.failure_value
+                time.sleep(self.retry_delay * 2**attempt)
+
+        if (cache_key is not None) and not stopped:
+            self.cache.store(cache_key, output_metrics)
+
+        return output_metrics
+
+    def _run_sandboxed_replicate(
+        self,
+        config_path: Union[str, Path],
+        storage_folder: Optional[Path],
+        replicate: int,
+        settings: RunSettings,
+        telemetry: EvaluationTelemetry,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Tuple[Optional[Union[float, np.ndarray]], bool]:
+        """
+        Runs a single attempt of a replicate in a new sandbox and returns its output
+        metrics and if it was stopped early. Coroutine processors are run in a new
+        event loop.
+        """
+        with telemetry.phase("update"):
+            sandbox = self._create_sandbox(config_path, replicate, settings)
+        try:
+            stream = self._create_stream(sandbox.output_folder, settings.early_stopping)
+            with telemetry.phase("simulate"):
+                stopped = self._run_project(
+                    sandbox.config,
+                    stream,
+                    settings.omp_num_threads,
+                    self._get_log_path(sandbox),
+                    telemetry,
+                    cancelled,
+                )
+
+            with telemetry.phase("process"):
+                output_metrics = None
+                if stream is not None:
+                    output_metrics = stream.processor.result()
+                elif asyncio.iscoroutinefunction(self.processor):
+                    output_metrics = asyncio.run(
+                        self.processor(
+                            output_path=sandbox.output_folder, version=self.version
+                        )
+                    )
+                elif self.processor:
+                    output_metrics = self.processor(
+                        output_path=sandbox.output_folder, version=self.version
+                    )
+
+            telemetry.add("output_bytes", get_folder_size(sandbox.output_folder))
+            if storage_folder is not None:
+                with telemetry.phase("retain"):
+                    retain_outputs(
+                        sandbox.output_folder, storage_folder, self.archive_format
+                    )
+        finally:
+            with telemetry.phase("cleanup"):
+                sandbox.cleanup()
+
+        return output_metrics, stopped
 
 
 def run_sweep(
-    black_box: PhysiCellBlackBox, name: str, bounds: Tuple[float, float], step: float
+    black_box: PhysiCellBlackBox,
+    name: str,
+    bounds: Tuple[float, float],
+    step: float,
+    max_workers: int = 1,
 ) -> np.ndarray:
     input_values = np.arange(bounds[0], bounds[1], step)
-    output_metrics = []
-    for value in input_values:
-        output_metrics.append(black_box.run({name: value}))
+    params_list = [{name: value} for value in input_values]
+    return _stack_metrics(black_box.run_batch(params_list, max_workers=max_workers))
 
-    return np.asarray(output_metrics)
+
+def tune_threads(
+    black_box: PhysiCellBlackBox,
+    params: Optional[Dict[str, float]] = None,
+    max_time: Optional[float] = None,
+    thread_counts: Optional[List[int]] = None,
+    total_cores: Optional[int] = None,
+) -> ThreadPlan:
+    """
+    Benchmarks several splits of the cores between concurrent simulations and
+    returns the one with the highest throughput (simulations per hour).
+
+    For each number of threads per simulation, as many simulations as fit in the
+    available cores are run at the same time, and the throughput is computed
+    from the time it takes for all of them to finish.
+
+    Parameters
+    ----------
+    black_box
+        The black box whose simulations should be benchmarked.
+    params
+        The parameter values of the benchmark simulations.
+    max_time
+        The simulated time of the benchmark simulations (a short run). If None,
+        the max_time in the config file is used.
+    thread_counts
+        The numbers of threads per simulation to be tested. Defaults to the
+        powers of two up to the total number of cores (and the total itself).
+    total_cores
+        The number of cores to be shared. Defaults to the black box total_cores
+        or the available cores.
+
+    Returns
+    -------
+    ThreadPlan
+        The number of threads per simulation and concurrent simulations with the
+        best throughput.
+    """
+    total_cores = total_cores or black_box.total_cores or get_available_cores()
+    if thread_counts is None:
+        thread_counts = [2**k for k in range(total_cores.bit_length())]
+        thread_counts = sorted({*thread_counts, total_cores})
+
+    Path(black_box.sandbox_root).mkdir(parents=True, exist_ok=True)
+    plans = []
+    with TemporaryDirectory(
+        prefix="benchmark_", dir=black_box.sandbox_root
+    ) as benchmark_folder:
+        config_path = black_box._render_config(params, Path(benchmark_folder))
+        if max_time is not None:
+            parser = ConfigFileParser(config_path)
+            overall = parser.read_overall_params()
+            overall.max_time = max_time
+            parser.write_overall_params(overall)
+
+        def run_benchmark(threads: int) -> None:
+            with RunSandbox(
+                config_path,
+                root=black_box.sandbox_root,
+                prefix="benchmark_",
+                omp_num_threads=threads,
+            ) as sandbox:
+                black_box._run_project(sandbox.config, omp_num_threads=threads)
+
+        for threads in thread_counts:
+            concurrent_runs = max(1, total_cores // threads)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrent_runs) as executor:
+                list(executor.map(run_benchmark, repeat(threads, concurrent_runs)))
+            duration = time.perf_counter() - start
+            plans.append(
+                ThreadPlan(threads, concurrent_runs, 3600 * concurrent_runs / duration)
+            )
+            logging.info(f"benchmarked {plans[-1]}")
+
+    return max(plans, key=lambda plan: plan.simulations_per_hour)
 
 
 @dataclass
@@ -194,6 +1749,9 @@ class MultiLevelSweep:
     percentage_dir: float
     parameters: List[str]
     error_estimator: ErrorQuantification = compute_mean_squared_error
+    early_stopping: bool = False
+    journal: Optional[EvaluationJournal] = None
+    max_workers: Optional[int] = 1
     plotter: SweeperPlot = field(init=False)
     results: np.ndarray = field(init=False)
     current_level: int = field(init=False)
@@ -248,8 +1806,23 @@ class MultiLevelSweep:
         return x, y
 
     def get_optimal_idx(self) -> Tuple[int, int]:
-        """Returns the indexes for the smallest error in the current level."""
-        best_result = np.argmin(self.results[self.current_level])
+        """
+        Returns the indexes for the smallest error in the current level. Points
+        with a NaN error (e.g., failed simulations with failure_value=np.nan)
+        are ignored.
+
+        Raises
+        ------
+        ValueError
+            When the errors of all the points of the level are NaN.
+        """
+        level_results = self.results[self.current_level]
+        if np.all(np.isnan(level_results)):
+            raise ValueError(
+                f"All the errors of level {self.current_level} are NaN "
+                "(every simulation of the level failed)."
+            )
+        best_result = np.nanargmin(level_results)
         i = int(np.floor(best_result / self.points_dir))
         j = int(best_result - self.points_dir * i)
 
@@ -259,18 +1832,70 @@ class MultiLevelSweep:
         """
         Runs the black box for each cell of the parameter space defined by x and y.
         Also chooses the best optimal point found in the parameter space.
+
+        The cells of the grid are run as a single batch (see
+        PhysiCellBlackBox.run_batch), with up to max_workers simulations at the
+        same time.
+
+        If early_stopping is set (and the black box uses a streaming processor),
+        simulations are stopped as soon as their partial error exceeds the best
+        error of the level. Their partial error is stored instead, which is a lower
+        bound of the final error for cumulative error estimators.
+
+        If a journal is set, the error of each point is appended to the journal
+        and points already in the journal (for the current level) are not run
+        again. Running the sweep again from the same initial point with the same
+        journal resumes it where it stopped.
         """
+        partial_error = PartialError(self.target_data, self.error_estimator)
+        best_error = np.inf
+        points = []
+        params_list = []
         for i, x_value in enumerate(x):
             for j, y_value in enumerate(y):
-                clean_tmp_files()
-                # Select parameters and run the model
-                results = self.black_box.run(
-                    {self.parameters[0]: x_value, self.parameters[1]: y_value}
-                )
+                params = {self.parameters[0]: x_value, self.parameters[1]: y_value}
+                if self.journal is not None:
+                    entry = self.journal.lookup(params, level=self.current_level)
+                    if entry is not None:
+                        self.results[self.current_level][i][j] = entry["metrics"]
+                        best_error = min(best_error, entry["metrics"])
+                        continue
+
+                points.append((i, j))
+                params_list.append(params)
 
-                # Compute error between simulated data and target data
-                self.results[self.current_level][i][j] = self.error_estimator(
-                    results, self.target_data
+        clean_tmp_files()
+        early_stopping = None
+        if self.early_stopping:
+            early_stopping = EarlyStopping(partial_error, best_error)
+
+        # Run the grid as a single batch and store each error as it completes
+        stream = self.black_box.stream_batch(
+            params_list,
+            number_of_replicates=1,
+            keep_files=False,
+            max_workers=self.max_workers,
+            early_stopping=early_stopping,
+        )
+        for k, params, results, telemetry in stream.iter_indexed():
+            # Compute error between simulated data and target data
+            if self.early_stopping:
+                error = partial_error(results)
+            else:
+                error = self.error_estimator(results, self.target_data)
+            i, j = points[k]
+            self.results[self.current_level][i][j] = error
+            best_error = min(best_error, error)
+            if early_stopping is not None:
+                # Evaluations are submitted when a worker is free, so the
+                # ones that did not start yet use the new best error
+                early_stopping.best_objective = best_error
+            if self.journal is not None:
+                self.journal.record(
+                    params,
+                    error,
+                    telemetry["duration"],
+                    **_label_failures({"level": self.current_level}, telemetry),
                 )
 
         i, j = self.get_optimal_idx()
@@ -93,6 +93,159 @@ def parse_overall(tree: ElementTree, path: str) -> Dict[str, float]:
     }
 
 
+def parse_save_folder(tree: ElementTree, path: str) -> str:
+    """
+    Reads and returns the output folder defined in the <save> data.
+
+    Parameters
+    ----------
+    tree:
+        A ElementTree object of the XML config file to be read.
+    path:
+        A string with the path to the save node (e.g., "save").
+
+    Returns
+    -------
+    str
+        The path to the folder where PhysiCell writes the output files.
+
+    Raises
+    ------
+    ValueError
+        When the passed path does not point to the save node.
+    """
+    if tree.find(path).tag != "save":
+        raise ValueError("The passed path does not point to the correct node.")
+
+    return tree.find(path + "/folder").text.strip()
+
+
+def parse_omp_num_threads(tree: ElementTree, path: str) -> int:
+    """
+    Reads and returns the number of OpenMP threads defined in the <parallel> data.
+
+    Parameters
+    ----------
+    tree:
+        A ElementTree object of the XML config file to be read.
+    path:
+        A string with the path to the parallel node (e.g., "parallel").
+
+    Returns
+    -------
+    int
+        The number of threads used by PhysiCell.
+
+    Raises
+    ------
+    ValueError
+        When the passed path does not point to the parallel node.
+    """
+    if tree.find(path).tag != "parallel":
+        raise ValueError("The passed path does not point to the correct node.")
+
+    return int(tree.find(path + "/omp_num_threads").text)
+
+
+def parse_random_seed(tree: ElementTree, path: str) -> int:
+    """
+    Reads and returns the random seed defined in the <user_parameters> data.
+
+    Parameters
+    ----------
+    tree:
+        A ElementTree object of the XML config file to be read.
+    path:
+        A string with the path to the user parameters node (e.g., "user_parameters").
+
+    Returns
+    -------
+    int
+        The seed of the random number generator used by PhysiCell.
+
+    Raises
+    ------
+    ValueError
+        When the passed path does not point to the user parameters node, or
+        the random seed is not defined.
+    """
+    if tree.find(path).tag != "user_parameters":
+        raise ValueError("The passed path does not point to the correct node.")
+    if tree.find(path + "/random_seed") is None:
+        raise ValueError("The config file does not define a random seed.")
+
+    return int(tree.find(path + "/random_seed").text)
+
+
+def parse_cell_positions(tree: ElementTree, path: str) -> Dict[str, Union[bool, str]]:
+    """
+    Reads and returns the initial cell positions file defined in the <initial_conditions> data.
+
+    Parameters
+    ----------
+    tree:
+        A ElementTree object of the XML config file to be read.
+    path:
+        A string with the path to the cell positions node
+        (e.g., "initial_conditions/cell_positions").
+
+    Returns
+    -------
+    Dict[str, Union[bool, str]]
+        A dictionary with the cell positions data (enabled, type, folder, filename).
+
+    Raises
+    ------
+    ValueError
+        When the passed path does not point to the cell positions node.
+    """
+    if tree.find(path).tag != "cell_positions":
+        raise ValueError("The passed path does not point to the correct node.")
+
+    node = tree.find(path)
+    return {
+        "enabled": node.get("enabled") == "true",
+        "type": node.get("type"),
+        "folder": node.find("folder").text.strip(),
+        "filename": node.find("filename").text.strip(),
+    }
+
+
+def parse_me_initial_condition(
+    tree: ElementTree, path: str
+) -> Dict[str, Union[bool, str]]:
+    """
+    Reads and returns the initial condition file of the microenvironment.
+
+    Parameters
+    ----------
+    tree:
+        A ElementTree object of the XML config file to be read.
+    path:
+        A string with the path to the initial condition node
+        (e.g., "microenvironment_setup/options/initial_condition").
+
+    Returns
+    -------
+    Dict[str, Union[bool, str]]
+        A dictionary with the initial condition data (enabled, type, filename).
+
+    Raises
+    ------
+    ValueError
+        When the passed path does not point to the initial condition node.
+    """
+    if tree.find(path).tag != "initial_condition":
+        raise ValueError("The passed path does not point to the correct node.")
+
+    node = tree.find(path)
+    return {
+        "enabled": node.get("enabled") == "true",
+        "type": node.get("type"),
+        "filename": node.find("filename").text.strip(),
+    }
+
+
 def parse_substance(
     tree: ElementTree, path: str, name: str
 ) -> Dict[str, Union[str, float]]:
@@ -718,6 +871,156 @@ def write_overall(new_values: Dict[str, float], tree: ElementTree, path: str) ->
         print("The passed dictionary does not have all the domain variables.")
 
 
+def write_save_folder(new_value: str, tree: ElementTree, path: str) -> None:
+    """
+    Writes a new output folder to the <save> data in the XML tree.
+    Values will not be saved to the XML file, only to the ElementTree.
+
+    Parameters
+    ----------
+    new_value:
+        The path to the folder where PhysiCell should write the output files.
+    tree:
+        A ElementTree object of the XML config file to be written.
+    path:
+        A string with the path to the save node (e.g., "save").
+
+    Raises
+    ------
+    ValueError
+        When the passed path does not point to the valid save node.
+    """
+    if tree.find(path).tag != "save":
+        raise ValueError("The passed path does not point to the correct node.")
+
+    tree.find(path + "/folder").text = str(new_value)
+
+
+def write_omp_num_threads(new_value: int, tree: ElementTree, path: str) -> None:
+    """
+    Writes a new number of OpenMP threads to the <parallel> data in the XML tree.
+    Values will not be saved to the XML file, only to the ElementTree.
+
+    Parameters
+    ----------
+    new_value:
+        The number of threads to be used by PhysiCell.
+    tree:
+        A ElementTree object of the XML config file to be written.
+    path:
+        A string with the path to the parallel node (e.g., "parallel").
+
+    Raises
+    ------
+    ValueError
+        When the passed path does not point to the valid parallel node.
+    """
+    if tree.find(path).tag != "parallel":
+        raise ValueError("The passed path does not point to the correct node.")
+
+    tree.find(path + "/omp_num_threads").text = str(int(new_value))
+
+
+def write_random_seed(new_value: int, tree: ElementTree, path: str) -> None:
+    """
+    Writes a new random seed to the <user_parameters> data in the XML tree.
+    Values will not be saved to the XML file, only to the ElementTree.
+
+    Parameters
+    ----------
+    new_value:
+        The seed of the random number generator used by PhysiCell.
+    tree:
+        A ElementTree object of the XML config file to be written.
+    path:
+        A string with the path to the user parameters node (e.g., "user_parameters").
+
+    Raises
+    ------
+    ValueError
+        When the passed path does not point to the valid user parameters node,
+        or the random seed is not defined.
+    """
+    if tree.find(path).tag != "user_parameters":
+        raise ValueError("The passed path does not point to the correct node.")
+    if tree.find(path + "/random_seed") is None:
+        raise ValueError("The config file does not define a random seed.")
+
+    tree.find(path + "/random_seed").text = str(int(new_value))
+
+
+def write_cell_positions(
+    new_values: Dict[str, Union[bool, str]], tree: ElementTree, path: str
+) -> None:
+    """
+    Writes new values for the initial cell positions file in the XML tree.
+    Values will not be saved to the XML file, only to the ElementTree.
+
+    Parameters
+    ----------
+    new_values:
+        A dictionary with the cell positions data (enabled, type, folder,
+        filename). It is not required to include all the keys.
+    tree:
+        A ElementTree object of the XML config file to be written.
+    path:
+        A string with the path to the cell positions node
+        (e.g., "initial_conditions/cell_positions").
+
+    Raises
+    ------
+    ValueError
+        When the passed path does not point to the valid cell positions node.
+    """
+    if tree.find(path).tag != "cell_positions":
+        raise ValueError("The passed path does not point to the correct node.")
+
+    node = tree.find(path)
+    if "enabled" in new_values.keys():
+        node.set("enabled", str(new_values["enabled"]).lower())
+    if "type" in new_values.keys():
+        node.set("type", new_values["type"])
+    if "folder" in new_values.keys():
+        node.find("folder").text = str(new_values["folder"])
+    if "filename" in new_values.keys():
+        node.find("filename").text = str(new_values["filename"])
+
+
+def write_me_initial_condition(
+    new_values: Dict[str, Union[bool, str]], tree: ElementTree, path: str
+) -> None:
+    """
+    Writes new values for the initial condition file of the microenvironment.
+    Values will not be saved to the XML file, only to the ElementTree.
+
+    Parameters
+    ----------
+    new_values:
+        A dictionary with the initial condition data (enabled, type,
+        filename). It is not required to include all the keys.
+    tree:
+        A ElementTree object of the XML config file to be written.
+    path:
+        A string with the path to the initial condition node
+        (e.g., "microenvironment_setup/options/initial_condition").
+
+    Raises
+    ------
+    ValueError
+        When the passed path does not point to the valid initial condition node.
+    """
+    if tree.find(path).tag != "initial_condition":
+        raise ValueError("The passed path does not point to the correct node.")
+
+    node = tree.find(path)
+    if "enabled" in new_values.keys():
+        node.set("enabled", str(new_values["enabled"]).lower())
+    if "type" in new_values.keys():
+        node.set("type", new_values["type"])
+    if "filename" in new_values.keys():
+        node.find("filename").text = str(new_values["filename"])
+
+
 def write_substance(new_values, tree: ElementTree, path: str, name: str) -> None:
     """
     Writes new values for a microenvironment substance the XML tree.
@@ -1,6 +1,9 @@
 """A module to process output PhysiCell files and extract metrics from the data."""
+from abc import ABC, abstractmethod
+from copy import deepcopy
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, Union, List, Tuple
+from typing import Callable, Optional, Union, List, Tuple
 from xml.etree import ElementTree
 
 import numpy as np
@@ -346,6 +349,123 @@ def get_final_y_position(
     return cells["position_y"].values
 
 
+def is_timestep_complete(
+    output_path: Path, timestep: int, version: str, finished: bool
+) -> bool:
+    """
+    Checks if all the output files of a time point have been written.
+
+    While the simulation is running, a time point is only considered complete once
+    PhysiCell has started writing the next one. After the simulation is finished,
+    every time point with a cell file is complete.
+    """
+    time_str = str(timestep).zfill(8)
+    cell_file = output_path / get_cell_file_name(version=version).format(time_str)
+    if not cell_file.is_file():
+        return False
+
+    if finished:
+        return True
+
+    next_time_str = str(timestep + 1).zfill(8)
+    return (output_path / f"output{next_time_str}.xml").is_file()
+
+
+class StreamingProcessor(ABC):
+    """
+    An output processor that consumes the output files one time point at a time.
+
+    The black box feeds each time point to the processor as soon as it has been
+    written, so the outputs are processed while the simulation is still running.
+    The black box works on a copy of the processor for each run. Streaming
+    processors can also be called as regular OutputProcessor functions.
+    """
+
+    @abstractmethod
+    def update(self, timestep: int, output_path: Path, version: str) -> None:
+        """Folds the data of a new time point into the partial metrics."""
+        pass
+
+    @abstractmethod
+    def result(self) -> Union[float, np.ndarray]:
+        """Returns the metrics computed from the time points processed so far."""
+        pass
+
+    def __call__(
+        self, output_path: Path = Path("output"), version: str = NEW_OUTPUTS_VERSION
+    ) -> Union[float, np.ndarray]:
+        """Processes all the time points in the output folder and returns the metrics."""
+        output_path = Path(output_path)
+        processor = deepcopy(self)
+        for timestep in range(get_cell_file_num(output_path, version=version)):
+            processor.update(timestep, output_path, version)
+
+        return processor.result()
+
+
+@dataclass
+class OutputStream:
+    """
+    Feeds the completed time points of a running simulation to a streaming processor.
+
+    Parameters
+    ----------
+    processor
+        The streaming processor that consumes the time points.
+    output_path
+        The path to where the output files are written.
+    version
+        The PhysiCell version used to write the output files.
+    stop_condition
+        A function that receives the partial metrics after new time points are
+        processed and returns True if the simulation should be stopped.
+    """
+
+    processor: StreamingProcessor
+    output_path: Path
+    version: str = NEW_OUTPUTS_VERSION
+    stop_condition: Optional[Callable[[Union[float, np.ndarray]], bool]] = None
+    next_timestep: int = 0
+
+    def poll(self, finished: bool = False) -> bool:
+        """
+        Processes the time points that were completed since the last call.
+        Returns True if the stop condition is met for the new partial metrics.
+        """
+        first_timestep = self.next_timestep
+        while is_timestep_complete(
+            self.output_path, self.next_timestep, self.version, finished
+        ):
+            self.processor.update(self.next_timestep, self.output_path, self.version)
+            self.next_timestep += 1
+
+        if (self.stop_condition is None) or (self.next_timestep == first_timestep):
+            return False
+
+        return self.stop_condition(self.processor.result())
+
+
+@dataclass
+class CellNumbersOverTime(StreamingProcessor):
+    """A streaming version of get_cell_numbers_over_time."""
+
+    number_of_cells: List[int] = field(default_factory=list)
+
+    def update(self, timestep: int, output_path: Path, version: str) -> None:
+        """Counts the number of cells at the passed time point."""
+        cells = get_cell_data(
+            timestep=timestep,
+            variables=["ID"],
+            output_path=output_path,
+            version=version,
+        )
+        self.number_of_cells.append(cells["ID"].size)
+
+    def result(self) -> np.ndarray:
+        """Returns the number of cells at every processed time point."""
+        return np.asarray(self.number_of_cells, dtype=float)
+
+
 ErrorQuantification = Callable[[np.ndarray, np.ndarray], float]
 
 
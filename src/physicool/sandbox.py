@@ -0,0 +1,181 @@
+"""A module to create isolated folders (sandboxes) for single PhysiCell runs."""
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from shutil import copy2, make_archive, rmtree
+from tempfile import mkdtemp
+from typing import Optional, Union
+
+from physicool.config import ConfigFileParser
+
+SANDBOX_ROOT = Path(".physicool/sandboxes")
+SANDBOX_CONFIG = "PhysiCell_settings.xml"
+SANDBOX_OUTPUT = "output"
+
+
+def write_run_config(
+    config_path: Union[str, Path],
+    run_folder: Union[str, Path],
+    output_folder: Path,
+    omp_num_threads: Optional[int] = None,
+    random_seed: Optional[int] = None,
+) -> Path:
+    """
+    Writes a private copy of the config file that saves the outputs to a given folder.
+
+    Parameters
+    -----------
+    config_path:
+        The path to the reference PhysiCell config file.
+    run_folder:
+        The folder where the new config file will be written.
+    output_folder:
+        The folder where PhysiCell should write the output files of this run.
+    omp_num_threads:
+        The number of OpenMP threads of this run. If None, the number of
+        threads of the reference config file is kept.
+    random_seed:
+        The random seed of this run. If None, the seed of the reference config
+        file is kept.
+
+    Returns
+    --------
+    Path
+        The path to the new config file.
+    """
+    parser = ConfigFileParser(Path(config_path))
+    parser.write_output_folder(output_folder.absolute(), update_file=False)
+    if omp_num_threads is not None:
+        parser.write_omp_num_threads(omp_num_threads, update_file=False)
+    if random_seed is not None:
+        parser.write_random_seed(random_seed, update_file=False)
+    run_config = Path(run_folder) / SANDBOX_CONFIG
+    parser.tree.write(run_config)
+
+    return run_config
+
+
+def remove_folder(folder: Union[str, Path]) -> None:
+    """Removes a folder and all of its contents, if it exists."""
+    if Path(folder).is_dir():
+        rmtree(folder)
+
+
+def link_folder_contents(source: Path, destination: Path) -> None:
+    """
+    Hard links the files in the source folder to the destination folder, replacing
+    existing files. Files are copied if they cannot be linked (e.g., when the
+    folders are on different file systems).
+    """
+    for folder, _, files in os.walk(source):
+        target_folder = destination / Path(folder).relative_to(source)
+        target_folder.mkdir(parents=True, exist_ok=True)
+        for file in files:
+            target = target_folder / file
+            if target.exists():
+                target.unlink()
+            try:
+                os.link(Path(folder) / file, target)
+            except OSError:
+                copy2(Path(folder) / file, target)
+
+
+def retain_outputs(
+    source: Path, destination: Path, archive_format: Optional[str] = None
+) -> Path:
+    """
+    Keeps the output files of a run before its sandbox is deleted.
+
+    The source folder is renamed to the destination when possible (same file
+    system and no existing destination folder). Otherwise, the files are hard
+    linked (or copied, as a last resort) into the destination folder.
+
+    Parameters
+    ----------
+    source
+        The folder with the output files of the run.
+    destination
+        The folder where the output files should be kept.
+    archive_format
+        If passed, the output files are packed into a compressed archive
+        ("output" + extension) inside the destination folder instead. Any
+        format accepted by shutil.make_archive can be used (e.g., "gztar", "zip").
+
+    Returns
+    -------
+    Path
+        The path to the kept outputs (destination folder or archive).
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    if archive_format is not None:
+        destination.mkdir(exist_ok=True)
+        archive = make_archive(
+            str(destination / SANDBOX_OUTPUT), archive_format, root_dir=source
+        )
+        return Path(archive)
+
+    try:
+        source.rename(destination)
+    except OSError:
+        link_folder_contents(source, destination)
+
+    return destination
+
+
+@dataclass
+class RunSandbox:
+    """
+    A throwaway folder where a single PhysiCell run is executed.
+
+    The sandbox holds a private copy of the config file whose <save><folder>
+    points to the sandbox "output" folder, so that runs never share the project
+    "output" folder. The folder is deleted when the sandbox is cleaned up (or
+    when leaving the with block).
+
+    Parameters
+    ----------
+    config_path
+        The path to the config file to be used by the run.
+    root
+        The folder where the sandbox folder will be created.
+    prefix
+        The prefix of the sandbox folder name.
+    omp_num_threads
+        The number of OpenMP threads to be used by the run (if None, the value
+        in the config file is kept).
+    random_seed
+        The random seed of the run (if None, the value in the config file is kept).
+    """
+
+    config_path: Union[str, Path]
+    root: Union[str, Path] = SANDBOX_ROOT
+    prefix: str = "run_"
+    omp_num_threads: Optional[int] = None
+    random_seed: Optional[int] = None
+    folder: Path = field(init=False)
+    config: Path = field(init=False)
+    output_folder: Path = field(init=False)
+
+    def __post_init__(self) -> None:
+        """Creates the sandbox folder, its output folder and its config file."""
+        Path(self.root).mkdir(parents=True, exist_ok=True)
+        self.folder = Path(mkdtemp(prefix=self.prefix, dir=self.root)).absolute()
+        self.output_folder = self.folder / SANDBOX_OUTPUT
+        self.output_folder.mkdir()
+        self.config = write_run_config(
+            self.config_path,
+            self.folder,
+            self.output_folder,
+            self.omp_num_threads,
+            self.random_seed,
+        )
+
+    def __enter__(self) -> "RunSandbox":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.cleanup()
+
+    def cleanup(self) -> None:
+        """Deletes the sandbox folder and all the files inside it."""
+        remove_folder(self.folder)
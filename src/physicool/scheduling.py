@@ -0,0 +1,192 @@
+"""A module to plan the order and concurrency of the black box evaluations of a batch."""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from physicool.config import ConfigFileParser
+
+
+def get_voxel_count(config_path: Union[str, Path]) -> int:
+    """Returns the number of voxels of the microenvironment mesh of a config file."""
+    domain = ConfigFileParser(Path(config_path)).read_domain_params()
+    voxels = max(1, (domain.x_max - domain.x_min) // max(1, domain.dx))
+    voxels *= max(1, (domain.y_max - domain.y_min) // max(1, domain.dy))
+    if not domain.use_2d:
+        voxels *= max(1, (domain.z_max - domain.z_min) // max(1, domain.dz))
+
+    return voxels
+
+
+def get_config_features(config_path: Union[str, Path]) -> Dict[str, float]:
+    """
+    Returns the values of a config file that drive the cost of a simulation: the
+    simulated time, the number of voxels and the number of substances.
+    """
+    parser = ConfigFileParser(Path(config_path))
+    return {
+        "max_time": float(parser.read_overall_params().max_time),
+        "voxels": float(get_voxel_count(config_path)),
+        "substances": float(len(parser.read_me_params())),
+    }
+
+
+def get_evaluation_features(record: Dict[str, Any]) -> Dict[str, float]:
+    """Returns the features of an evaluation (its parameters and config features)."""
+    features = {f"params.{name}": value for name, value in record["params"].items()}
+    features.update(record.get("features", {}))
+    return features
+
+
+@dataclass
+class CostModel:
+    """
+    Predicts the duration of black box evaluations from the telemetry of past ones.
+
+    The duration of each replicate is fitted as a linear function (least squares)
+    of the evaluation parameters and config features (see get_config_features).
+    The model is refitted before each batch, so predictions improve as more
+    evaluations are run. Without enough telemetry, all the evaluations have the
+    same predicted cost.
+
+    Parameters
+    ----------
+    min_records
+        The number of past evaluations needed to fit the model.
+    """
+
+    min_records: int = 2
+    feature_names: List[str] = field(init=False, default_factory=list)
+    coefficients: Optional[np.ndarray] = field(init=False, default=None)
+
+    def _get_matrix(self, records: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Returns the feature matrix (with an intercept column) of the records."""
+        rows = []
+        for record in records:
+            features = get_evaluation_features(record)
+            rows.append(
+                [1.0] + [features.get(name, 0.0) for name in self.feature_names]
+            )
+
+        return np.asarray(rows, dtype=float)
+
+    def fit(self, records: Sequence[Dict[str, Any]]) -> None:
+        """Fits the model to the telemetry records of past evaluations."""
+        records = [record for record in records if record.get("duration")]
+        if len(records) < self.min_records:
+            self.coefficients = None
+            return
+
+        self.feature_names = sorted(
+            {name for record in records for name in get_evaluation_features(record)}
+        )
+        durations = [record["duration"] / record["replicates"] for record in records]
+        self.coefficients, *_ = np.linalg.lstsq(
+            self._get_matrix(records), np.asarray(durations), rcond=None
+        )
+
+    def predict(self, records: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Returns the predicted duration (in seconds) of each evaluation."""
+        if self.coefficients is None:
+            return np.zeros(len(records))
+
+        replicates = np.asarray([record["replicates"] for record in records])
+        costs = self._get_matrix(records) @ self.coefficients
+        return np.maximum(costs, 0.0) * replicates
+
+    def order(self, records: Sequence[Dict[str, Any]]) -> List[int]:
+        """
+        Returns the indexes of the evaluations from the longest to the shortest
+        predicted duration (evaluations with the same cost keep their order).
+        """
+        costs = self.predict(records)
+        return sorted(range(len(records)), key=lambda index: -costs[index])
+
+
+@dataclass
+class MemoryBudget:
+    """
+    Limits the number of simulations that run at the same time on this machine,
+    so their projected memory stays below a budget.
+
+    The memory of a simulation is estimated from its config file: a base
+    footprint plus the memory of the microenvironment mesh, which grows with the
+    number of voxels and substances. Once simulations have been measured, this
+    estimate is scaled by the largest ratio between the peak RSS recorded in the
+    telemetry of past evaluations and the estimate for their config files (or
+    replaced by the largest peak RSS, if their config features are not known).
+    A single simulation is always started, even if it is expected to exceed the
+    budget.
+
+    Parameters
+    ----------
+    budget
+        The memory (in bytes) available to the simulations.
+    safety_factor
+        The factor applied to the learned or estimated memory of each simulation.
+    base_memory
+        The memory (in bytes) of a simulation without microenvironment.
+    voxel_memory
+        The memory (in bytes) of each voxel of the mesh.
+    substance_memory
+        The memory (in bytes) of each substance in each voxel of the mesh.
+    """
+
+    budget: int
+    safety_factor: float = 1.25
+    base_memory: int = 2**27
+    voxel_memory: int = 256
+    substance_memory: int = 128
+    peak_rss: Optional[int] = field(init=False, default=None)
+    memory_ratio: Optional[float] = field(init=False, default=None)
+
+    def fit(self, records: Sequence[Dict[str, Any]]) -> None:
+        """Learns the memory of a simulation from the peak RSS of past evaluations."""
+        measured = [record for record in records if record.get("max_rss")]
+        self.peak_rss = max(r["max_rss"] for r in measured) if measured else None
+        ratios = [
+            record["max_rss"] / self.get_mesh_memory(record["features"])
+            for record in measured
+            if record.get("features")
+        ]
+        self.memory_ratio = max(ratios) if ratios else None
+
+    def get_mesh_memory(self, features: Optional[Dict[str, float]] = None) -> float:
+        """
+        Returns the memory (in bytes) of a simulation predicted from the features
+        of its config file (see get_config_features), before any measurement.
+        """
+        features = features or {}
+        return self.base_memory + features.get("voxels", 0.0) * (
+            self.voxel_memory + features.get("substances", 0.0) * self.substance_memory
+        )
+
+    def estimate(
+        self,
+        config_path: Optional[Union[str, Path]] = None,
+        features: Optional[Dict[str, float]] = None,
+    ) -> int:
+        """
+        Returns the expected memory (in bytes) of a simulation of a config file,
+        or of a config file with the passed features (only the base memory is
+        counted if neither is passed).
+        """
+        if (features is None) and (config_path is not None):
+            features = get_config_features(config_path)
+
+        if features and (self.memory_ratio is not None):
+            memory = self.get_mesh_memory(features) * self.memory_ratio
+        elif self.peak_rss is not None:
+            memory = self.peak_rss
+        else:
+            memory = self.get_mesh_memory(features)
+        return int(memory * self.safety_factor)
+
+    def get_concurrent_runs(self, memory: int) -> int:
+        """Returns the number of simulations of the passed memory that fit in the budget."""
+        return max(1, self.budget // max(1, memory))
+
+    def admits(self, memory: int, running_memory: int) -> bool:
+        """Returns True if a new simulation can start next to the running ones."""
+        return (running_memory == 0) or (running_memory + memory <= self.budget)
@@ -0,0 +1,230 @@
+"""A module to measure where the time and resources of black box evaluations are spent."""
+import os
+import platform
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # resource usage is only available on Unix systems
+    resource = None
+
+# ru_maxrss is given in kilobytes on Linux, but in bytes on macOS
+RSS_SCALE = 1 if platform.system() == "Darwin" else 1024
+MAX_POLL_DELAY = 0.05
+
+
+def read_peak_rss(pid: int) -> int:
+    """
+    Returns the peak RSS (in bytes) of a running process, read from /proc (Linux
+    only), or zero if it is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+
+    return 0
+
+
+def decode_wait_status(status: int) -> int:
+    """
+    Returns the return code of a process from its wait status, as Popen does:
+    the exit code, or the negative signal number if it was killed by a signal.
+    """
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+
+    return os.WEXITSTATUS(status)
+
+
+@dataclass
+class ProcessWaiter:
+    """
+    Waits for a child process to finish (as Popen.wait) and measures its CPU
+    time and peak RSS.
+
+    The usage is read with os.wait4 when the process is reaped, so it only
+    includes this process (and its own children), unlike the RUSAGE_CHILDREN
+    totals of the current process. On Linux, the peak RSS given by wait4 is at
+    least the peak RSS of the current process when the child was started, so
+    when it is not larger, the peak RSS read from /proc while the process runs
+    is used instead. Both are zero if os.wait4 is not available on this OS.
+
+    Parameters
+    ----------
+    process
+        The child process.
+    cpu_time
+        The CPU time (user and system, in seconds) of the finished process.
+    max_rss
+        The peak RSS (in bytes) of the process.
+    """
+
+    process: subprocess.Popen
+    cpu_time: float = 0.0
+    max_rss: int = 0
+    parent_rss: int = field(init=False, default=0)
+
+    def __post_init__(self) -> None:
+        """Reads the peak RSS of the current process (the floor of wait4 on Linux)."""
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            self.parent_rss = usage.ru_maxrss * RSS_SCALE
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Waits for the process to finish.
+
+        Raises
+        ------
+        subprocess.TimeoutExpired
+            When the process is still running after timeout seconds.
+        """
+        if not hasattr(os, "wait4"):
+            self.process.wait(timeout=timeout)
+            return
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        sample = os.path.isdir(f"/proc/{self.process.pid}")
+        delay = 0.0005
+        while self.process.returncode is None:
+            options = 0 if (deadline is None) and not sample else os.WNOHANG
+            try:
+                pid, status, usage = os.wait4(self.process.pid, options)
+            except ChildProcessError:  # already reaped (e.g., by Popen.poll)
+                self.process.wait()
+                return
+            if pid == self.process.pid:
+                self.process.returncode = decode_wait_status(status)
+                self.cpu_time = usage.ru_utime + usage.ru_stime
+                max_rss = usage.ru_maxrss * RSS_SCALE
+                if (max_rss > self.parent_rss) or not self.max_rss:
+                    self.max_rss = max_rss
+                return
+
+            if sample:
+                self.max_rss = max(self.max_rss, read_peak_rss(self.process.pid))
+            delay = min(delay * 2, MAX_POLL_DELAY)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(self.process.args, timeout)
+                delay = min(delay, remaining)
+            time.sleep(delay)
+
+
+def get_folder_size(folder: Union[str, Path]) -> int:
+    """Returns the total size (in bytes) of the files inside a folder."""
+    size = 0
+    for root, _, files in os.walk(folder):
+        for file in files:
+            try:
+                size += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                continue
+
+    return size
+
+
+@dataclass
+class EvaluationTelemetry:
+    """
+    The time and resources used by a black box evaluation (summed over its replicates).
+
+    Parameters
+    ----------
+    update
+        The time (in seconds) spent writing the config files.
+    simulate
+        The time (in seconds) spent running PhysiCell.
+    process
+        The time (in seconds) spent computing the output metrics.
+    retain
+        The time (in seconds) spent moving or archiving the output files.
+    cleanup
+        The time (in seconds) spent deleting the run folders.
+    cpu_time
+        The CPU time (in seconds) used by the PhysiCell processes.
+    max_rss
+        The peak RSS (in bytes) of the largest PhysiCell process.
+    output_bytes
+        The size (in bytes) of the output files written by PhysiCell.
+    failures
+        The number of replicates that failed (after all their retries).
+    features
+        The values of the rendered config file that drive the cost of the
+        simulations (see physicool.scheduling.get_config_features).
+    errors
+        The error message and last lines of output of each failed replicate
+        (by replicate index). They are not included in to_dict.
+    """
+
+    update: float = 0.0
+    simulate: float = 0.0
+    process: float = 0.0
+    retain: float = 0.0
+    cleanup: float = 0.0
+    cpu_time: float = 0.0
+    max_rss: int = 0
+    output_bytes: int = 0
+    failures: int = 0
+    features: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[int, str] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def add(self, name: str, value: Union[int, float]) -> None:
+        """Adds a value to one of the measurements (replicates may run in threads)."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Adds the duration of the with block to one of the phases."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add_failure(self, replicate: int, error: Exception) -> None:
+        """Counts a replicate whose attempts all failed and keeps its error."""
+        with self._lock:
+            self.failures += 1
+            self.errors[replicate] = f"{error}\n{getattr(error, 'log_tail', '')}"
+
+    def add_process(self, waiter: ProcessWaiter) -> None:
+        """Adds the resource usage of a finished PhysiCell process."""
+        with self._lock:
+            self.cpu_time += waiter.cpu_time
+            self.max_rss = max(self.max_rss, waiter.max_rss)
+
+    def to_dict(self) -> Dict[str, Union[int, float]]:
+        """Returns the measurements as a dictionary."""
+        return {
+            measurement.name: getattr(self, measurement.name)
+            for measurement in fields(self)
+            if measurement.init
+        }
+
+
+def create_telemetry_table(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Returns the telemetry of several evaluations as a DataFrame, with one row per
+    evaluation and one column per parameter (as "params.{name}") and measurement.
+    """
+    return pd.json_normalize(records)
@@ -1,5 +1,6 @@
 """A module to create model updater functions for the PhysiCOOL black-box."""
 from abc import ABC, abstractclassmethod
+from copy import copy
 from pathlib import Path
 from typing import Dict, Union, Callable
 from dataclasses import dataclass, field
@@ -144,6 +145,37 @@ class ParamsUpdater(ABC):
         """Updates the XML file with the values passed as input."""
         pass
 
+    def render(
+        self, new_values: Dict[str, float], output_path: Union[str, Path]
+    ) -> Path:
+        """
+        Writes a new config file with the values passed as input, without changing
+        the XML file of the updater.
+
+        The values are always applied to a fresh copy of the original XML file, so
+        several config files can be rendered (e.g., one for each evaluation of a
+        parallel batch) without the updates leaking into each other.
+
+        Parameters
+        ----------
+        new_values
+            The new parameter values to be written to the config file.
+        output_path
+            The path where the new config file is written.
+
+        Returns
+        -------
+        Path
+            The path to the new config file.
+        """
+        output_path = Path(output_path)
+        renderer = copy(self)
+        renderer.parser = ConfigFileParser(path=Path(self.config_path))
+        renderer.parser.config_file = output_path
+        renderer.update(new_values=new_values)
+
+        return output_path
+
 
 @dataclass
 class CellUpdater(ParamsUpdater):
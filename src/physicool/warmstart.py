@@ -0,0 +1,148 @@
+"""A module to start simulations from an intermediate time point of a reference run."""
+from dataclasses import dataclass, field
+from pathlib import Path
+from shutil import copyfile
+from typing import Optional, Union
+from xml.etree import ElementTree
+
+import numpy as np
+
+from physicool.config import ConfigFileParser
+from physicool.processing import NEW_OUTPUTS_VERSION, get_cell_data
+
+WARM_START_ROOT = Path(".physicool/warm_start")
+CELL_POSITION_VARIABLES = ["position_x", "position_y", "position_z", "cell_type"]
+
+
+def read_snapshot_time(output_path: Union[str, Path], timestep: int) -> float:
+    """Returns the simulation time (in minutes) of an output time point."""
+    tree = ElementTree.parse(Path(output_path) / f"output{timestep:08d}.xml")
+    return float(tree.find("metadata/current_time").text)
+
+
+def write_initial_cells(
+    output_path: Union[str, Path],
+    timestep: int,
+    path: Union[str, Path],
+    version: str = NEW_OUTPUTS_VERSION,
+) -> Path:
+    """
+    Writes the cells of an output time point as a PhysiCell initial conditions file.
+
+    Parameters
+    ----------
+    output_path
+        The output folder of the reference run.
+    timestep
+        The time point to be converted.
+    path
+        The path to the CSV file to be written (x, y, z and cell type ID of each cell).
+    version
+        The PhysiCell version of the reference run.
+
+    Returns
+    -------
+    Path
+        The path to the CSV file.
+    """
+    cells = get_cell_data(timestep, CELL_POSITION_VARIABLES, output_path, version)
+    path = Path(path)
+    np.savetxt(path, cells[CELL_POSITION_VARIABLES].to_numpy(), delimiter=",")
+
+    return path
+
+
+def write_initial_microenvironment(
+    output_path: Union[str, Path], timestep: int, path: Union[str, Path]
+) -> Path:
+    """
+    Writes the substance concentrations of an output time point as a PhysiCell
+    initial condition file (the output files already use the MATLAB format read
+    by PhysiCell, so they are copied).
+    """
+    path = Path(path)
+    copyfile(Path(output_path) / f"output{timestep:08d}_microenvironment0.mat", path)
+
+    return path
+
+
+@dataclass
+class WarmStart:
+    """
+    Starts simulations from an output time point of a reference run, instead of t=0.
+
+    The cells (positions and types) and the substance concentrations of the time
+    point are written to initial conditions files, which are shared by all the
+    simulations. Each config file passed to apply is then changed to read them,
+    and its max_time is reduced by the time of the snapshot, so only the rest of
+    the simulation is run. Output times of warm-started runs are counted from the
+    snapshot. Other cell variables (e.g., volumes or cycle phases) are not
+    carried over, as PhysiCell initial conditions only hold positions and types.
+
+    Parameters
+    ----------
+    output_path
+        The output folder of the reference run.
+    timestep
+        The output time point where the simulations start.
+    version
+        The PhysiCell version of the reference run.
+    folder
+        The folder where the initial conditions files are written.
+    microenvironment
+        If the substance concentrations should also be carried over.
+    """
+
+    output_path: Union[str, Path]
+    timestep: int
+    version: str = NEW_OUTPUTS_VERSION
+    folder: Union[str, Path] = WARM_START_ROOT
+    microenvironment: bool = True
+    start_time: float = field(init=False)
+    cells_file: Path = field(init=False)
+    microenvironment_file: Optional[Path] = field(init=False, default=None)
+
+    def __post_init__(self) -> None:
+        """Writes the initial conditions files of the snapshot."""
+        self.output_path = Path(self.output_path)
+        self.folder = Path(self.folder).absolute()
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.start_time = read_snapshot_time(self.output_path, self.timestep)
+        self.cells_file = write_initial_cells(
+            self.output_path,
+            self.timestep,
+            self.folder / f"cells{self.timestep:08d}.csv",
+            self.version,
+        )
+        if self.microenvironment:
+            self.microenvironment_file = write_initial_microenvironment(
+                self.output_path,
+                self.timestep,
+                self.folder / f"microenvironment{self.timestep:08d}.mat",
+            )
+
+    def apply(self, config_path: Union[str, Path]) -> None:
+        """
+        Changes a config file to start from the snapshot.
+
+        Raises
+        ------
+        ValueError
+            When the max_time of the config file is not after the snapshot.
+        """
+        parser = ConfigFileParser(Path(config_path))
+        overall = parser.read_overall_params()
+        if overall.max_time <= self.start_time:
+            raise ValueError(
+                f"The max_time ({overall.max_time}) must be after the snapshot "
+                f"time ({self.start_time})."
+            )
+
+        overall.max_time = overall.max_time - self.start_time
+        parser.write_overall_params(overall, update_file=False)
+        parser.write_initial_cells(self.cells_file, update_file=False)
+        if self.microenvironment_file is not None:
+            parser.write_me_initial_condition(
+                self.microenvironment_file, update_file=False
+            )
+        parser.tree.write(parser.config_file)
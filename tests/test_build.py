@@ -0,0 +1,85 @@
+"""Script to test the build module of the PhysiCOOL package."""
+import stat
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from physicool import build
+
+# A stand-in for a PhysiCell Makefile: "compiles" main.cpp by copying it and
+# records each build in builds.txt
+MAKEFILE = """project: main.cpp
+\tcp main.cpp project
+\tchmod +x project
+\techo built >> builds.txt
+"""
+
+MAIN = f"""#!{sys.executable}
+print("version 1")
+"""
+
+
+class BuildCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Creates a project folder with a Makefile and a source file."""
+        self.folder = TemporaryDirectory()
+        self.project = Path(self.folder.name) / "project_folder"
+        self.project.mkdir()
+        (self.project / "Makefile").write_text(MAKEFILE)
+        (self.project / "main.cpp").write_text(MAIN)
+        (self.project / "output").mkdir()
+        self.cache = build.BuildCache(
+            folder=Path(self.folder.name) / "builds", project_folder=self.project
+        )
+
+    def count_builds(self) -> int:
+        return len((self.project / "builds.txt").read_text().splitlines())
+
+    def test_executable_is_reused(self):
+        """Asserts that make is not called again when the sources did not change."""
+        first = self.cache.get_executable()
+        second = self.cache.get_executable()
+        self.assertEqual(first, second)
+        self.assertEqual(1, self.count_builds())
+        self.assertEqual(0o555, stat.S_IMODE(first.stat().st_mode))
+
+    def test_key_changes_with_sources(self):
+        """Asserts that the project is compiled again when a source file changes."""
+        first = self.cache.get_executable()
+        (self.project / "main.cpp").write_text(MAIN.replace("1", "2"))
+        second = self.cache.get_executable()
+        self.assertNotEqual(first, second)
+        self.assertEqual(2, self.count_builds())
+
+    def test_key_ignores_outputs(self):
+        """Asserts that output files do not change the build key."""
+        key = self.cache.get_key()
+        (self.project / "output" / "output00000000.xml").write_text("")
+        self.assertEqual(key, self.cache.get_key())
+
+    def test_key_changes_with_make_args(self):
+        """Asserts that the make arguments are part of the build key."""
+        key = self.cache.get_key()
+        self.cache.make_args = ("CXXFLAGS=-O3",)
+        self.assertNotEqual(key, self.cache.get_key())
+
+    def test_build_with_new_make_args(self):
+        """Asserts that the project is rebuilt when only the make arguments change."""
+        first = self.cache.get_executable()
+        self.cache.make_args = ("CXXFLAGS=-O3",)
+        second = self.cache.get_executable()
+        self.assertNotEqual(first, second)
+        self.assertEqual(2, self.count_builds())
+
+    def test_build_error(self):
+        """Asserts that an error is raised when make fails."""
+        (self.project / "Makefile").write_text("project:\n\tfalse\n")
+        self.assertRaises(build.BuildError, self.cache.get_executable)
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Script to test the cache module of the PhysiCOOL package."""
+import os
+import pickle
+import subprocess
+import sys
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from shutil import copyfile
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from physicool import cache
+from physicool.processing import CellNumbersOverTime, get_cell_numbers_over_time
+from configdata import CONFIG_PATH
+
+
+class EvaluationKeyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Creates a copy of the config file to be modified during the tests."""
+        self.folder = TemporaryDirectory()
+        self.config = Path(self.folder.name) / "settings.xml"
+        copyfile(CONFIG_PATH, self.config)
+
+    def get_key(self, params=None, replicate=0):
+        return cache.compute_evaluation_key(
+            config_path=self.config,
+            params=params or {"speed": 1.0},
+            replicate=replicate,
+            executable=CONFIG_PATH,
+            processor=get_cell_numbers_over_time,
+        )
+
+    def test_same_inputs_same_key(self):
+        """Asserts that the key does not change when the inputs are the same."""
+        self.assertEqual(self.get_key(), self.get_key())
+
+    def test_key_changes_with_inputs(self):
+        """Asserts that the key changes with the parameters, replicate and config file."""
+        key = self.get_key()
+        self.assertNotEqual(key, self.get_key(params={"speed": 2.0}))
+        self.assertNotEqual(key, self.get_key(replicate=1))
+        seeded_key = cache.compute_evaluation_key(
+            config_path=self.config,
+            params={"speed": 1.0},
+            replicate=0,
+            executable=CONFIG_PATH,
+            processor=get_cell_numbers_over_time,
+            random_seed=3,
+        )
+        self.assertNotEqual(key, seeded_key)
+        with open(self.config, "a") as file:
+            file.write("\n")
+        self.assertNotEqual(key, self.get_key())
+
+    def test_processor_digest(self):
+        """Asserts that processors with the same name but different settings differ."""
+        digests = [
+            cache.get_processor_digest(processor)
+            for processor in [
+                get_cell_numbers_over_time,
+                partial(get_cell_numbers_over_time, version="1.9.1"),
+                partial(get_cell_numbers_over_time, version="1.10.0"),
+                lambda output_path, version: 1.0,
+                lambda output_path, version: 2.0,
+                CellNumbersOverTime(),
+                CellNumbersOverTime(number_of_cells=[1]),
+            ]
+        ]
+        self.assertEqual(len(digests), len(set(digests)))
+        self.assertEqual(
+            cache.get_processor_digest(CellNumbersOverTime()),
+            cache.get_processor_digest(CellNumbersOverTime()),
+        )
+
+    def test_processor_digest_between_runs(self):
+        """Asserts that the processor digest does not change between processes."""
+        command = (
+            "from physicool.cache import get_processor_digest;"
+            "from physicool.processing import CellNumbersOverTime, get_cell_numbers_over_time;"
+            "print(get_processor_digest(get_cell_numbers_over_time))"
+        )
+        digest = subprocess.run(
+            [sys.executable, "-c", command],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        ).stdout.strip()
+        self.assertEqual(cache.get_processor_digest(get_cell_numbers_over_time), digest)
+
+    def tearDown(self) -> None:
+        """Deletes the tmp folder."""
+        self.folder.cleanup()
+
+
+class EvaluationCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Creates an empty cache in a tmp folder."""
+        self.folder = TemporaryDirectory()
+        self.cache = cache.EvaluationCache(folder=self.folder.name)
+
+    def test_store_and_load(self):
+        """Asserts that the stored metrics are returned for the same key."""
+        self.cache.store("a", np.arange(3))
+        np.testing.assert_array_equal(np.arange(3), self.cache.load("a"))
+        self.assertIn("a", self.cache)
+
+    def test_load_missing_key(self):
+        """Asserts that None is returned when there is no entry for the key."""
+        self.assertIsNone(self.cache.load("missing"))
+
+    def test_invalidate(self):
+        """Asserts that invalidated entries are deleted."""
+        self.cache.store("a", 1.0)
+        self.cache.store("b", 2.0)
+        self.cache.invalidate("a")
+        self.assertNotIn("a", self.cache)
+        self.cache.clear()
+        self.assertEqual(0, len(self.cache))
+
+    def test_lru_eviction(self):
+        """Asserts that the least recently used entries are evicted first."""
+        for key in ["a", "b", "c"]:
+            self.cache.store(key, np.zeros(100))
+        past = time.time() - 100
+        os.utime(self.cache._entry_path("a"), (past, past))
+        os.utime(self.cache._entry_path("b"), (past - 10, past - 10))
+        self.cache.load("b")
+
+        self.cache.evict(max_size=2 * self.cache._entry_path("c").stat().st_size)
+        self.assertNotIn("a", self.cache)
+        self.assertIn("b", self.cache)
+        self.assertIn("c", self.cache)
+
+    def test_concurrent_eviction(self):
+        """Asserts that entries can be stored while other threads evict the cache."""
+        cache_size = 20 * len(pickle.dumps(np.zeros(100)))
+        self.cache.max_size = cache_size
+
+        def store_entries(worker: int) -> None:
+            for k in range(100):
+                self.cache.store(f"{worker}_{k}", np.zeros(100))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(store_entries, range(8)))
+        self.assertLessEqual(self.cache.size, cache_size)
+
+    def tearDown(self) -> None:
+        """Deletes the cache folder."""
+        self.folder.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,6 +36,19 @@ class PhysiCellConfigTest(unittest.TestCase):
         overall_data = self.xml_data.read_overall_params()
         self.assertEqual(expected_data, overall_data)
 
+    def test_read_output_folder(self):
+        """Asserts that the <save> output folder is properly read."""
+        folder = self.xml_data.read_output_folder()
+        self.assertEqual(Path("output"), folder)
+
+    def test_read_omp_num_threads(self):
+        """Asserts that the <parallel> number of threads is properly read."""
+        self.assertEqual(6, self.xml_data.read_omp_num_threads())
+
+    def test_read_initial_cells(self):
+        """Asserts that disabled initial cell positions are read as None."""
+        self.assertIsNone(self.xml_data.read_initial_cells())
+
     def test_read_me_params(self):
         """Asserts that the <microenvironment_setup> data is properly read."""
         expected_data = [dt.Substance(**EXPECTED_SUBSTANCE_READ)]
@@ -138,6 +151,46 @@ class PhysiCellConfigTest(unittest.TestCase):
         )
         self.assertEqual(EXPECTED_OVERALL_WRITE, overall_data)
 
+    def test_write_output_folder(self):
+        """Asserts that the <save> output folder is properly written."""
+        self.xml_write.write_output_folder("sandbox/output")
+
+        new_tree = ElementTree.parse(WRITE_PATH)
+        folder = pcxml.parse_save_folder(tree=new_tree, path="save")
+        self.assertEqual("sandbox/output", folder)
+
+    def test_write_omp_num_threads(self):
+        """Asserts that the <parallel> number of threads is properly written."""
+        self.xml_write.write_omp_num_threads(3)
+
+        new_tree = ElementTree.parse(WRITE_PATH)
+        threads = pcxml.parse_omp_num_threads(tree=new_tree, path="parallel")
+        self.assertEqual(3, threads)
+
+    def test_write_random_seed(self):
+        """Asserts that the random seed is properly written."""
+        self.xml_write.write_random_seed(12)
+
+        new_tree = ElementTree.parse(WRITE_PATH)
+        seed = pcxml.parse_random_seed(tree=new_tree, path="user_parameters")
+        self.assertEqual(12, seed)
+
+    def test_write_initial_cells(self):
+        """Asserts that the initial cell positions file is properly written."""
+        self.xml_write.write_initial_cells("warm_start/cells.csv")
+
+        new_parser = config.ConfigFileParser(WRITE_PATH)
+        self.assertEqual(Path("warm_start/cells.csv"), new_parser.read_initial_cells())
+
+    def test_write_me_initial_condition(self):
+        """Asserts that the microenvironment initial condition file is properly written."""
+        self.xml_write.write_me_initial_condition("warm_start/initial.mat")
+
+        new_parser = config.ConfigFileParser(WRITE_PATH)
+        self.assertEqual(
+            Path("warm_start/initial.mat"), new_parser.read_me_initial_condition()
+        )
+
     def test_write_substance_params(self):
         """Asserts that the <microenvironment_setup> data for a substance is properly written."""
         substance_data = self.xml_write.read_me_params()
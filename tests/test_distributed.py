@@ -0,0 +1,75 @@
+"""Script to test the distributed module of the PhysiCOOL package."""
+import operator
+import os
+import threading
+import unittest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+from physicool import distributed
+
+AUTHKEY = b"physicool-tests"
+
+
+class CoordinatorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Creates a coordinator on a free localhost port."""
+        self.executor = distributed.CoordinatorExecutor(("localhost", 0), AUTHKEY)
+        self.stop = threading.Event()
+        self.workers = []
+
+    def start_worker(self) -> None:
+        worker = threading.Thread(
+            target=distributed.run_worker,
+            args=(self.executor.address, AUTHKEY, self.stop, 0.05),
+        )
+        worker.start()
+        self.workers.append(worker)
+
+    def test_map(self):
+        """Asserts that the calls are run by the workers and return their results."""
+        self.start_worker()
+        self.start_worker()
+        results = list(self.executor.map(operator.mul, range(10), range(10)))
+        self.assertEqual([i * i for i in range(10)], results)
+
+    def test_telemetry(self):
+        """Asserts that the workers send back the telemetry of each call."""
+        self.start_worker()
+        self.executor.submit(operator.add, 1, 2).result(timeout=30)
+        telemetry = self.executor.telemetry[0]
+        self.assertEqual(os.getpid(), telemetry["pid"])
+        self.assertGreaterEqual(telemetry["duration"], 0.0)
+
+    def test_error(self):
+        """Asserts that the exceptions raised by the calls are raised by the futures."""
+        self.start_worker()
+        future = self.executor.submit(operator.truediv, 1, 0)
+        self.assertRaises(ZeroDivisionError, future.result, 30)
+
+    def test_disconnected_worker(self):
+        """Asserts that calls held by a disconnected worker are run by another one."""
+        future = self.executor.submit(operator.add, 1, 2)
+        with Client(self.executor.address, authkey=AUTHKEY) as connection:
+            connection.send(("ready", "crashing worker"))
+            self.assertEqual("call", connection.recv()[0])
+        self.start_worker()
+        self.assertEqual(3, future.result(timeout=30))
+
+    def test_wrong_authkey(self):
+        """Asserts that workers without the right key cannot connect."""
+        future = self.executor.submit(operator.add, 1, 2)
+        with self.assertRaises(AuthenticationError):
+            distributed.run_worker(self.executor.address, b"wrong", self.stop)
+        self.start_worker()
+        self.assertEqual(3, future.result(timeout=30))
+
+    def tearDown(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.stop.set()
+        for worker in self.workers:
+            worker.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Script to test the executors module of the PhysiCOOL package."""
+import operator
+import os
+import threading
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from physicool import executors
+
+
+class SerialExecutorTest(unittest.TestCase):
+    def test_submit(self):
+        """Asserts that calls are run when they are submitted."""
+        with executors.SerialExecutor() as executor:
+            future = executor.submit(operator.add, 1, 2)
+            self.assertTrue(future.done())
+            self.assertEqual(3, future.result())
+
+    def test_submit_error(self):
+        """Asserts that exceptions are raised when the result is requested."""
+        future = executors.SerialExecutor().submit(operator.truediv, 1, 0)
+        self.assertRaises(ZeroDivisionError, future.result)
+
+
+class FileQueueExecutorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Creates a queue folder and starts a dispatcher in the background."""
+        self.folder = TemporaryDirectory()
+        self.queue = Path(self.folder.name) / "queue"
+        self.stop = threading.Event()
+        self.dispatcher = executors.QueueDispatcher(
+            self.queue, max_jobs=2, poll_interval=0.05
+        )
+
+    def start_dispatcher(self) -> None:
+        self.thread = threading.Thread(target=self.dispatcher.serve, args=(self.stop,))
+        self.thread.start()
+
+    def test_job_files(self):
+        """Asserts that each job is written as a job script with a status file."""
+        executor = executors.FileQueueExecutor(self.queue, poll_interval=0.05)
+        executor.submit(operator.add, 1, 2)
+        scripts = list(self.queue.glob(f"*{executors.SCRIPT_SUFFIX}"))
+        self.assertEqual(1, len(scripts))
+        self.assertTrue(os.access(scripts[0], os.X_OK))
+        status_file = scripts[0].with_name(
+            scripts[0].name.replace(executors.SCRIPT_SUFFIX, executors.STATUS_SUFFIX)
+        )
+        self.assertEqual(executors.QUEUED, executors.read_job_status(status_file))
+        executor.shutdown(wait=True, cancel_futures=True)
+        self.assertEqual([], list(self.queue.iterdir()))
+
+    def test_map(self):
+        """Asserts that the jobs run by the dispatcher return their results."""
+        self.start_dispatcher()
+        with executors.FileQueueExecutor(self.queue, poll_interval=0.05) as executor:
+            results = list(executor.map(operator.mul, [1, 2, 3], [4, 5, 6]))
+        self.assertEqual([4, 10, 18], results)
+        self.assertEqual([], list(self.queue.iterdir()))
+
+    def test_failed_job(self):
+        """Asserts that the exceptions raised by the jobs are raised by the futures."""
+        self.start_dispatcher()
+        with executors.FileQueueExecutor(self.queue, poll_interval=0.05) as executor:
+            future = executor.submit(operator.truediv, 1, 0)
+            self.assertRaises(ZeroDivisionError, future.result, 30)
+
+    def test_lost_job(self):
+        """Asserts that running jobs that stop sending heartbeats fail."""
+        with executors.FileQueueExecutor(
+            self.queue, poll_interval=0.05, heartbeat_timeout=0.2
+        ) as executor:
+            future = executor.submit(operator.add, 1, 2)
+            # A job killed by the scheduler right after it started
+            status_file = next(self.queue.glob(f"*{executors.STATUS_SUFFIX}"))
+            executors.write_job_status(status_file, executors.RUNNING)
+            self.assertRaises(executors.JobLostError, future.result, 30)
+        self.assertEqual([], list(self.queue.iterdir()))
+
+    def test_heartbeat(self):
+        """Asserts that running jobs longer than the heartbeat timeout are kept."""
+        self.start_dispatcher()
+        with executors.FileQueueExecutor(
+            self.queue, poll_interval=0.05, heartbeat_timeout=0.4
+        ) as executor:
+            future = executor.submit(time.sleep, 1.5)
+            self.assertIsNone(future.result(30))
+
+    def test_queue_timeout(self):
+        """Asserts that jobs that never start fail after the queue timeout."""
+        with executors.FileQueueExecutor(
+            self.queue, poll_interval=0.05, queue_timeout=0.2
+        ) as executor:
+            future = executor.submit(operator.add, 1, 2)
+            self.assertRaises(executors.JobLostError, future.result, 30)
+        self.assertEqual([], list(self.queue.iterdir()))
+
+    def test_cancel(self):
+        """Asserts that cancelled jobs are removed from the queue before they start."""
+        self.dispatcher.max_jobs = 1
+        self.start_dispatcher()
+        markers = [Path(self.folder.name) / f"job{k}" for k in range(2)]
+        with executors.FileQueueExecutor(self.queue, poll_interval=0.05) as executor:
+            running = executor.submit(time.sleep, 0.5)
+            queued = [executor.submit(marker.touch) for marker in markers]
+            while not running.running():
+                time.sleep(0.05)
+            self.assertFalse(running.cancel())
+            self.assertTrue(all(future.cancel() for future in queued))
+            self.assertIsNone(running.result(30))
+
+        time.sleep(0.2)
+        self.assertEqual([], list(self.queue.iterdir()))
+        self.assertFalse(any(marker.exists() for marker in markers))
+
+    def tearDown(self) -> None:
+        self.stop.set()
+        if hasattr(self, "thread"):
+            self.thread.join()
+        self.folder.cleanup()
+
+
+class BackendTest(unittest.TestCase):
+    def test_concurrent_runs(self):
+        """Asserts that the backends report how many evaluations share the machine."""
+        self.assertEqual(1, executors.SerialBackend().get_concurrent_runs(4))
+        self.assertEqual(4, executors.ProcessPoolBackend().get_concurrent_runs(4))
+        self.assertIsNone(executors.FileQueueBackend().get_concurrent_runs(4))
+
+
+if __name__ == "__main__":
+    unittest.main()
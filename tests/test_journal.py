@@ -0,0 +1,57 @@
+"""Script to test the journal module of the PhysiCOOL package."""
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from physicool import journal
+
+
+class EvaluationJournalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Creates a temporary folder for the journal file."""
+        self.folder = TemporaryDirectory()
+        self.path = Path(self.folder.name) / "journal.jsonl"
+        self.journal = journal.EvaluationJournal(self.path)
+
+    def test_lookup(self):
+        """Asserts that recorded evaluations are found with the same labels."""
+        self.journal.record({"speed": 1.0}, np.array([1, 2, 3]), 2.5, replicates=1)
+        entry = self.journal.lookup({"speed": 1.0}, replicates=1)
+        np.testing.assert_array_equal([1, 2, 3], entry["metrics"])
+        self.assertEqual(2.5, entry["duration"])
+        self.assertIsNone(self.journal.lookup({"speed": 1.0}, replicates=2))
+        self.assertIsNone(self.journal.lookup({"speed": 2.0}, replicates=1))
+
+    def test_reload(self):
+        """Asserts that the entries are loaded again from the journal file."""
+        self.journal.record({"speed": 1.0}, 0.5, level=0)
+        self.journal.record({"speed": 2.0}, np.nan, level=0)
+        reloaded = journal.EvaluationJournal(self.path)
+        self.assertEqual(2, len(reloaded))
+        self.assertEqual(0.5, reloaded.lookup({"speed": 1.0}, level=0)["metrics"])
+        self.assertTrue(np.isnan(reloaded.lookup({"speed": 2.0}, level=0)["metrics"]))
+
+    def test_incomplete_line_is_skipped(self):
+        """Asserts that a line cut by a crash does not prevent loading the journal."""
+        self.journal.record({"speed": 1.0}, 0.5, level=0)
+        with open(self.path, "a") as file:
+            file.write('{"params": {"speed": 2.0}, "lab')
+        reloaded = journal.EvaluationJournal(self.path)
+        self.assertEqual(1, len(reloaded))
+
+    def test_get_entries(self):
+        """Asserts that entries can be filtered by their labels."""
+        self.journal.record({"speed": 1.0}, 0.5, level=0)
+        self.journal.record({"speed": 1.0}, 0.4, level=1)
+        self.journal.record({"speed": 2.0}, 0.3, level=1)
+        self.assertEqual(2, len(self.journal.get_entries(level=1)))
+        self.assertEqual(3, len(self.journal.get_entries()))
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""Script to test the logs module of the PhysiCOOL package."""
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from physicool.logs import RunLog, start_draining
+
+
+class RunLogTest(unittest.TestCase):
+    def test_tail_is_bounded(self):
+        """Asserts that only the last lines are kept in memory."""
+        run_log = RunLog(max_lines=2)
+        run_log.write(b"first\nsecond\nthi")
+        run_log.write(b"rd\nfourth")
+        self.assertEqual("third\nfourth", run_log.tail())
+
+    def test_long_lines_are_truncated(self):
+        """Asserts that lines (and output without line breaks) are truncated."""
+        run_log = RunLog(max_lines=2, max_line_length=3)
+        run_log.write(b"abcdef\n")
+        run_log.write(b"x" * 1000)
+        self.assertEqual("abc\nxxx", run_log.tail())
+
+    def test_log_file(self):
+        """Asserts that the full output is written to the log file."""
+        with TemporaryDirectory() as folder:
+            run_log = RunLog(max_lines=1, path=Path(folder) / "logs/run.log")
+            run_log.write(b"first\r\nsecond\n")
+            run_log.close()
+            self.assertEqual("second", run_log.tail())
+            self.assertEqual(
+                b"first\r\nsecond\n", (Path(folder) / "logs/run.log").read_bytes()
+            )
+
+    def test_start_draining(self):
+        """Asserts that the output of a process is read until it exits."""
+        run_log = RunLog(max_lines=1)
+        process = subprocess.Popen(
+            [sys.executable, "-c", "print('x' * 10 ** 6); print('done')"],
+            stdout=subprocess.PIPE,
+        )
+        reader = start_draining(process.stdout, run_log)
+        process.wait(timeout=10)
+        reader.join(timeout=10)
+        self.assertEqual("done", run_log.tail())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,1161 @@
+"""Script to test the optimization module of the PhysiCOOL package."""
+import asyncio
+import os
+import pickle
+import socket
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from shutil import copyfile
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from physicool import optimization
+from physicool.cache import EvaluationCache
+from physicool.config import ConfigFileParser
+from physicool.distributed import DistributedBackend, run_worker
+from physicool.executors import FileQueueBackend, QueueDispatcher, SerialBackend
+from physicool.journal import EvaluationJournal
+from physicool.scheduling import CostModel, MemoryBudget
+from physicool.processing import CellNumbersOverTime, get_cell_numbers_over_time
+from physicool.updaters import CellUpdater, ParamsUpdater, update_motility_values
+from physicool.warmstart import WarmStart
+
+DATA_PATH = Path(__file__).resolve().parent / "data"
+VERSION = "1.9.1"
+
+# A stand-in for a compiled PhysiCell project: it reads the output folder from
+# the config file passed as argument and copies the reference outputs into it
+FAKE_PROJECT = f"""#!{sys.executable}
+import shutil
+import sys
+from pathlib import Path
+from xml.etree import ElementTree
+
+config = sys.argv[1] if len(sys.argv) > 1 else "config/PhysiCell_settings.xml"
+folder = Path(ElementTree.parse(config).find("save/folder").text.strip())
+folder.mkdir(parents=True, exist_ok=True)
+shutil.copy(config, folder)
+for file in Path("{(DATA_PATH / "output").as_posix()}").glob("output*_cells_physicell.mat"):
+    shutil.copy(file, folder)
+"""
+
+
+STREAMING_PROJECT = f"""#!{sys.executable}
+import shutil
+import sys
+import time
+from pathlib import Path
+from xml.etree import ElementTree
+
+folder = Path(ElementTree.parse(sys.argv[1]).find("save/folder").text.strip())
+source = Path("{(DATA_PATH / "output").as_posix()}")
+for i in range(7):
+    shutil.copy(source / f"output{{i:08d}}_cells_physicell.mat", folder)
+    shutil.copy(source / f"output{{i:08d}}.xml", folder)
+    time.sleep(0.1)
+(folder / "final.xml").touch()
+"""
+
+SLOW_PROJECT = f"""#!{sys.executable}
+import time
+
+time.sleep(60)
+"""
+
+# Fails on its first call, then behaves as the fake project
+FLAKY_PROJECT = (
+    f"""#!{sys.executable}
+import sys
+from pathlib import Path
+
+if not Path("attempts").exists():
+    Path("attempts").touch()
+    sys.exit(1)
+"""
+    + FAKE_PROJECT.split("\n", 1)[1]
+)
+
+MEMORY_PROJECT = f"""#!{sys.executable}
+memory = bytearray(2 ** 30)
+"""
+
+# Writes more output than a pipe can hold, then fails
+CHATTY_PROJECT = f"""#!{sys.executable}
+import sys
+
+for i in range(20000):
+    print(f"step {{i}}: " + "x" * 100)
+    print(f"warning {{i}}", file=sys.stderr)
+print("fatal: the simulation diverged", flush=True)
+sys.exit(1)
+"""
+
+
+def create_fake_project(folder: Path) -> None:
+    """Creates a project folder with a config file and fake PhysiCell executables."""
+    (folder / "config").mkdir()
+    (folder / "output").mkdir()
+    copyfile(DATA_PATH / "settings.xml", folder / "config/PhysiCell_settings.xml")
+    scripts = [
+        ("project", FAKE_PROJECT),
+        ("streaming_project", STREAMING_PROJECT),
+        ("slow_project", SLOW_PROJECT),
+        ("flaky_project", FLAKY_PROJECT),
+        ("memory_project", MEMORY_PROJECT),
+        ("chatty_project", CHATTY_PROJECT),
+    ]
+    for name, script in scripts:
+        executable = folder / name
+        executable.write_text(script)
+        executable.chmod(0o755)
+
+
+def read_speed(output_path: Path, version: str) -> float:
+    """Returns the cell speed from the config file copied to the output folder."""
+    parser = ConfigFileParser(Path(output_path) / "PhysiCell_settings.xml")
+    return parser.read_motility_params("default").speed
+
+
+async def aget_cell_numbers_over_time(output_path: Path, version: str) -> np.ndarray:
+    """A coroutine version of get_cell_numbers_over_time."""
+    await asyncio.sleep(0)
+    return get_cell_numbers_over_time(output_path, version=version)
+
+
+def read_threads(output_path: Path, version: str) -> int:
+    """Returns the number of threads from the config file copied to the output folder."""
+    parser = ConfigFileParser(Path(output_path) / "PhysiCell_settings.xml")
+    return parser.read_omp_num_threads()
+
+
+def read_initial_conditions(output_path: Path, version: str) -> tuple:
+    """Returns the max time and initial cells file from the config file copied to the output folder."""
+    parser = ConfigFileParser(Path(output_path) / "PhysiCell_settings.xml")
+    return parser.read_overall_params().max_time, parser.read_initial_cells()
+
+
+PROCESSED_SPEEDS = []
+
+
+def record_speed(output_path: Path, version: str) -> float:
+    """Returns the cell speed and records the order in which the outputs were processed."""
+    speed = read_speed(output_path, version)
+    PROCESSED_SPEEDS.append(speed)
+    return speed
+
+
+class MaxTimeUpdater(ParamsUpdater):
+    """Writes the max_time parameter to the overall settings of the config file."""
+
+    def update(self, new_values: dict) -> None:
+        overall = self.parser.read_overall_params()
+        overall.max_time = new_values["max_time"]
+        self.parser.write_overall_params(overall)
+
+
+class VoxelSizeUpdater(ParamsUpdater):
+    """Writes the dx and dy parameters to the domain settings of the config file."""
+
+    def update(self, new_values: dict) -> None:
+        domain = self.parser.read_domain_params()
+        domain.dx = domain.dy = new_values["dx"]
+        self.parser.write_domain_params(domain)
+
+
+PROCESSED_MAX_TIMES = []
+
+
+def record_max_time(output_path: Path, version: str) -> float:
+    """Returns the max time and records the order in which the outputs were processed."""
+    parser = ConfigFileParser(Path(output_path) / "PhysiCell_settings.xml")
+    max_time = parser.read_overall_params().max_time
+    PROCESSED_MAX_TIMES.append(max_time)
+    return max_time
+
+
+def read_seed(output_path: Path, version: str) -> int:
+    """Returns the random seed from the config file copied to the output folder."""
+    parser = ConfigFileParser(Path(output_path) / "PhysiCell_settings.xml")
+    return parser.read_random_seed()
+
+
+class RunningCellNumbers(CellNumbersOverTime):
+    """Records if each time point was processed before the simulation finished."""
+
+    def __init__(self):
+        super().__init__()
+        self.while_running = []
+
+    def update(self, timestep: int, output_path: Path, version: str) -> None:
+        super().update(timestep, output_path, version)
+        self.while_running.append(not (output_path / "final.xml").exists())
+
+    def result(self):
+        return super().result(), self.while_running
+
+
+class PartialErrorTest(unittest.TestCase):
+    def test_partial_error_uses_matching_time_points(self):
+        """Asserts that the target data is truncated to the simulated time points."""
+        partial_error = optimization.PartialError(np.array([1.0, 2.0, 3.0, 4.0]))
+        self.assertEqual(1.0, partial_error(np.array([1.0, 3.0])))
+
+    def test_partial_error_with_replicates(self):
+        """Asserts that the target data is compared to every replicate."""
+        partial_error = optimization.PartialError(np.array([1.0, 2.0, 3.0]))
+        self.assertEqual(2.0, partial_error(np.array([[1.0, 3.0], [1.0, 1.0]])))
+
+    def test_early_stopping_margin(self):
+        """Asserts that runs are only stopped above the margin of the best objective."""
+        early_stopping = optimization.EarlyStopping(
+            partial_objective=float, best_objective=10.0, margin=0.1
+        )
+        self.assertFalse(early_stopping(10.5))
+        self.assertTrue(early_stopping(11.5))
+
+
+class ThreadPlannerTest(unittest.TestCase):
+    def test_plan_threads(self):
+        """Asserts that the cores are split between concurrent simulations."""
+        self.assertEqual(4, optimization.plan_threads(4, total_cores=16))
+        self.assertEqual(2, optimization.plan_threads(3, total_cores=8))
+        self.assertEqual(1, optimization.plan_threads(10, total_cores=4))
+
+
+class BlackBoxTest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Creates a fake PhysiCell project and moves into its folder."""
+        self.expected_cells = get_cell_numbers_over_time(
+            DATA_PATH / "output", version=VERSION
+        )
+        self.cwd = os.getcwd()
+        self.project_dir = TemporaryDirectory()
+        create_fake_project(Path(self.project_dir.name))
+        os.chdir(self.project_dir.name)
+        self.black_box = optimization.PhysiCellBlackBox(
+            processor=get_cell_numbers_over_time, version=VERSION
+        )
+
+    def test_run_single_replicate(self):
+        """Asserts that the processor output is returned for a single run."""
+        cells = self.black_box.run(keep_files=False)
+        np.testing.assert_array_equal(self.expected_cells, cells)
+
+    def test_run_concurrent_replicates(self):
+        """Asserts that concurrent replicates return the same array as serial runs."""
+        serial = self.black_box.run(number_of_replicates=3, keep_files=False)
+        concurrent = self.black_box.run(
+            number_of_replicates=3, keep_files=False, max_workers=3
+        )
+        self.assertEqual((3, len(self.expected_cells)), concurrent.shape)
+        np.testing.assert_array_equal(serial, concurrent)
+
+    def test_run_concurrent_replicates_keep_files(self):
+        """Asserts that concurrent replicates write their outputs to separate folders."""
+        self.black_box.run(number_of_replicates=2, keep_files=True, max_workers=2)
+        for i in range(2):
+            folder = Path(f"temp/replicate{i}")
+            self.assertTrue((folder / "output00000000_cells_physicell.mat").is_file())
+            self.assertTrue((folder / "PhysiCell_settings.xml").is_file())
+
+    def test_run_streaming(self):
+        """Asserts that time points are processed while the simulation is running."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=RunningCellNumbers(),
+            project_name="streaming_project",
+            version=VERSION,
+            poll_interval=0.05,
+        )
+        cells, while_running = black_box.run(keep_files=False)
+        np.testing.assert_array_equal(self.expected_cells, cells)
+        self.assertTrue(any(while_running))
+
+    def test_run_early_stopping(self):
+        """Asserts that hopeless simulations are stopped and their results not cached."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=CellNumbersOverTime(),
+            project_name="streaming_project",
+            version=VERSION,
+            poll_interval=0.05,
+            cache=EvaluationCache(folder="cache"),
+        )
+        partial_error = optimization.PartialError(self.expected_cells + 1)
+        early_stopping = optimization.EarlyStopping(partial_error, best_objective=0.0)
+        cells = black_box.run(keep_files=False, early_stopping=early_stopping)
+        self.assertLess(len(cells), len(self.expected_cells))
+        self.assertEqual(0, len(black_box.cache))
+
+    def test_run_early_stopping_not_triggered(self):
+        """Asserts that promising simulations run until the end."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=CellNumbersOverTime(),
+            project_name="streaming_project",
+            version=VERSION,
+            poll_interval=0.05,
+        )
+        partial_error = optimization.PartialError(self.expected_cells)
+        early_stopping = optimization.EarlyStopping(partial_error, best_objective=0.0)
+        cells = black_box.run(keep_files=False, early_stopping=early_stopping)
+        np.testing.assert_array_equal(self.expected_cells, cells)
+
+    def test_run_timeout(self):
+        """Asserts that simulations are killed after the timeout."""
+        black_box = optimization.PhysiCellBlackBox(
+            project_name="slow_project", timeout=0.5
+        )
+        start = time.perf_counter()
+        with self.assertRaises(optimization.SimulationError):
+            black_box.run(keep_files=False)
+        self.assertLess(time.perf_counter() - start, 5.0)
+        self.assertEqual([], list(Path(optimization.SANDBOX_ROOT).iterdir()))
+
+    def test_run_failure_value(self):
+        """Asserts that failed replicates return the failure value."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=get_cell_numbers_over_time,
+            project_name="slow_project",
+            timeout=0.2,
+            failure_value=np.nan,
+        )
+        self.assertTrue(np.isnan(black_box.run(keep_files=False)))
+
+    def test_run_retry(self):
+        """Asserts that failed simulations are run again."""
+        self.black_box.project_command = "./flaky_project"
+        with self.assertRaises(optimization.SimulationError):
+            self.black_box.run(keep_files=False)
+
+        Path("attempts").unlink()
+        self.black_box.max_retries = 1
+        self.black_box.retry_delay = 0.01
+        cells = self.black_box.run(keep_files=False)
+        np.testing.assert_array_equal(self.expected_cells, cells)
+
+    def test_run_batch_failure_journal(self):
+        """Asserts that failures in worker processes are journaled by the main process."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=get_cell_numbers_over_time,
+            project_name="slow_project",
+            timeout=0.2,
+            failure_value=1e6,
+            journal=EvaluationJournal("journal.jsonl"),
+        )
+        self.assertIsNone(pickle.loads(pickle.dumps(black_box)).journal)
+        params_list = [{"run": k} for k in range(2)]
+        self.assertEqual([1e6, 1e6], black_box.run_batch(params_list, max_workers=2))
+
+        journal = EvaluationJournal("journal.jsonl")
+        for params in params_list:
+            entry = journal.lookup(params, replicate=0, failed=True)
+            self.assertIn("timed out", entry["log_tail"])
+
+        black_box.failure_value = None
+        with self.assertRaises(optimization.SimulationError):
+            black_box.run_batch([{"run": 2}], max_workers=2)
+        self.assertIsNotNone(
+            black_box.journal.lookup({"run": 2}, replicate=0, failed=True)
+        )
+
+    def test_run_failure_not_resumed(self):
+        """Asserts that evaluations with failed replicates are run again on resume."""
+        self.black_box.project_command = "./flaky_project"
+        self.black_box.failure_value = 1e6
+        self.black_box.journal = EvaluationJournal("journal.jsonl")
+        self.assertEqual([1e6], self.black_box.run_batch([{}], max_workers=1))
+        entry = self.black_box.journal.lookup({}, replicates=1, failed=True)
+        self.assertEqual(1, entry["telemetry"]["failures"])
+
+        self.black_box.journal = EvaluationJournal("journal.jsonl")
+        cells = self.black_box.run_batch([{}], max_workers=1)[0]
+        np.testing.assert_array_equal(self.expected_cells, cells)
+        self.assertIsNotNone(self.black_box.journal.lookup({}, replicates=1))
+
+    def test_run_output_tail(self):
+        """Asserts that chatty simulations do not block and failures keep their output tail."""
+        black_box = optimization.PhysiCellBlackBox(
+            project_name="chatty_project", timeout=30.0, log_lines=5
+        )
+        with self.assertRaises(optimization.SimulationError) as context:
+            black_box.run(keep_files=False)
+        lines = context.exception.log_tail.splitlines()
+        self.assertEqual(5, len(lines))
+        self.assertEqual("fatal: the simulation diverged", lines[-1])
+
+    def test_run_log_folder(self):
+        """Asserts that the full output of each run is written to its own file."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=get_cell_numbers_over_time,
+            project_name="chatty_project",
+            log_folder="logs",
+            failure_value=1e6,
+            journal=EvaluationJournal("journal.jsonl"),
+        )
+        black_box.run(number_of_replicates=2, keep_files=False)
+        log_files = list(Path("logs").iterdir())
+        self.assertEqual(2, len(log_files))
+        self.assertEqual(40001, len(log_files[0].read_text().splitlines()))
+
+        entry = black_box.journal.lookup(None, replicate=0, failed=True)
+        self.assertEqual(1e6, entry["metrics"])
+        self.assertIn("fatal: the simulation diverged", entry["log_tail"])
+
+    def test_arun_output_tail(self):
+        """Asserts that async runs keep the output tail of failed simulations."""
+        black_box = optimization.PhysiCellBlackBox(
+            project_name="chatty_project", log_lines=1
+        )
+        with self.assertRaises(optimization.SimulationError) as context:
+            asyncio.run(black_box.arun(keep_files=False))
+        self.assertEqual("fatal: the simulation diverged", context.exception.log_tail)
+
+    @unittest.skipIf(os.name != "posix", "resource limits not supported")
+    def test_run_memory_limit(self):
+        """Asserts that simulations exceeding the memory limit fail."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=get_cell_numbers_over_time,
+            project_name="memory_project",
+            memory_limit=2**29,
+            failure_value=1e6,
+        )
+        self.assertEqual(1e6, black_box.run(keep_files=False))
+
+    @unittest.skipIf(os.name != "posix", "resource limits not supported")
+    def test_run_memory_limit_replicates(self):
+        """Asserts that the memory limit is applied to replicates run in threads."""
+        self.black_box.memory_limit = 2**32
+        cells = self.black_box.run(number_of_replicates=2, keep_files=False)
+        np.testing.assert_array_equal([self.expected_cells] * 2, cells)
+
+        black_box = optimization.PhysiCellBlackBox(
+            processor=get_cell_numbers_over_time,
+            project_name="memory_project",
+            memory_limit=2**29,
+            failure_value=1e6,
+        )
+        failures = black_box.run(number_of_replicates=2, keep_files=False)
+        np.testing.assert_array_equal([1e6, 1e6], failures)
+
+    def test_run_executable(self):
+        """Asserts that the black box can call an executable outside the project folder."""
+        Path("bin").mkdir()
+        os.replace("project", "bin/shared_project")
+        black_box = optimization.PhysiCellBlackBox(
+            processor=get_cell_numbers_over_time,
+            version=VERSION,
+            executable="bin/shared_project",
+        )
+        self.assertTrue(Path(black_box.project_command).is_absolute())
+        cells = black_box.run(keep_files=False)
+        np.testing.assert_array_equal(self.expected_cells, cells)
+
+    def test_run_cached(self):
+        """Asserts that cached replicates are not simulated again."""
+        self.black_box.cache = EvaluationCache(folder="cache")
+        first = self.black_box.run(number_of_replicates=2, keep_files=False)
+        self.assertEqual(2, len(self.black_box.cache))
+        second = self.black_box.run(number_of_replicates=2, keep_files=True)
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual([], list(Path("temp").iterdir()))
+
+    def test_run_does_not_use_project_output(self):
+        """Asserts that the runs write their outputs to a sandbox instead of "output"."""
+        self.black_box.run(number_of_replicates=2, keep_files=False)
+        self.assertEqual([], list(Path("output").iterdir()))
+        self.assertEqual([], list(Path(optimization.SANDBOX_ROOT).iterdir()))
+
+    def test_run_journal(self):
+        """Asserts that evaluations in the journal are not run again."""
+        self.black_box.journal = EvaluationJournal("journal.jsonl")
+        first = self.black_box.run(number_of_replicates=2, keep_files=False)
+        self.black_box.journal = EvaluationJournal("journal.jsonl")
+        self.black_box.project_command = "./slow_project"
+        self.black_box.timeout = 0.1
+        second = self.black_box.run(number_of_replicates=2, keep_files=False)
+        np.testing.assert_array_equal(first, second)
+
+    def test_run_batch_resume(self):
+        """Asserts that batch runs only evaluate the parameter sets not in the journal."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+            journal=EvaluationJournal("journal.jsonl"),
+        )
+        black_box.run_batch([{"speed": 1.0}, {"speed": 2.0}], max_workers=2)
+        black_box.journal.record({"speed": 3.0}, 30.0, replicates=1)
+        results = black_box.run_batch(
+            [{"speed": 3.0}, {"speed": 4.0}, {"speed": 1.0}], max_workers=2
+        )
+        self.assertEqual([30.0, 4.0, 1.0], results)
+        self.assertEqual(4, len(EvaluationJournal("journal.jsonl")))
+
+    def test_multilevel_sweep_resume(self):
+        """Asserts that a sweep level is resumed from the journal."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+        )
+        sweep = optimization.MultiLevelSweep(
+            black_box=black_box,
+            target_data=np.array(2.0),
+            n_levels=1,
+            points_dir=2,
+            percentage_dir=0.5,
+            parameters=["speed", "persistence_time"],
+            journal=EvaluationJournal("journal.jsonl"),
+        )
+        x, y = np.array([1.0, 2.0]), np.array([5.0, 10.0])
+        sweep.compute_objective(x, y)
+        self.assertEqual(4, len(sweep.journal))
+
+        black_box.project_command = "./slow_project"
+        black_box.timeout = 0.1
+        resumed = optimization.MultiLevelSweep(
+            black_box=black_box,
+            target_data=np.array(2.0),
+            n_levels=1,
+            points_dir=2,
+            percentage_dir=0.5,
+            parameters=["speed", "persistence_time"],
+            journal=EvaluationJournal("journal.jsonl"),
+        )
+        resumed.compute_objective(x, y)
+        np.testing.assert_array_equal(sweep.results, resumed.results)
+        self.assertEqual((2.0, 5.0), resumed.current_opt_point)
+
+    def test_multilevel_sweep_failed_points(self):
+        """Asserts that failed points (NaN errors) are never chosen."""
+        sweep = optimization.MultiLevelSweep(
+            black_box=self.black_box,
+            target_data=np.array(2.0),
+            n_levels=1,
+            points_dir=2,
+            percentage_dir=0.5,
+            parameters=["speed", "persistence_time"],
+        )
+        sweep.results[0] = [[1.0, np.nan], [0.5, 2.0]]
+        self.assertEqual((1, 0), sweep.get_optimal_idx())
+
+        sweep.results[0] = np.nan
+        with self.assertRaises(ValueError):
+            sweep.get_optimal_idx()
+
+    def test_multilevel_sweep_parallel(self):
+        """Asserts that the grid of a level is run as a parallel batch."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+        )
+        sweep = optimization.MultiLevelSweep(
+            black_box=black_box,
+            target_data=np.array(2.0),
+            n_levels=1,
+            points_dir=3,
+            percentage_dir=0.5,
+            parameters=["speed", "persistence_time"],
+            max_workers=3,
+        )
+        x, y = np.array([1.0, 2.0, 4.0]), np.array([5.0, 10.0, 20.0])
+        sweep.compute_objective(x, y)
+        expected = np.repeat([[1.0], [0.0], [4.0]], 3, axis=1)
+        np.testing.assert_array_equal(expected, sweep.results[0])
+        self.assertEqual((2.0, 5.0), sweep.current_opt_point)
+        self.assertEqual(9, len(black_box.telemetry))
+
+    def test_run_threads(self):
+        """Asserts that concurrent replicates split the cores in their config files."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=read_threads, version=VERSION, total_cores=8
+        )
+        self.assertEqual(6, black_box.run(keep_files=False))
+        threads = black_box.run(number_of_replicates=4, keep_files=False, max_workers=4)
+        np.testing.assert_array_equal([2, 2, 2, 2], threads)
+        params_list = [{"run": 0}, {"run": 1}]
+        self.assertEqual([4, 4], black_box.run_batch(params_list, max_workers=8))
+
+        black_box.omp_num_threads = 3
+        self.assertEqual(3, black_box.run(keep_files=False))
+
+    def test_run_memory_budget(self):
+        """Asserts that only the simulations that fit in the memory budget run together."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=read_threads,
+            version=VERSION,
+            total_cores=8,
+            memory_budget=MemoryBudget(budget=250, safety_factor=1.0),
+        )
+        black_box.telemetry = [{"params": {}, "replicates": 1, "max_rss": 100}]
+        threads = black_box.run(number_of_replicates=4, keep_files=False, max_workers=4)
+        np.testing.assert_array_equal([4, 4, 4, 4], threads)
+
+        # The measured peak RSS of the fake simulations exceeds the budget
+        self.assertGreater(black_box.telemetry[-1]["max_rss"], 250)
+        params_list = [{"run": k} for k in range(3)]
+        self.assertEqual([6, 6, 6], black_box.run_batch(params_list, max_workers=8))
+
+        black_box.telemetry = [{"params": {}, "replicates": 1, "max_rss": 100}]
+        self.assertEqual([4, 4, 4], black_box.run_batch(params_list, max_workers=8))
+
+    def test_run_memory_budget_domain(self):
+        """Asserts that the memory of each evaluation is estimated from its own domain."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=VoxelSizeUpdater(config_path="config/PhysiCell_settings.xml"),
+            processor=read_threads,
+            version=VERSION,
+            total_cores=8,
+            memory_budget=MemoryBudget(
+                budget=10000,
+                safety_factor=1.0,
+                base_memory=0,
+                voxel_memory=1,
+                substance_memory=0,
+            ),
+        )
+        # 2500 voxels fit four times in the budget, 10000 voxels only once
+        threads = black_box.run(
+            {"dx": 20}, number_of_replicates=4, keep_files=False, max_workers=4
+        )
+        np.testing.assert_array_equal([2, 2, 2, 2], threads)
+        black_box.telemetry = []
+        threads = black_box.run(
+            {"dx": 10}, number_of_replicates=4, keep_files=False, max_workers=4
+        )
+        np.testing.assert_array_equal([6, 6, 6, 6], threads)
+
+        black_box.telemetry = []
+        params_list = [{"dx": 10}, {"dx": 20}]
+        self.assertEqual([4, 4], black_box.run_batch(params_list, max_workers=8))
+
+    def test_tune_threads(self):
+        """Asserts that the benchmarked plans use all the cores."""
+        plan = optimization.tune_threads(
+            self.black_box, max_time=10.0, thread_counts=[1, 2, 4], total_cores=4
+        )
+        self.assertIn(plan.threads_per_run, [1, 2, 4])
+        self.assertEqual(4, plan.threads_per_run * plan.concurrent_runs)
+        self.assertGreater(plan.simulations_per_hour, 0)
+        self.assertEqual([], list(Path(optimization.SANDBOX_ROOT).iterdir()))
+
+    def test_clean_outputs(self):
+        """Asserts that the output folder is emptied without calling make."""
+        (Path("output") / "final.xml").touch()
+        optimization.clean_outputs()
+        self.assertEqual(
+            ["empty.txt"], [file.name for file in Path("output").iterdir()]
+        )
+
+    def test_run_batch(self):
+        """Asserts that batch results are returned in the order of the parameter sets."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+        )
+        speeds = [3.0, 1.0, 2.0, 5.0]
+        results = black_box.run_batch(
+            [{"speed": speed} for speed in speeds], max_workers=2
+        )
+        self.assertEqual(speeds, results)
+
+    def test_run_batch_backends(self):
+        """Asserts that all the backends return the same results."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+        )
+        params_list = [{"speed": speed} for speed in [3.0, 1.0, 2.0]]
+        black_box.backend = SerialBackend()
+        self.assertEqual([3.0, 1.0, 2.0], black_box.run_batch(params_list))
+
+        stop = threading.Event()
+        dispatcher = QueueDispatcher("queue", max_jobs=2, poll_interval=0.05)
+        thread = threading.Thread(target=dispatcher.serve, args=(stop,))
+        thread.start()
+        try:
+            black_box.backend = FileQueueBackend("queue", poll_interval=0.05)
+            self.assertEqual([3.0, 1.0, 2.0], black_box.run_batch(params_list))
+        finally:
+            stop.set()
+            thread.join()
+
+    def test_run_batch_distributed(self):
+        """Asserts that batches can be run by workers connected over TCP."""
+        with socket.socket() as free_socket:
+            free_socket.bind(("localhost", 0))
+            address = free_socket.getsockname()
+
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+            backend=DistributedBackend(b"physicool-tests", address),
+        )
+        stop = threading.Event()
+        workers = [
+            threading.Thread(
+                target=run_worker, args=(address, b"physicool-tests", stop, 0.05)
+            )
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            params_list = [{"speed": speed} for speed in [3.0, 1.0, 2.0]]
+            self.assertEqual([3.0, 1.0, 2.0], black_box.run_batch(params_list))
+            self.assertEqual(3, len(black_box.backend.telemetry))
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+    def test_run_common_random_numbers(self):
+        """Asserts that every parameter set uses the same seed for each replicate."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_seed,
+            version=VERSION,
+            random_seed=10,
+            journal=EvaluationJournal("journal.jsonl"),
+        )
+        results = black_box.run_batch(
+            [{"speed": 1.0}, {"speed": 2.0}], number_of_replicates=2, max_workers=1
+        )
+        np.testing.assert_array_equal([[10, 11], [10, 11]], results)
+        self.assertIsNotNone(
+            black_box.journal.lookup({"speed": 1.0}, replicates=2, random_seed=10)
+        )
+        self.assertIsNone(black_box.journal.lookup({"speed": 1.0}, replicates=2))
+
+    def test_run_adaptive(self):
+        """Asserts that replicates are added until the standard error is below the tolerance."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=read_seed,
+            version=VERSION,
+            random_seed=0,
+            journal=EvaluationJournal("journal.jsonl"),
+        )
+        statistics = black_box.run_adaptive(
+            tolerance=0.0, max_replicates=5, wave_size=2, max_workers=2
+        )
+        self.assertEqual(5, statistics.number_of_replicates)
+        self.assertEqual(2.0, statistics.mean)
+        self.assertEqual(2.5, statistics.variance)
+
+        black_box.project_command = "./slow_project"
+        black_box.timeout = 0.1
+        resumed = black_box.run_adaptive(
+            tolerance=0.0, max_replicates=5, wave_size=2, max_workers=2
+        )
+        self.assertEqual(statistics, resumed)
+
+    def test_run_adaptive_stable_metrics(self):
+        """Asserts that no replicates are added when the metrics do not vary."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=read_speed, version=VERSION, random_seed=0
+        )
+        statistics = black_box.run_adaptive(tolerance=0.1, max_replicates=5)
+        self.assertEqual(2, statistics.number_of_replicates)
+        self.assertEqual(0.0, statistics.standard_error)
+
+    def test_run_telemetry(self):
+        """Asserts that the phases and resources of each evaluation are recorded."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+            journal=EvaluationJournal("journal.jsonl"),
+        )
+        black_box.run({"speed": 1.0}, number_of_replicates=2, keep_files=True)
+        black_box.run_batch([{"speed": 2.0}, {"speed": 3.0}], max_workers=2)
+
+        table = black_box.get_telemetry()
+        self.assertEqual([1.0, 2.0, 3.0], sorted(table["params.speed"]))
+        self.assertEqual([2, 1, 1], table["replicates"].tolist())
+        for phase in ["update", "simulate", "process", "cleanup", "duration"]:
+            self.assertTrue((table[phase] > 0.0).all())
+        self.assertGreater(table["retain"][0], 0.0)
+        self.assertTrue((table["output_bytes"] > 0).all())
+
+        entry = black_box.journal.lookup({"speed": 2.0}, replicates=1)
+        self.assertGreater(entry["telemetry"]["simulate"], 0.0)
+
+    def test_run_batch_longest_first(self):
+        """Asserts that batches start with the evaluations expected to take longest."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=record_speed,
+            version=VERSION,
+            cost_model=CostModel(),
+        )
+        black_box.telemetry = [
+            {"params": {"speed": 1.0}, "replicates": 1, "duration": 10.0},
+            {"params": {"speed": 2.0}, "replicates": 1, "duration": 20.0},
+        ]
+        params_list = [{"speed": speed} for speed in [1.0, 3.0, 2.0]]
+        PROCESSED_SPEEDS.clear()
+        self.assertEqual(
+            [1.0, 3.0, 2.0], black_box.run_batch(params_list, max_workers=1)
+        )
+        self.assertEqual([3.0, 2.0, 1.0], PROCESSED_SPEEDS)
+
+    def test_run_batch_duplicates(self):
+        """Asserts that identical parameter sets of a batch are simulated once."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=record_speed,
+            version=VERSION,
+        )
+        params_list = [{"speed": speed} for speed in [1.0, 2.0, 1.0, 1.0]]
+        PROCESSED_SPEEDS.clear()
+        self.assertEqual(
+            [1.0, 2.0, 1.0, 1.0], black_box.run_batch(params_list, max_workers=1)
+        )
+        self.assertEqual([1.0, 2.0], PROCESSED_SPEEDS)
+        self.assertEqual(2, len(black_box.telemetry))
+
+        black_box.run_batch(params_list, keep_files=True, max_workers=1)
+        kept_files = [
+            sorted(path.name for path in Path(f"temp/evaluation{k}").iterdir())
+            for k in range(4)
+        ]
+        self.assertNotEqual([], kept_files[0])
+        self.assertEqual(kept_files[0], kept_files[2])
+        self.assertEqual(kept_files[0], kept_files[3])
+
+    def test_stream_batch(self):
+        """Asserts that the results are yielded with their parameters and telemetry."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+        )
+        params_list = [{"speed": speed} for speed in [1.0, 2.0, 3.0]]
+        results = list(black_box.stream_batch(params_list, max_workers=2))
+        self.assertEqual(
+            sorted([1.0, 2.0, 3.0]), sorted(metrics for _, metrics, _ in results)
+        )
+        for params, metrics, telemetry in results:
+            self.assertEqual(params["speed"], metrics)
+            self.assertGreater(telemetry["simulate"], 0.0)
+
+    def test_stream_batch_indexed(self):
+        """Asserts that the results are yielded with the index of their parameters."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+        )
+        params_list = [{"speed": speed} for speed in [1.0, 2.0, 3.0]]
+        stream = black_box.stream_batch(params_list, max_workers=2)
+        results = list(stream.iter_indexed())
+        self.assertEqual([0, 1, 2], sorted(k for k, _, _, _ in results))
+        for k, params, metrics, _ in results:
+            self.assertIs(params_list[k], params)
+            self.assertEqual(params["speed"], metrics)
+
+    def test_stream_batch_cancel(self):
+        """Asserts that no new evaluations start after the stream is cancelled."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=record_speed,
+            version=VERSION,
+        )
+        params_list = [{"speed": speed} for speed in [1.0, 2.0, 3.0]]
+        PROCESSED_SPEEDS.clear()
+        stream = black_box.stream_batch(params_list, max_workers=1)
+        results = []
+        for params, metrics, _ in stream:
+            results.append(metrics)
+            stream.cancel()
+
+        self.assertEqual([1.0], results)
+        self.assertEqual([1.0], PROCESSED_SPEEDS)
+        self.assertEqual(1, len(black_box.telemetry))
+
+    def test_stream_batch_cancel_queue(self):
+        """Asserts that cancelled evaluations are removed from a batch scheduler queue."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+            backend=FileQueueBackend("queue", poll_interval=0.05),
+        )
+        params_list = [{"speed": speed} for speed in [1.0, 2.0, 3.0]]
+        stop = threading.Event()
+        # The dispatcher starts a single job, and only checks the queue again
+        # long after it has finished
+        dispatcher = QueueDispatcher("queue", max_jobs=1, poll_interval=1.0)
+        thread = threading.Thread(target=dispatcher.serve, args=(stop,))
+        thread.start()
+        try:
+            stream = black_box.stream_batch(params_list)
+            results = []
+            for params, metrics, _ in stream:
+                results.append(metrics)
+                stream.cancel()
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertEqual(1, len(results))
+        self.assertEqual(1, len(black_box.telemetry))
+        self.assertEqual([], list(Path("queue").iterdir()))
+
+    def test_run_batch_callback(self):
+        """Asserts that the callback is called as each evaluation completes."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+            journal=EvaluationJournal("journal.jsonl"),
+        )
+        black_box.run_batch([{"speed": 2.0}], max_workers=1)
+        completed = []
+        params_list = [{"speed": speed} for speed in [1.0, 2.0, 1.0]]
+        results = black_box.run_batch(
+            params_list,
+            max_workers=1,
+            callback=lambda params, metrics, _: completed.append((params, metrics)),
+        )
+        self.assertEqual([1.0, 2.0, 1.0], results)
+        expected = [({"speed": 2.0}, 2.0), ({"speed": 1.0}, 1.0), ({"speed": 1.0}, 1.0)]
+        self.assertEqual(expected, completed)
+
+    def test_run_batch_longest_first_features(self):
+        """Asserts that the costs are predicted from the rendered config files."""
+        black_box = optimization.PhysiCellBlackBox(
+            updater=MaxTimeUpdater(config_path="config/PhysiCell_settings.xml"),
+            processor=record_max_time,
+            version=VERSION,
+            cost_model=CostModel(),
+        )
+        black_box.telemetry = [
+            {
+                "params": {},
+                "replicates": 1,
+                "duration": 1.0,
+                "features": {"max_time": 100.0},
+            },
+            {
+                "params": {},
+                "replicates": 1,
+                "duration": 2.0,
+                "features": {"max_time": 200.0},
+            },
+        ]
+        params_list = [{"max_time": max_time} for max_time in [50.0, 400.0, 200.0]]
+        PROCESSED_MAX_TIMES.clear()
+        black_box.run_batch(params_list, max_workers=1)
+        self.assertEqual([400.0, 200.0, 50.0], PROCESSED_MAX_TIMES)
+        features = [record["features"] for record in black_box.telemetry[2:]]
+        self.assertEqual([400.0, 200.0, 50.0], [f["max_time"] for f in features])
+
+    def test_run_warm_start(self):
+        """Asserts that the simulations only run after the snapshot."""
+        warm_start = WarmStart(DATA_PATH / "output", timestep=3, version=VERSION)
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_initial_conditions,
+            version=VERSION,
+            warm_start=warm_start,
+        )
+        results = black_box.run_batch([{"speed": 2.0}], max_workers=1)
+        self.assertEqual([(440.0, warm_start.cells_file)], results)
+        self.assertEqual(620.0, ConfigFileParser().read_overall_params().max_time)
+        self.assertEqual(440.0, black_box.telemetry[0]["features"]["max_time"])
+
+    def test_run_keeps_project_config(self):
+        """Asserts that runs pass a rendered config instead of updating the project config."""
+        config = Path("config/PhysiCell_settings.xml").read_text()
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+        )
+        self.assertEqual(4.0, black_box.run({"speed": 4.0}, keep_files=False))
+        self.assertEqual(config, Path("config/PhysiCell_settings.xml").read_text())
+
+    def test_run_batch_keeps_project_config(self):
+        """Asserts that batch runs do not modify the project config file."""
+        config = Path("config/PhysiCell_settings.xml").read_text()
+        black_box = optimization.PhysiCellBlackBox(
+            updater=CellUpdater(
+                config_path="config/PhysiCell_settings.xml",
+                updater_function=update_motility_values,
+            ),
+            processor=read_speed,
+            version=VERSION,
+        )
+        black_box.run_batch([{"speed": 4.0}], keep_files=True, max_workers=1)
+        self.assertEqual(config, Path("config/PhysiCell_settings.xml").read_text())
+        self.assertTrue(Path("temp/evaluation0/PhysiCell_settings.xml").is_file())
+
+    def tearDown(self) -> None:
+        """Moves back to the original folder and deletes the fake project."""
+        os.chdir(self.cwd)
+        self.project_dir.cleanup()
+
+
+class AsyncBlackBoxTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        """Creates a fake PhysiCell project and moves into its folder."""
+        self.expected_cells = get_cell_numbers_over_time(
+            DATA_PATH / "output", version=VERSION
+        )
+        self.cwd = os.getcwd()
+        self.project_dir = TemporaryDirectory()
+        create_fake_project(Path(self.project_dir.name))
+        os.chdir(self.project_dir.name)
+
+    async def test_arun(self):
+        """Asserts that arun returns the same metrics as run."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=get_cell_numbers_over_time, version=VERSION
+        )
+        semaphore = asyncio.Semaphore(2)
+        results = await asyncio.gather(
+            *[
+                black_box.arun(
+                    number_of_replicates=2, keep_files=False, semaphore=semaphore
+                )
+                for _ in range(3)
+            ]
+        )
+        for cells in results:
+            np.testing.assert_array_equal(np.asarray([self.expected_cells] * 2), cells)
+
+    async def test_arun_threads(self):
+        """Asserts that concurrent replicates run with arun split the cores."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=read_threads, version=VERSION, total_cores=8
+        )
+        self.assertEqual(6, await black_box.arun(keep_files=False))
+        threads = await black_box.arun(number_of_replicates=4, keep_files=False)
+        np.testing.assert_array_equal([2, 2, 2, 2], threads)
+        semaphore = asyncio.Semaphore(2)
+        results = await asyncio.gather(
+            *[
+                black_box.arun(
+                    {"run": k},
+                    keep_files=False,
+                    semaphore=semaphore,
+                    concurrent_runs=2,
+                )
+                for k in range(2)
+            ]
+        )
+        self.assertEqual([4, 4], results)
+
+        black_box.omp_num_threads = 3
+        self.assertEqual(3, await black_box.arun(keep_files=False))
+
+    async def test_arun_coroutine_processor(self):
+        """Asserts that coroutine processors can be used with arun and run."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=aget_cell_numbers_over_time, version=VERSION
+        )
+        cells = await black_box.arun(number_of_replicates=2, keep_files=False)
+        np.testing.assert_array_equal([self.expected_cells] * 2, cells)
+        cells = black_box.run(keep_files=False)
+        np.testing.assert_array_equal(self.expected_cells, cells)
+
+    async def test_arun_streaming(self):
+        """Asserts that streaming processors can be used with arun."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=CellNumbersOverTime(),
+            project_name="streaming_project",
+            version=VERSION,
+            poll_interval=0.05,
+        )
+        cells = await black_box.arun(keep_files=False)
+        np.testing.assert_array_equal(self.expected_cells, cells)
+
+    async def test_arun_timeout(self):
+        """Asserts that simulations run with arun are killed after the timeout."""
+        black_box = optimization.PhysiCellBlackBox(
+            processor=get_cell_numbers_over_time,
+            project_name="slow_project",
+            timeout=0.5,
+            failure_value=np.nan,
+        )
+        cells = await black_box.arun(number_of_replicates=2, keep_files=False)
+        self.assertTrue(np.isnan(cells).all())
+
+    async def test_arun_cancel(self):
+        """Asserts that cancelling arun kills the simulation and removes the sandbox."""
+        black_box = optimization.PhysiCellBlackBox(project_name="slow_project")
+        task = asyncio.create_task(black_box.arun(keep_files=False))
+        await asyncio.sleep(0.5)
+        start = time.perf_counter()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertLess(time.perf_counter() - start, 5.0)
+        self.assertEqual([], list(Path(optimization.SANDBOX_ROOT).iterdir()))
+
+    def tearDown(self) -> None:
+        """Moves back to the original folder and deletes the fake project."""
+        os.chdir(self.cwd)
+        self.project_dir.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -47,5 +47,46 @@ class TestOutputProcessor(unittest.TestCase):
         np.testing.assert_array_equal(np.asarray([19, 19]), number_of_cells)
 
 
+class TestStreamingProcessor(unittest.TestCase):
+    def test_streaming_number_of_cells(self):
+        """Asserts that the streaming processor matches the regular processing function."""
+        expected_cells = processing.get_cell_numbers_over_time(
+            output_path=DATA_PATH / "output", version="1.9.1"
+        )
+        number_of_cells = processing.CellNumbersOverTime()(
+            output_path=DATA_PATH / "output", version="1.9.1"
+        )
+        np.testing.assert_array_equal(expected_cells, number_of_cells)
+
+    def test_timestep_complete_while_running(self):
+        """Asserts that a time point is only complete once the next one is being written."""
+        output_path = DATA_PATH / "output"
+        self.assertTrue(
+            processing.is_timestep_complete(output_path, 5, "1.9.1", finished=False)
+        )
+        self.assertFalse(
+            processing.is_timestep_complete(output_path, 6, "1.9.1", finished=False)
+        )
+        self.assertTrue(
+            processing.is_timestep_complete(output_path, 6, "1.9.1", finished=True)
+        )
+        self.assertFalse(
+            processing.is_timestep_complete(output_path, 7, "1.9.1", finished=True)
+        )
+
+    def test_output_stream(self):
+        """Asserts that the output stream feeds every completed time point once."""
+        stream = processing.OutputStream(
+            processor=processing.CellNumbersOverTime(),
+            output_path=DATA_PATH / "output",
+            version="1.9.1",
+        )
+        stream.poll()
+        self.assertEqual(6, stream.next_timestep)
+        stream.poll(finished=True)
+        stream.poll(finished=True)
+        self.assertEqual(7, len(stream.processor.result()))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,92 @@
+"""Script to test the sandbox module of the PhysiCOOL package."""
+import tarfile
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from physicool import sandbox
+from physicool.config import ConfigFileParser
+from configdata import CONFIG_PATH
+
+
+class RunSandboxTest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Creates a temporary folder to be used as the sandbox root."""
+        self.root = TemporaryDirectory()
+
+    def test_sandbox_config_points_to_sandbox(self):
+        """Asserts that the sandbox config file writes the outputs inside the sandbox."""
+        with sandbox.RunSandbox(CONFIG_PATH, root=self.root.name) as run:
+            parser = ConfigFileParser(run.config)
+            self.assertEqual(run.output_folder, parser.read_output_folder())
+            self.assertTrue(run.output_folder.is_dir())
+            self.assertEqual(run.folder, run.output_folder.parent)
+
+    def test_sandbox_random_seed(self):
+        """Asserts that the random seed of the run is written to the sandbox config file."""
+        with sandbox.RunSandbox(CONFIG_PATH, root=self.root.name, random_seed=7) as run:
+            self.assertEqual(7, ConfigFileParser(run.config).read_random_seed())
+
+    def test_sandbox_is_removed(self):
+        """Asserts that the sandbox folder is deleted when leaving the with block."""
+        with sandbox.RunSandbox(CONFIG_PATH, root=self.root.name) as run:
+            (run.output_folder / "output00000000.xml").touch()
+        self.assertFalse(run.folder.exists())
+
+    def test_sandboxes_are_isolated(self):
+        """Asserts that two sandboxes do not share their folders."""
+        first = sandbox.RunSandbox(CONFIG_PATH, root=self.root.name)
+        second = sandbox.RunSandbox(CONFIG_PATH, root=self.root.name)
+        self.assertNotEqual(first.output_folder, second.output_folder)
+        first.cleanup()
+        second.cleanup()
+
+    def test_retain_outputs_rename(self):
+        """Asserts that the output folder is renamed when the destination is new."""
+        source = Path(self.root.name) / "source"
+        source.mkdir()
+        (source / "final.xml").write_text("new")
+        inode = (source / "final.xml").stat().st_ino
+
+        destination = Path(self.root.name) / "temp/replicate0"
+        sandbox.retain_outputs(source, destination)
+        self.assertFalse(source.exists())
+        self.assertEqual(inode, (destination / "final.xml").stat().st_ino)
+
+    def test_retain_outputs_existing_destination(self):
+        """Asserts that files are linked into existing folders, replacing old files."""
+        source = Path(self.root.name) / "source"
+        destination = Path(self.root.name) / "destination"
+        source.mkdir()
+        destination.mkdir()
+        (source / "final.xml").write_text("new")
+        (destination / "final.xml").write_text("old")
+        (destination / "other.xml").write_text("other")
+
+        sandbox.retain_outputs(source, destination)
+        self.assertEqual("new", (destination / "final.xml").read_text())
+        self.assertEqual("other", (destination / "other.xml").read_text())
+        self.assertEqual(
+            (source / "final.xml").stat().st_ino,
+            (destination / "final.xml").stat().st_ino,
+        )
+
+    def test_retain_outputs_archive(self):
+        """Asserts that the outputs are packed into an archive if a format is passed."""
+        source = Path(self.root.name) / "source"
+        source.mkdir()
+        (source / "final.xml").write_text("new")
+
+        destination = Path(self.root.name) / "replicate0"
+        archive = sandbox.retain_outputs(source, destination, archive_format="gztar")
+        self.assertEqual(destination / "output.tar.gz", archive)
+        with tarfile.open(archive) as file:
+            self.assertIn("./final.xml", file.getnames())
+
+    def tearDown(self) -> None:
+        """Deletes the sandbox root."""
+        self.root.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Script to test the scheduling module of the PhysiCOOL package."""
+import unittest
+
+import numpy as np
+
+from physicool import scheduling
+from configdata import CONFIG_PATH
+
+
+def create_record(speed: float, duration: float = None, replicates: int = 1):
+    """Returns a telemetry record of an evaluation."""
+    record = {"params": {"speed": speed}, "replicates": replicates}
+    if duration is not None:
+        record["duration"] = duration
+    return record
+
+
+class ConfigFeaturesTest(unittest.TestCase):
+    def test_get_voxel_count(self):
+        """Asserts that the voxels of a 2D domain are counted in a single plane."""
+        self.assertEqual(2500, scheduling.get_voxel_count(CONFIG_PATH))
+
+    def test_get_config_features(self):
+        """Asserts that the simulated time, voxels and substances are read."""
+        features = scheduling.get_config_features(CONFIG_PATH)
+        expected = {"max_time": 620.0, "voxels": 2500.0, "substances": 1.0}
+        self.assertEqual(expected, features)
+
+
+class CostModelTest(unittest.TestCase):
+    def test_predict(self):
+        """Asserts that the durations are fitted as a linear function of the parameters."""
+        model = scheduling.CostModel()
+        model.fit([create_record(1.0, 3.0), create_record(2.0, 5.0)])
+        costs = model.predict([create_record(3.0), create_record(3.0, replicates=2)])
+        np.testing.assert_allclose([7.0, 14.0], costs)
+
+    def test_predict_without_telemetry(self):
+        """Asserts that all the evaluations have the same cost before fitting."""
+        model = scheduling.CostModel()
+        model.fit([create_record(1.0, 3.0)])
+        self.assertEqual([0, 1, 2], model.order([create_record(v) for v in range(3)]))
+
+    def test_order(self):
+        """Asserts that the evaluations are ordered from the longest to the shortest."""
+        model = scheduling.CostModel()
+        model.fit([create_record(1.0, 3.0), create_record(2.0, 5.0)])
+        records = [create_record(speed) for speed in [1.0, 4.0, 2.0]]
+        self.assertEqual([1, 2, 0], model.order(records))
+
+
+class MemoryBudgetTest(unittest.TestCase):
+    def test_estimate_from_config(self):
+        """Asserts that the memory is estimated from the mesh before any measurement."""
+        budget = scheduling.MemoryBudget(budget=2**30, safety_factor=1.0)
+        self.assertEqual(budget.base_memory, budget.estimate())
+        expected = budget.base_memory + 2500 * (256 + 128)
+        self.assertEqual(expected, budget.estimate(CONFIG_PATH))
+
+    def test_estimate_from_telemetry(self):
+        """Asserts that the memory is learned from the largest peak RSS."""
+        budget = scheduling.MemoryBudget(budget=2**30, safety_factor=2.0)
+        budget.fit([{"max_rss": 100}, {"max_rss": 300}, {"max_rss": 0}, {}])
+        self.assertEqual(600, budget.estimate(CONFIG_PATH))
+        budget.fit([{"max_rss": 0}])
+        self.assertIsNone(budget.peak_rss)
+
+    def test_estimate_from_features(self):
+        """Asserts that the learned memory is scaled to the mesh of each config file."""
+        budget = scheduling.MemoryBudget(
+            budget=2**30, safety_factor=1.0, base_memory=100, voxel_memory=1
+        )
+        small = {"voxels": 100.0, "substances": 0.0}
+        large = {"voxels": 300.0, "substances": 0.0}
+        budget.fit([{"max_rss": 400, "features": small}])
+        self.assertEqual(400, budget.estimate(features=small))
+        self.assertEqual(800, budget.estimate(features=large))
+        self.assertEqual(400, budget.estimate())
+
+    def test_admits(self):
+        """Asserts that simulations start while the budget is not exceeded."""
+        budget = scheduling.MemoryBudget(budget=250)
+        self.assertEqual(2, budget.get_concurrent_runs(100))
+        self.assertEqual(1, budget.get_concurrent_runs(1000))
+        self.assertTrue(budget.admits(100, 100))
+        self.assertFalse(budget.admits(100, 200))
+        self.assertTrue(budget.admits(1000, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
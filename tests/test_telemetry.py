@@ -0,0 +1,113 @@
+"""Script to test the telemetry module of the PhysiCOOL package."""
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from physicool import telemetry
+
+
+class EvaluationTelemetryTest(unittest.TestCase):
+    def test_phase(self):
+        """Asserts that the durations of a phase are added up."""
+        evaluation = telemetry.EvaluationTelemetry()
+        with evaluation.phase("process"):
+            pass
+        first = evaluation.process
+        with evaluation.phase("process"):
+            pass
+        self.assertGreater(evaluation.process, first)
+        self.assertEqual(0.0, evaluation.simulate)
+
+    def test_add_process(self):
+        """Asserts that CPU times are added up and the largest peak RSS is kept."""
+        evaluation = telemetry.EvaluationTelemetry()
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        evaluation.add_process(telemetry.ProcessWaiter(process, 1.0, 300))
+        evaluation.add_process(telemetry.ProcessWaiter(process, 2.0, 100))
+        self.assertEqual(3.0, evaluation.cpu_time)
+        self.assertEqual(300, evaluation.max_rss)
+
+    def test_to_dict(self):
+        """Asserts that only the measurements are returned."""
+        evaluation = telemetry.EvaluationTelemetry(output_bytes=10)
+        measurements = evaluation.to_dict()
+        self.assertEqual(10, measurements["output_bytes"])
+        self.assertNotIn("_lock", measurements)
+        self.assertEqual(10, len(measurements))
+
+    @unittest.skipUnless(hasattr(os, "wait4"), "wait4 not supported")
+    def test_wait(self):
+        """Asserts that the resource usage of each process is measured on its own."""
+        large = telemetry.ProcessWaiter(
+            subprocess.Popen(
+                [sys.executable, "-c", "x = bytearray(200 * 2**20); sum(range(10**6))"]
+            )
+        )
+        large.wait()
+        self.assertEqual(0, large.process.returncode)
+        self.assertGreater(large.cpu_time, 0.0)
+        self.assertGreater(large.max_rss, 200 * 2**20)
+
+        small = telemetry.ProcessWaiter(
+            subprocess.Popen([sys.executable, "-c", "pass"])
+        )
+        small.wait()
+        self.assertLess(small.max_rss, 100 * 2**20)
+
+    @unittest.skipUnless(hasattr(os, "wait4"), "wait4 not supported")
+    def test_wait_return_code(self):
+        """Asserts that the return code is decoded as Popen does."""
+        failed = telemetry.ProcessWaiter(
+            subprocess.Popen([sys.executable, "-c", "raise SystemExit(3)"])
+        )
+        failed.wait()
+        self.assertEqual(3, failed.process.returncode)
+
+        killed = telemetry.ProcessWaiter(
+            subprocess.Popen([sys.executable, "-c", "input()"], stdin=subprocess.PIPE)
+        )
+        killed.process.kill()
+        killed.wait()
+        self.assertEqual(-9, killed.process.returncode)
+        killed.process.stdin.close()
+
+    def test_wait_timeout(self):
+        """Asserts that the peak RSS is kept when the wait times out."""
+        waiter = telemetry.ProcessWaiter(
+            subprocess.Popen(
+                [sys.executable, "-c", "x = bytearray(200 * 2**20); input()"],
+                stdin=subprocess.PIPE,
+            )
+        )
+        with self.assertRaises(subprocess.TimeoutExpired):
+            waiter.wait(timeout=1.0)
+        waiter.process.stdin.close()
+        waiter.wait()
+        self.assertIsNotNone(waiter.process.returncode)
+        self.assertGreater(waiter.max_rss, 200 * 2**20)
+
+    def test_get_folder_size(self):
+        """Asserts that the size of the files in nested folders is added up."""
+        with TemporaryDirectory() as folder:
+            (Path(folder) / "output").mkdir()
+            (Path(folder) / "output/cells.mat").write_bytes(b"x" * 100)
+            (Path(folder) / "settings.xml").write_bytes(b"x" * 20)
+            self.assertEqual(120, telemetry.get_folder_size(folder))
+
+    def test_create_telemetry_table(self):
+        """Asserts that the parameters are expanded into columns."""
+        records = [
+            {"params": {"speed": 1.0}, "simulate": 2.0},
+            {"params": {"speed": 2.0}, "simulate": 3.0},
+        ]
+        table = telemetry.create_telemetry_table(records)
+        self.assertEqual([1.0, 2.0], table["params.speed"].tolist())
+        self.assertEqual([2.0, 3.0], table["simulate"].tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
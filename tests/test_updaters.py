@@ -1,8 +1,13 @@
 import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
 
+from physicool.config import ConfigFileParser
 from physicool.datatypes import *
 from physicool import updaters
 
+CONFIG_PATH = Path(__file__).resolve().parent / "data/settings_read_only.xml"
+
 CELL_DATA = {
     "name": "default",
     "cycle": {
@@ -161,5 +166,36 @@ class UpdaterFunctionsTest(unittest.TestCase):
         self.assertEqual(EXPECTED_MOTILITY_2, data.motility)
 
 
+class ParamsUpdaterTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = TemporaryDirectory()
+        self.updater = updaters.CellUpdater(
+            config_path=CONFIG_PATH, updater_function=updaters.update_motility_values
+        )
+
+    def test_render(self):
+        """Asserts that the rendered config has the new values and the original does not."""
+        original = CONFIG_PATH.read_text()
+        output_path = self.updater.render(
+            {"speed": 3.0}, Path(self.folder.name) / "settings.xml"
+        )
+        speed = ConfigFileParser(output_path).read_cell_data("default").motility.speed
+        self.assertEqual(3.0, speed)
+        self.assertEqual(original, CONFIG_PATH.read_text())
+
+    def test_render_is_fresh(self):
+        """Asserts that each rendered config starts from the original config file."""
+        self.updater.render({"speed": 3.0}, Path(self.folder.name) / "first.xml")
+        output_path = self.updater.render(
+            {"persistence_time": 7.0}, Path(self.folder.name) / "second.xml"
+        )
+        motility = ConfigFileParser(output_path).read_cell_data("default").motility
+        self.assertEqual(7.0, motility.persistence_time)
+        self.assertEqual(1.0, motility.speed)
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+
 if __name__ == "__main__":
     unittest.main()
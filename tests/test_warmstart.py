@@ -0,0 +1,71 @@
+"""Script to test the warmstart module of the PhysiCOOL package."""
+import os
+import unittest
+from pathlib import Path
+from shutil import copyfile
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from physicool.config import ConfigFileParser
+from physicool.processing import get_cell_data
+from physicool.warmstart import WarmStart, read_snapshot_time, write_initial_cells
+
+DATA_PATH = Path(__file__).resolve().parent / "data"
+VERSION = "1.9.1"
+
+
+class WarmStartTest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Creates a folder with a copy of the config file."""
+        self.cwd = os.getcwd()
+        self.folder = TemporaryDirectory()
+        os.chdir(self.folder.name)
+        copyfile(DATA_PATH / "settings.xml", "settings.xml")
+
+    def test_read_snapshot_time(self):
+        """Asserts that the time of an output time point is read from its XML file."""
+        self.assertEqual(180.0, read_snapshot_time(DATA_PATH / "output", 3))
+
+    def test_write_initial_cells(self):
+        """Asserts that the cells of a time point are written as x, y, z and type."""
+        path = write_initial_cells(DATA_PATH / "output", 3, "cells.csv", VERSION)
+        cells = get_cell_data(
+            3, ["position_x", "cell_type"], DATA_PATH / "output", VERSION
+        )
+        written = np.loadtxt(path, delimiter=",", ndmin=2)
+        self.assertEqual((len(cells), 4), written.shape)
+        np.testing.assert_array_equal(cells["position_x"], written[:, 0])
+        np.testing.assert_array_equal(cells["cell_type"], written[:, 3])
+
+    def test_apply(self):
+        """Asserts that the config file starts from the snapshot files and time."""
+        warm_start = WarmStart(DATA_PATH / "output", 3, VERSION, folder="warm")
+        warm_start.apply("settings.xml")
+
+        parser = ConfigFileParser(Path("settings.xml"))
+        self.assertEqual(440.0, parser.read_overall_params().max_time)
+        self.assertEqual(warm_start.cells_file, parser.read_initial_cells())
+        self.assertEqual(
+            warm_start.microenvironment_file, parser.read_me_initial_condition()
+        )
+        self.assertTrue(warm_start.microenvironment_file.is_file())
+
+    def test_apply_after_max_time(self):
+        """Asserts that snapshots after the end of the simulation are rejected."""
+        parser = ConfigFileParser(Path("settings.xml"))
+        overall = parser.read_overall_params()
+        overall.max_time = 120
+        parser.write_overall_params(overall)
+
+        warm_start = WarmStart(DATA_PATH / "output", 3, VERSION, microenvironment=False)
+        self.assertIsNone(warm_start.microenvironment_file)
+        self.assertRaises(ValueError, warm_start.apply, "settings.xml")
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.folder.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -30,6 +30,58 @@ class ReadDataTest(unittest.TestCase):
         """Asserts that an Exception is raised when the wrong path is passed."""
         self.assertRaises(ValueError, pcxml.parse_overall, self.tree, "domain")
 
+    def test_parse_save_folder(self):
+        """Asserts that the <save> output folder is correctly read."""
+        folder = pcxml.parse_save_folder(tree=self.tree, path="save")
+        self.assertEqual("output", folder)
+
+    def test_parse_save_folder_wrong_path(self):
+        """Asserts that an Exception is raised when the wrong path is passed."""
+        self.assertRaises(ValueError, pcxml.parse_save_folder, self.tree, "domain")
+
+    def test_parse_omp_num_threads(self):
+        """Asserts that the <parallel> number of threads is correctly read."""
+        threads = pcxml.parse_omp_num_threads(tree=self.tree, path="parallel")
+        self.assertEqual(6, threads)
+
+    def test_parse_omp_num_threads_wrong_path(self):
+        """Asserts that an Exception is raised when the wrong path is passed."""
+        self.assertRaises(ValueError, pcxml.parse_omp_num_threads, self.tree, "save")
+
+    def test_parse_random_seed(self):
+        """Asserts that the <user_parameters> random seed is correctly read."""
+        seed = pcxml.parse_random_seed(tree=self.tree, path="user_parameters")
+        self.assertEqual(0, seed)
+
+    def test_parse_random_seed_wrong_path(self):
+        """Asserts that an Exception is raised when the wrong path is passed."""
+        self.assertRaises(ValueError, pcxml.parse_random_seed, self.tree, "save")
+
+    def test_parse_cell_positions(self):
+        """Asserts that the <initial_conditions> cell positions are correctly read."""
+        cell_positions = pcxml.parse_cell_positions(
+            tree=self.tree, path="initial_conditions/cell_positions"
+        )
+        expected = {
+            "enabled": False,
+            "type": "csv",
+            "folder": "./config",
+            "filename": "cells.csv",
+        }
+        self.assertEqual(expected, cell_positions)
+
+    def test_parse_me_initial_condition(self):
+        """Asserts that the microenvironment initial condition is correctly read."""
+        initial_condition = pcxml.parse_me_initial_condition(
+            tree=self.tree, path="microenvironment_setup/options/initial_condition"
+        )
+        expected = {
+            "enabled": False,
+            "type": "matlab",
+            "filename": "./config/initial.mat",
+        }
+        self.assertEqual(expected, initial_condition)
+
     def test_parse_substance(self):
         """Asserts that a microenvironment <variable> is correctly read."""
         data = pcxml.parse_substance(
@@ -277,6 +329,56 @@ class WriteDataTest(unittest.TestCase):
             ValueError, pcxml.write_overall, EXPECTED_OVERALL_WRITE, self.tree, "domain"
         )
 
+    def test_write_save_folder(self):
+        """Asserts that the <save> output folder is correctly written."""
+        pcxml.write_save_folder(new_value="replicate0", tree=self.tree, path="save")
+        self.tree.write(WRITE_PATH)
+
+        new_tree = ElementTree.parse(WRITE_PATH)
+        folder = pcxml.parse_save_folder(tree=new_tree, path="save")
+        self.assertEqual("replicate0", folder)
+
+    def test_write_omp_num_threads(self):
+        """Asserts that the <parallel> number of threads is correctly written."""
+        pcxml.write_omp_num_threads(new_value=2, tree=self.tree, path="parallel")
+        self.tree.write(WRITE_PATH)
+
+        new_tree = ElementTree.parse(WRITE_PATH)
+        threads = pcxml.parse_omp_num_threads(tree=new_tree, path="parallel")
+        self.assertEqual(2, threads)
+
+    def test_write_random_seed(self):
+        """Asserts that the <user_parameters> random seed is correctly written."""
+        pcxml.write_random_seed(new_value=42, tree=self.tree, path="user_parameters")
+        self.tree.write(WRITE_PATH)
+
+        new_tree = ElementTree.parse(WRITE_PATH)
+        seed = pcxml.parse_random_seed(tree=new_tree, path="user_parameters")
+        self.assertEqual(42, seed)
+
+    def test_write_cell_positions(self):
+        """Asserts that the <initial_conditions> cell positions are correctly written."""
+        pcxml.write_cell_positions(
+            new_values={"enabled": True, "folder": "warm_start"},
+            tree=self.tree,
+            path="initial_conditions/cell_positions",
+        )
+        self.tree.write(WRITE_PATH)
+
+        new_tree = ElementTree.parse(WRITE_PATH)
+        cell_positions = pcxml.parse_cell_positions(
+            tree=new_tree, path="initial_conditions/cell_positions"
+        )
+        self.assertTrue(cell_positions["enabled"])
+        self.assertEqual("warm_start", cell_positions["folder"])
+        self.assertEqual("cells.csv", cell_positions["filename"])
+
+    def test_write_cell_positions_wrong_path(self):
+        """Asserts that an Exception is raised when the wrong path is passed."""
+        self.assertRaises(
+            ValueError, pcxml.write_cell_positions, {"enabled": True}, self.tree, "save"
+        )
+
     def test_write_substance(self):
         """Asserts that the data for a microenvironment substance is correctly written."""
         pcxml.write_substance(